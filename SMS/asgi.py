@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SMS.settings')
+# Route the heavy read pages and list APIs to their async views
+os.environ.setdefault('SMS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
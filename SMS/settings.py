@@ -47,13 +47,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this line
+    'SMSapp.concurrency.WhiteNoiseMiddleware',  # WhiteNoise that also runs under ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'SMSapp.instrumentation.QueryMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'SMS.urls'
@@ -87,6 +88,30 @@ DATABASES = {
     }
 }
 
+# SMS_DB_PROFILE=production tunes SQLite for several worker processes:
+# - WAL lets readers run alongside the single writer.
+# - Write transactions start with BEGIN IMMEDIATE, and the busy timeout makes
+#   writers queue for the lock instead of failing with "database is locked".
+# - Connections are kept open between requests.
+SQLITE_PRODUCTION_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',  # durable across app crashes; WAL is synced at checkpoints
+    'PRAGMA mmap_size=268435456',  # 256 MB
+    'PRAGMA cache_size=-65536',  # 64 MB of page cache per connection
+    'PRAGMA temp_store=MEMORY',
+]
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': '; '.join(SQLITE_PRODUCTION_PRAGMAS),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': float(os.getenv('SMS_DB_BUSY_TIMEOUT', '20')),  # seconds
+}
+if os.getenv('SMS_DB_PROFILE', 'development') == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+        'CONN_MAX_AGE': int(os.getenv('SMS_DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,4 +167,78 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    # Keyset pagination keeps list endpoints flat regardless of table size
+    'DEFAULT_PAGINATION_CLASS': 'SMSapp.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    'DEFAULT_FILTER_BACKENDS': [
+        'SMSapp.filters.QueryParamFilterBackend',
+    ],
+}
+
+# Cache for the versioned read-through layer (SMSapp/caching.py).
+# SMS_CACHE_BACKEND picks locmem (default, per process), file (shared by the
+# processes of one machine) or redis/memcached at SMS_CACHE_LOCATION.
+SMS_CACHE_BACKEND = os.getenv('SMS_CACHE_BACKEND', 'locmem')
+SMS_CACHE_LOCATION = os.getenv('SMS_CACHE_LOCATION', '')
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'sms-default',
+    'file': str(BASE_DIR / '.cache'),
+    'redis': 'redis://127.0.0.1:6379',
+    'memcached': '127.0.0.1:11211',
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[SMS_CACHE_BACKEND],
+        'LOCATION': SMS_CACHE_LOCATION or CACHE_DEFAULT_LOCATIONS[SMS_CACHE_BACKEND],
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 5000} if SMS_CACHE_BACKEND in ('locmem', 'file') else {},
+    }
+}
+
+# Share of requests whose queries and timings are recorded for /metrics.
+# Every request in development; a small sample keeps the overhead negligible
+# in production.
+SMS_METRICS_SAMPLE_RATE = float(os.getenv('SMS_METRICS_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+
+# Serve the async versions of the heavy read views (SMS/asgi.py turns this on).
+# Their independent queries run at once on long-lived worker threads that
+# keep their connections; SMS_ASYNC_DB_THREADS=0 runs them on Django's
+# per-request thread instead.
+SMS_ASYNC_VIEWS = os.getenv('SMS_ASYNC_VIEWS', '0') == '1'
+SMS_ASYNC_DB_THREADS = os.getenv('SMS_ASYNC_DB_THREADS', '1') == '1'
+
+# Background jobs (`manage.py run_worker`). Bulk enrollments and imports
+# larger than these limits are queued and answered with 202; any of them,
+# and exports, can be queued on request with ?async=1.
+SMS_JOB_INLINE_ROWS = int(os.getenv('SMS_JOB_INLINE_ROWS', '5000'))
+SMS_JOB_INLINE_UPLOAD_BYTES = int(os.getenv('SMS_JOB_INLINE_UPLOAD_BYTES', str(1024 * 1024)))
+SMS_JOB_FILES_DIR = os.getenv('SMS_JOB_FILES_DIR', str(BASE_DIR / 'job_files'))
+# Export files and leftover uploads are deleted by the workers after this long
+SMS_JOB_FILES_KEEP = float(os.getenv('SMS_JOB_FILES_KEEP', str(7 * 24 * 3600)))  # seconds
+SMS_JOB_RETRY_DELAY = float(os.getenv('SMS_JOB_RETRY_DELAY', '5'))  # seconds, doubled per attempt
+# Running jobs whose worker has not reported for this long are queued again
+SMS_JOB_STALE_AFTER = float(os.getenv('SMS_JOB_STALE_AFTER', '600'))  # seconds
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'SMSapp': {
+            'handlers': ['console'],
+            'level': os.getenv('SMS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Student, Subject, StudentSubjectEnrollment, Activity, Grade
+from .models import Course, Student, Subject, StudentSubjectEnrollment, Activity, Grade, GradingPolicy, Job
 
 admin.site.register(Course)
 admin.site.register(Student)
@@ -7,3 +7,5 @@ admin.site.register(Subject)
 admin.site.register(StudentSubjectEnrollment)
 admin.site.register(Activity)
 admin.site.register(Grade)
+admin.site.register(GradingPolicy)
+admin.site.register(Job)
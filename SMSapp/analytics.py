@@ -0,0 +1,142 @@
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Value
+from django.db.models.functions import Cast, Floor, Least
+
+from .models import Grade, StudentSubjectEnrollment
+
+# Percentage of total_items needed to pass an activity
+PASSING_PERCENT = 75
+
+# Scored grades only; missing and excused grades have no score
+SCORED = Q(status=Grade.GRADED, score__isnull=False, activity__total_items__gt=0)
+
+
+def _percentage():
+    return Cast('score', FloatField()) * Value(100.0) / F('activity__total_items')
+
+
+def _scored(queryset):
+    return queryset.filter(SCORED).annotate(percentage=_percentage())
+
+
+def _summary():
+    """Aggregates shared by every statistic, computed on already-scored grades"""
+    return dict(
+        graded=Count('pk'),
+        average_score=Avg(Cast('score', FloatField())),
+        average_percentage=Avg('percentage'),
+        min_percentage=Min('percentage'),
+        max_percentage=Max('percentage'),
+        passed=Count('pk', filter=Q(percentage__gte=PASSING_PERCENT)),
+    )
+
+
+def _status_counts(queryset, group_by=None):
+    """Missing/excused counts, optionally grouped by a field"""
+    counts = queryset.filter(status__in=[Grade.MISSING, Grade.EXCUSED])
+    aggregates = dict(
+        missing=Count('pk', filter=Q(status=Grade.MISSING)),
+        excused=Count('pk', filter=Q(status=Grade.EXCUSED)),
+    )
+    if group_by is None:
+        return counts.aggregate(**aggregates)
+    rows = counts.values(group_by).annotate(**aggregates).order_by()
+    return {row[group_by]: row for row in rows}
+
+
+def _finish(row, statuses=None):
+    """Round the float aggregates and add the pass rate"""
+    for key in ['average_score', 'average_percentage', 'min_percentage', 'max_percentage']:
+        if row.get(key) is not None:
+            row[key] = round(row[key], 2)
+    row['pass_rate'] = round(row['passed'] * 100 / row['graded'], 2) if row['graded'] else None
+    statuses = statuses or {}
+    row['missing'] = statuses.get('missing', 0)
+    row['excused'] = statuses.get('excused', 0)
+    return row
+
+
+def distribution(queryset):
+    """Count of scored grades in ten percentage buckets: 0-9, 10-19, ..., 90-100"""
+    rows = _scored(queryset).annotate(
+        bucket=Least(Cast(Floor(F('percentage') / 10), FloatField()), Value(9.0))
+    ).values('bucket').annotate(count=Count('pk')).order_by()
+    counts = {int(row['bucket']): row['count'] for row in rows}
+    return [{
+        'range': f'{bucket * 10}-{bucket * 10 + 9 if bucket < 9 else 100}',
+        'count': counts.get(bucket, 0),
+    } for bucket in range(10)]
+
+
+def activity_stats(activity):
+    grades = Grade.objects.filter(activity=activity)
+    row = _scored(grades).aggregate(**_summary())
+    return dict(
+        _finish(row, _status_counts(grades)),
+        activity_id=activity.activity_id,
+        activity_name=activity.activity_name,
+        total_items=activity.total_items,
+        distribution=distribution(grades),
+    )
+
+
+def subject_stats(subject):
+    """Class-wide statistics of a subject, overall, per activity and per activity type"""
+    grades = Grade.objects.filter(activity__subject=subject)
+    overall = _finish(_scored(grades).aggregate(**_summary()), _status_counts(grades))
+
+    activity_statuses = _status_counts(grades, 'activity_id')
+    activities = [
+        _finish(row, activity_statuses.get(row['activity_id']))
+        for row in _scored(grades).values(
+            'activity_id',
+            activity_name=F('activity__activity_name'),
+            activity_type=F('activity__activity_type'),
+            total_items=F('activity__total_items'),
+        ).annotate(**_summary()).order_by('activity_id')
+    ]
+
+    type_statuses = _status_counts(grades, 'activity__activity_type')
+    by_type = [
+        _finish(row, type_statuses.get(row['activity_type']))
+        for row in _scored(grades).values(
+            activity_type=F('activity__activity_type')
+        ).annotate(**_summary()).order_by('activity_type')
+    ]
+
+    return dict(
+        overall,
+        subject=subject.subject_code,
+        enrolled=StudentSubjectEnrollment.objects.filter(subject=subject).count(),
+        activities=activities,
+        activity_types=by_type,
+        distribution=distribution(grades),
+    )
+
+
+def subject_student_stats(subject):
+    """Average percentage of every student with at least one scored grade in a subject"""
+    grades = Grade.objects.filter(activity__subject=subject)
+    statuses = _status_counts(grades, 'student_id')
+    rows = _scored(grades).values(
+        'student_id', code=F('student__student_id'),
+        last_name=F('student__last_name'), first_name=F('student__first_name'),
+    ).annotate(**_summary()).order_by('last_name', 'first_name', 'code')
+    students = []
+    for row in rows:
+        # Grouped by the integer key, reported by the student_id code
+        student_statuses = statuses.get(row['student_id'])
+        row['student_id'] = row.pop('code')
+        students.append(_finish(row, student_statuses))
+    return students
+
+
+def student_stats(student):
+    """Average percentage of a student in each of their subjects"""
+    grades = Grade.objects.filter(student=student)
+    statuses = _status_counts(grades, 'activity__subject__subject_code')
+    rows = _scored(grades).values(
+        subject_code=F('activity__subject__subject_code'), subject_title=F('activity__subject__subject_title')
+    ).annotate(**_summary()).order_by('subject_code')
+    subjects = [_finish(row, statuses.get(row['subject_code'])) for row in rows]
+    overall = _finish(_scored(grades).aggregate(**_summary()), _status_counts(grades))
+    return dict(overall, student_id=student.student_id, subjects=subjects)
@@ -0,0 +1,253 @@
+import json
+import random
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+from django.test import Client
+
+from .caching import get_cache
+from .grading import refresh_final_grades
+from .instrumentation import record_queries
+from .models import Activity, Course, Grade, Section, Student, StudentSubjectEnrollment, Subject
+
+# Generated courses are BENCH1, BENCH2, ...; everything else hangs off them
+COURSE_PREFIX = 'BENCH'
+SECTIONS = ['A', 'B', 'C']
+ACTIVITY_TYPES = ['Quiz', 'Exam', 'Project', 'Activities']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos', 'Lopez']
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paolo', 'Joy', 'Carlo', 'Liza']
+
+
+def parse_scale(value):
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500"""
+    value = str(value).strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def clear_population():
+    """Delete every generated course and what cascades from it (students are SET_NULL, so go first)"""
+    courses = Course.objects.filter(course_abv__startswith=COURSE_PREFIX)
+    Student.objects.filter(course__in=courses).delete()
+    courses.delete()
+
+
+def seed_population(students, courses=4, subjects_per_cohort=3, activities=5, seed=42, log=None):
+    """Generate courses, sections, students, subjects, enrollments, activities and grades.
+
+    Students are spread over courses x 4 year levels x SECTIONS cohorts; each
+    cohort gets its own subjects with every cohort member enrolled, and ~90%
+    of the grades are filled in (a few missing or excused).
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    cohorts = [
+        (f'{COURSE_PREFIX}{number}', year_level, section)
+        for number in range(1, courses + 1) for year_level in range(1, 5) for section in SECTIONS
+    ]
+    per_cohort = -(-students // len(cohorts))
+
+    with transaction.atomic():
+        Course.objects.bulk_create([
+            Course(course_abv=f'{COURSE_PREFIX}{number}', course_name=f'Benchmark Program {number}')
+            for number in range(1, courses + 1)
+        ])
+        course_ids = dict(Course.objects.filter(course_abv__startswith=COURSE_PREFIX).values_list('course_abv', 'id'))
+        Section.objects.bulk_create([
+            Section(course_id=course_ids[course], year_level=year_level, section_name=section, max_students=per_cohort + 10)
+            for course, year_level, section in cohorts
+        ])
+
+        created = 0
+        members = {}
+        batch = []
+        for index in range(students):
+            course, year_level, section = cohorts[index % len(cohorts)]
+            student_id = f'B{index:07d}'
+            members.setdefault(cohorts[index % len(cohorts)], []).append(student_id)
+            batch.append(Student(
+                student_id=student_id,
+                last_name=f'{rng.choice(LAST_NAMES)}{index}',
+                first_name=rng.choice(FIRST_NAMES),
+                middle_name=rng.choice(LAST_NAMES) if rng.random() < 0.8 else None,
+                course_id=course_ids[course],
+                year_level=year_level,
+                section=section,
+                status='I' if rng.random() < 0.05 else 'R',
+            ))
+            if len(batch) == 5000:
+                created += len(Student.objects.bulk_create(batch, batch_size=500))
+                batch = []
+        created += len(Student.objects.bulk_create(batch, batch_size=500))
+        log(f'{created} students')
+
+    subject_count = activity_count = grade_count = 0
+    for (course, year_level, section), student_ids in members.items():
+        with transaction.atomic():
+            for number in range(1, subjects_per_cohort + 1):
+                subject = Subject.objects.create(
+                    subject_code=f'{course}-{year_level}{section}-{number:02d}',
+                    subject_title=f'Benchmark Subject {number}',
+                    course_id=course_ids[course],
+                    school_year='2025-2026',
+                    semester=1 + number % 2,
+                    year_level=year_level,
+                    section=section,
+                )
+                StudentSubjectEnrollment.objects.bulk_enroll([subject], student_ids)
+                for position in range(activities):
+                    activity = Activity.objects.create(
+                        subject=subject,
+                        activity_name=f'Activity {position + 1}',
+                        activity_type=ACTIVITY_TYPES[position % len(ACTIVITY_TYPES)],
+                        total_items=50,
+                    )
+                    entries = []
+                    for student_id in student_ids:
+                        roll = rng.random()
+                        if roll < 0.9:
+                            entries.append((activity.activity_id, student_id, str(rng.randint(15, 50))))
+                        elif roll < 0.95:
+                            entries.append((activity.activity_id, student_id, 'Missing'))
+                        elif roll < 0.97:
+                            entries.append((activity.activity_id, student_id, 'Excused'))
+                    grade_count += Grade.objects.save_grades(entries)['saved']
+                    activity_count += 1
+                refresh_final_grades(subject)
+                subject_count += 1
+        log(f'{course} year {year_level}-{section}: {len(student_ids)} students')
+
+    return {
+        'students': created,
+        'subjects': subject_count,
+        'activities': activity_count,
+        'grades': grade_count,
+    }
+
+
+def sample_targets():
+    """IDs the benchmark requests point at, taken from the first generated subject"""
+    subject = Subject.objects.filter(
+        course__course_abv__startswith=COURSE_PREFIX
+    ).select_related('course').order_by('subject_code').first()
+    if subject is None:
+        return None
+    enrolled = list(StudentSubjectEnrollment.objects.filter(subject=subject).order_by(
+        'student__student_id'
+    ).values_list('student__student_id', flat=True))
+    activity = Activity.objects.filter(subject=subject).order_by('activity_id').first()
+    # A neighbouring cohort's subject, so bulk_enroll has real work to do
+    other = Subject.objects.filter(
+        course_id=subject.course_id, year_level=subject.year_level
+    ).exclude(section=subject.section).order_by('subject_code').first() or subject
+    return {
+        'subject': subject.subject_code,
+        'course': subject.course.course_abv,
+        'year_level': subject.year_level,
+        'section': subject.section,
+        'student': enrolled[0] if enrolled else None,
+        'activity': activity.activity_id if activity else None,
+        'enroll_subject': other.subject_code,
+        'enrolled': enrolled,
+    }
+
+
+def _save_grades_payload(targets):
+    return {'grades': [{'student_id': student_id, 'grade': str(30 + n % 20)}
+                       for n, student_id in enumerate(targets['enrolled'])]}
+
+
+# name -> (method, url, json body) built from sample_targets()
+CASES = {
+    'index': lambda t: ('get', '/', None),
+    'subject_info': lambda t: ('get', f"/subjects/{t['subject']}/", None),
+    'student_subject_info': lambda t: ('get', f"/students/{t['student']}/subjects/{t['subject']}/", None),
+    'grades': lambda t: ('get', f"/activities/{t['activity']}/grades/", None),
+    'get_available_students': lambda t: ('get', f"/api/subjects/{t['enroll_subject']}/available-students/", None),
+    'bulk_enroll': lambda t: ('post', '/api/enrollments/bulk_enroll/', {
+        'subject_code': t['enroll_subject'], 'course': t['course'],
+        'year_level': t['year_level'], 'section': t['section'],
+    }),
+    'save_grades': lambda t: ('post', f"/api/activities/{t['activity']}/grades/", _save_grades_payload(t)),
+    'students_list': lambda t: ('get', '/api/students/', None),
+    'students_search': lambda t: ('get', '/api/students/search/?q=Santos', None),
+    'subjects_list': lambda t: ('get', '/api/subjects/', None),
+    'enrollments_list': lambda t: ('get', f"/api/enrollments/?subject={t['subject']}", None),
+    'activities_list': lambda t: ('get', f"/api/activities/?subject={t['subject']}", None),
+    'sections_list': lambda t: ('get', '/api/sections/', None),
+    'rankings': lambda t: ('get', f"/api/subjects/{t['subject']}/rankings/?student={t['student']}", None),
+}
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(share * len(ordered) + 0.5) - 1))]
+
+
+def run_case(client, method, url, body, repeat, warm):
+    """Time `repeat` requests; each runs in a rolled-back transaction so writes don't pile up"""
+    timings, queries, statuses = [], [], set()
+    for _ in range(repeat):
+        if not warm:
+            get_cache().clear()
+        with transaction.atomic():
+            with record_queries() as recorder:
+                if body is None:
+                    response = getattr(client, method)(url)
+                else:
+                    response = getattr(client, method)(url, json.dumps(body), content_type='application/json')
+                if hasattr(response, 'streaming_content'):
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        timings.append(recorder.wall_time * 1000)
+        queries.append(recorder.count)
+        statuses.add(response.status_code)
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p90_ms': round(percentile(timings, 0.9), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(queries),
+        'status': sorted(statuses),
+    }
+
+
+def run_suite(repeat=20, cases=None, warm=False, log=None):
+    """Run the cases against the generated data; log(name, result) is called after each"""
+    log = log or (lambda name, result: None)
+    targets = sample_targets()
+    if targets is None:
+        raise ValueError('No generated data; run seed_bench first')
+    client = Client(HTTP_HOST='localhost')
+    results = {}
+    for name in cases or CASES:
+        method, url, body = CASES[name](targets)
+        run_case(client, method, url, body, 1, warm)  # warm-up (imports, templates, first connection)
+        results[name] = run_case(client, method, url, body, repeat, warm)
+        log(name, results[name])
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'students': Student.objects.filter(course__course_abv__startswith=COURSE_PREFIX).count(),
+            'repeat': repeat,
+            'warm_cache': warm,
+            'database': connection.vendor,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2, min_delta_ms=1.0):
+    """Regressions of `current` against `baseline`: more queries, or a p50 slower by over `tolerance`"""
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+        slower = result['p50_ms'] - before['p50_ms']
+        if slower > min_delta_ms and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {before['p50_ms']:.1f} -> {result['p50_ms']:.1f} ms")
+    return regressions
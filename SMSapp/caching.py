@@ -0,0 +1,88 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .concurrency import db
+from .models import CacheVersion
+
+# Seconds a cached value may live; versions, not expiry, keep reads fresh
+DEFAULT_TIMEOUT = 600
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Per-name hit/miss counters of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, name, hit):
+        with self._lock:
+            counts = self._counts.setdefault(name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = {name: dict(counts) for name, counts in self._counts.items()}
+        for counts in data.values():
+            total = counts['hits'] + counts['misses']
+            counts['hit_rate'] = round(counts['hits'] / total, 4) if total else None
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'SMS_CACHE_ALIAS', 'default')]
+
+
+def cache_key(name, tokens, parts=()):
+    """Key made of the view name, its entity tokens and its parameters (hashed to stay short)"""
+    digest = hashlib.md5(repr((tokens, tuple(parts))).encode()).hexdigest()
+    return f'sms:{name}:{digest}'
+
+
+def cached(name, depends_on, build, parts=(), timeout=DEFAULT_TIMEOUT, versions=None):
+    """Read-through cache: return the stored value for the current entity versions or build it.
+
+    The version tokens are read (one query) before any data, so a value built
+    from older data can only be stored under older tokens and is never served
+    again after a write bumps them. ``versions`` are tokens already read for
+    this request (see etags.request_etag), used when they cover depends_on.
+    """
+    key, value = _lookup(name, depends_on, parts, versions)
+    if value is _MISSING:
+        value = build()
+        get_cache().set(key, value, timeout)
+    return value
+
+
+async def acached(name, depends_on, build, parts=(), timeout=DEFAULT_TIMEOUT):
+    """cached() for async views: ``build`` is a coroutine function"""
+    key, value = await db(_lookup, name, depends_on, parts)
+    if value is _MISSING:
+        value = await build()
+        await db(get_cache().set, key, value, timeout)
+    return value
+
+
+def _lookup(name, depends_on, parts, versions=None):
+    """(key, stored value or _MISSING) for the current versions of depends_on"""
+    depends_on = list(depends_on)
+    if versions is not None and all(entity in versions for entity in depends_on):
+        tokens = [versions[entity] for entity in depends_on]
+    else:
+        tokens = CacheVersion.objects.tokens(depends_on)
+    key = cache_key(name, tokens, parts)
+    value = get_cache().get(key, _MISSING)
+    stats.record(name, value is not _MISSING)
+    return key, value
@@ -0,0 +1,110 @@
+"""Database work for async (ASGI) views.
+
+Under ASGI Django runs a request's sync code (sync views, the async ORM)
+on a thread of its own, which opens a new database connection for every
+request. db() runs a query function on one of the event loop's long-lived
+worker threads instead, reusing that thread's connection, and gather()
+runs independent ones at the same time.
+"""
+import asyncio
+import functools
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern, URLResolver
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .instrumentation import current_recorder, wrap_connections
+
+
+def worker_threads():
+    """False runs everything on the request thread (needed inside TestCase transactions)"""
+    return getattr(settings, 'SMS_ASYNC_DB_THREADS', True)
+
+
+def _in_worker(func, args, kwargs):
+    # Worker threads get no request signals, so check the connection's age here
+    close_old_connections()
+    try:
+        recorder = current_recorder()
+        with wrap_connections(recorder) if recorder is not None else nullcontext():
+            return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def db(func, *args, **kwargs):
+    """Await the sync function func(*args, **kwargs) that queries the database"""
+    if not worker_threads():
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(_in_worker, thread_sensitive=False)(func, args, kwargs)
+
+
+async def gather(*funcs):
+    """Run independent query functions concurrently; results in the same order"""
+    return await asyncio.gather(*(db(func) for func in funcs))
+
+
+def threaded_view(view):
+    """An async view that runs the sync `view` (and renders its response) on a worker thread"""
+    def call(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)) and not response.is_rendered:
+            response.render()
+        return response
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await db(call, request, *args, **kwargs)
+    return wrapper
+
+
+def use_async_views(patterns, replacements, threaded=()):
+    """URL patterns with async views swapped in.
+
+    Views named in `replacements` ({url name: async view}) are replaced;
+    the sync views named in `threaded` are wrapped with threaded_view().
+    """
+    swapped = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern, use_async_views(pattern.url_patterns, replacements, threaded),
+                pattern.default_kwargs, pattern.app_name, pattern.namespace,
+            )
+        elif pattern.name in replacements or pattern.name in threaded:
+            view = replacements.get(pattern.name) or threaded_view(pattern.callback)
+            pattern = URLPattern(pattern.pattern, view, pattern.default_args, pattern.name)
+        swapped.append(pattern)
+    return swapped
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise that can also run as async middleware.
+
+    One sync-only middleware turns the whole ASGI request back into sync
+    code, and the async views behind it would gain nothing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
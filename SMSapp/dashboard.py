@@ -0,0 +1,112 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .concurrency import gather
+from .models import Activity, Course, Student, Subject
+
+# Activity types shown as tiles on the dashboard, in display order
+ACTIVITY_TYPES = ['Quiz', 'Exam', 'Project', 'Activities']
+
+
+def _queries():
+    """The dashboard's independent queries, as functions in the order _combine() takes them"""
+    this_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return [
+        # Student totals and new students in a single pass
+        lambda: Student.objects.aggregate(
+            total=Count('pk'),
+            new=Count('pk', filter=Q(date_added__gte=this_month)),
+        ),
+        lambda: Subject.objects.aggregate(
+            active=Count('pk', filter=Q(is_active=True)),
+            archived=Count('pk', filter=Q(is_active=False)),
+        ),
+        # Course statistics with student counts (also gives the course total)
+        lambda: list(
+            Course.objects.annotate(
+                student_count=Count('student')
+            ).values('course_abv', 'course_name', 'student_count')
+        ),
+        # Year level distribution
+        lambda: list(
+            Student.objects.values('year_level').annotate(
+                student_count=Count('student_id')
+            ).order_by('year_level')
+        ),
+        # Activity type distribution: one grouped query over the stored progress
+        lambda: list(Activity.objects.values('activity_type').annotate(
+            count=Count('pk'),
+            pending=Count('pk', filter=Q(progress__graded_count=0)),
+            awaiting=Count('pk', filter=Q(progress__graded_count=0, progress__enrolled_count__gt=0)),
+        ).order_by()),
+        _recent_activities,
+        lambda: list(Student.objects.select_related('course').order_by('-date_added')[:5]),
+    ]
+
+
+def _recent_activities():
+    """Recent activities with pending grades count"""
+    activities = list(Activity.objects.select_related('subject', 'progress').order_by('-activity_id')[:5])
+    for activity in activities:
+        activity.pending_count = activity.get_progress().pending
+    return activities
+
+
+def get_dashboard_stats():
+    """Compute every dashboard tile with a fixed number of aggregate queries"""
+    return _combine(*(query() for query in _queries()))
+
+
+async def aget_dashboard_stats():
+    """get_dashboard_stats() for async views, with the queries running concurrently"""
+    return _combine(*await gather(*_queries()))
+
+
+def _combine(student_totals, subject_totals, course_stats, year_stats, type_rows, recent_activities,
+             recent_students):
+    total_students = student_totals['total']
+    for year in year_stats:
+        year['percentage'] = (year['student_count'] / total_students * 100) if total_students > 0 else 0
+
+    by_type = {row['activity_type']: row for row in type_rows}
+    activity_stats = [{
+        'type': activity_type,
+        'count': by_type.get(activity_type, {}).get('count', 0),
+        'pending': by_type.get(activity_type, {}).get('pending', 0),
+    } for activity_type in ACTIVITY_TYPES]
+    pending_activities = sum(row['awaiting'] for row in by_type.values())
+
+    return {
+        'total_students': total_students,
+        'total_courses': len(course_stats),
+        'total_subjects': subject_totals['active'],
+        'archived_subjects': subject_totals['archived'],
+        'new_students': student_totals['new'],
+        'pending_activities': pending_activities,
+        'course_stats': course_stats,
+        'year_stats': year_stats,
+        'activity_stats': activity_stats,
+        'recent_students': recent_students,
+        'recent_activities': recent_activities,
+    }
+
+
+def dashboard_stats_json(stats):
+    """Convert the dashboard statistics into JSON-serializable data"""
+    data = dict(stats)
+    data['recent_students'] = [{
+        'student_id': student.student_id,
+        'last_name': student.last_name,
+        'first_name': student.first_name,
+        'course': student.course.course_abv if student.course else None,
+        'date_added': student.date_added.isoformat() if student.date_added else None,
+    } for student in stats['recent_students']]
+    data['recent_activities'] = [{
+        'activity_id': activity.activity_id,
+        'activity_name': activity.activity_name,
+        'activity_type': activity.activity_type,
+        'total_items': activity.total_items,
+        'subject': activity.subject.subject_code,
+        'pending_count': activity.pending_count,
+    } for activity in stats['recent_activities']]
+    return data
@@ -0,0 +1,87 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .models import CacheVersion
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def request_etag(request, depends_on):
+    """Strong ETag of a GET from the versions of the entities its response is built on.
+
+    Costs one query (the version tokens) and nothing else, so a matching
+    If-None-Match is answered before any data is read or serialized. The
+    path with its query string and the Accept header are part of the tag, as
+    they pick the rows and the renderer.
+    """
+    tokens = CacheVersion.objects.tokens(list(depends_on))
+    # Kept on the request so caching.cached() doesn't read them again
+    request.entity_versions = dict(zip(depends_on, tokens))
+    variant = (tokens, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+    return hashlib.md5(repr(variant).encode()).hexdigest()
+
+
+def _with_etag(response, etag):
+    if etag and response.status_code in (200, 304) and not response.has_header('ETag'):
+        response['ETag'] = quote_etag(etag)
+    return response
+
+
+def etag_view(*depends_on):
+    """Conditional GET for a function view whose response depends on the given entities"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return view(request, *args, **kwargs)
+            etag = request_etag(request, depends_on)
+            response = get_conditional_response(request, etag=quote_etag(etag))
+            if response is None:
+                response = _with_etag(view(request, *args, **kwargs), etag)
+            return response
+        return wrapper
+    return decorator
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """ETags and 304s for viewset GETs.
+
+    list and retrieve depend on ``etag_entities``; an extra action only gets
+    an ETag when it declares its own, e.g.
+    ``@action(detail=True, methods=['get'], etag_entities=['subject'])``,
+    so actions reading other tables never answer 304 with stale data.
+    """
+    etag_entities = ()
+
+    def get_etag_entities(self):
+        if self.action in ('list', 'retrieve'):
+            return self.etag_entities
+        handler = getattr(self, self.action or '', None)
+        return getattr(handler, 'kwargs', {}).get('etag_entities', ())
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        entities = self.get_etag_entities() if request.method in SAFE_METHODS else ()
+        if entities:
+            self.etag = request_etag(request, entities)
+            response = get_conditional_response(request, etag=quote_etag(self.etag))
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return _with_etag(response, getattr(self, 'etag', None))
@@ -0,0 +1,185 @@
+import csv
+import zipfile
+from xml.sax.saxutils import escape
+
+from .gradebook import MISSING_GRADE
+from .models import Activity, Grade, StudentSubjectEnrollment, Subject, format_grade
+
+# Rows fetched per round trip while streaming an export
+CHUNK_SIZE = 2000
+
+STUDENT_COLUMNS = ['Student ID', 'Last Name', 'First Name', 'Middle Name']
+LONG_COLUMNS = ['Subject Code', 'Subject Title', 'Student ID', 'Last Name', 'First Name',
+                'Activity', 'Activity Type', 'Total Items', 'Grade']
+
+
+def _activity_header(activity):
+    return f'{activity.activity_name} ({activity.activity_type}, {activity.total_items})'
+
+
+def _grade_matrix(subject, activities):
+    """Yield (student values, grades aligned to activities) for every enrolled student.
+
+    Enrollments and grades are both read in student key order through server-side
+    iterators and merged, so memory stays flat however large the subject is.
+    """
+    positions = {activity.activity_id: index for index, activity in enumerate(activities)}
+    enrollments = StudentSubjectEnrollment.objects.filter(subject=subject).order_by('student_id').values_list(
+        'student_id', 'student__student_id', 'student__last_name', 'student__first_name', 'student__middle_name'
+    ).iterator(chunk_size=CHUNK_SIZE)
+    grades = Grade.objects.filter(activity__subject=subject).order_by('student_id', 'activity_id').values_list(
+        'student_id', 'activity_id', 'score', 'status'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    grade = next(grades, None)
+    for student in enrollments:
+        student_id = student[0]
+        row = [MISSING_GRADE] * len(activities)
+        # Skip grades of students who are no longer enrolled
+        while grade is not None and grade[0] < student_id:
+            grade = next(grades, None)
+        while grade is not None and grade[0] == student_id:
+            if grade[1] in positions:
+                row[positions[grade[1]]] = format_grade(grade[2], grade[3])
+            grade = next(grades, None)
+        yield [value or '' for value in student[1:]], row
+
+
+def subject_rows(subject):
+    """Header plus one row per enrolled student with a column per activity"""
+    activities = list(Activity.objects.filter(subject=subject).order_by('activity_id'))
+    yield STUDENT_COLUMNS + [_activity_header(activity) for activity in activities]
+    for student, grades in _grade_matrix(subject, activities):
+        yield student + grades
+
+
+def course_rows(course, school_year=None, semester=None):
+    """Long-format rows (one per student and activity) for every subject of a course"""
+    subjects = Subject.objects.filter(course=course, is_active=True)
+    if school_year:
+        subjects = subjects.filter(school_year=school_year)
+    if semester:
+        subjects = subjects.filter(semester=semester)
+
+    yield LONG_COLUMNS
+    for subject in subjects.order_by('subject_code'):
+        activities = list(Activity.objects.filter(subject=subject).order_by('activity_id'))
+        for student, grades in _grade_matrix(subject, activities):
+            for activity, grade in zip(activities, grades):
+                yield [subject.subject_code, subject.subject_title, student[0], student[1], student[2],
+                       activity.activity_name, activity.activity_type, activity.total_items, grade]
+
+
+class _Echo:
+    """File-like object that hands back what is written instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _ChunkSink:
+    """Write-only, non-seekable sink; ZipFile then streams with data descriptors"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = str(value).strip()
+    if not text:
+        return '<c/>'
+    # Grades are stored as text; write plain numbers as numeric cells
+    if text.lstrip('-').replace('.', '', 1).isdigit():
+        return f'<c><v>{text}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+
+
+def _sheet_name(name):
+    # Excel limits sheet names to 31 characters and forbids a few symbols
+    for char in '[]:*?/\\':
+        name = name.replace(char, '-')
+    return escape(name[:31] or 'Sheet1')
+
+
+def stream_xlsx(rows, sheet_name='Grades', rows_per_chunk=500):
+    """Stream a single-sheet workbook, yielding compressed bytes as rows arrive"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        workbook.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        workbook.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=_sheet_name(sheet_name)))
+        yield sink.drain()
+
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(XLSX_SHEET_START.encode())
+            buffer = []
+            for row in rows:
+                buffer.append('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>')
+                if len(buffer) >= rows_per_chunk:
+                    sheet.write(''.join(buffer).encode())
+                    buffer = []
+                    yield sink.drain()
+            sheet.write((''.join(buffer) + XLSX_SHEET_END).encode())
+    yield sink.drain()
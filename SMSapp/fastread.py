@@ -0,0 +1,39 @@
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .serializers import requested_field_names
+
+
+class ValuesReadMixin:
+    """list (and get_values_object() for retrieve) from .values() rows.
+
+    The serializer must use ValuesRepresentationMixin; only the columns of the
+    rendered (or ?fields=) keys are selected, plus the pagination ordering.
+    Writes keep going through the serializer.
+    """
+
+    def values_rows(self, queryset):
+        """(values queryset, plan) for the serializer's values plan"""
+        serializer_class = self.get_serializer_class()
+        plan = serializer_class.values_plan(requested_field_names(self.request))
+        lookups = [lookup for _, lookup in plan]
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            # Cursor positions are read from the rows themselves
+            lookups += [field.lstrip('-') for field in paginator.get_ordering(self.request, queryset, self)]
+        return queryset.values(*dict.fromkeys(lookups)), plan
+
+    def list(self, request, *args, **kwargs):
+        rows, plan = self.values_rows(self.filter_queryset(self.get_queryset()))
+        from_values = self.get_serializer_class().from_values
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([from_values(row, plan) for row in page])
+        return Response([from_values(row, plan) for row in rows])
+
+    def get_values_object(self):
+        """Representation of the looked-up object; raises Http404 like get_object()"""
+        rows, plan = self.values_rows(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return self.get_serializer_class().from_values(row, plan)
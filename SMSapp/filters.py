@@ -0,0 +1,26 @@
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """Filters list endpoints from query parameters declared on the view.
+
+    ``filter_params`` maps a query parameter to a field lookup, e.g.
+    ``{'course': 'course__course_abv'}``. ``search_fields`` lists the fields
+    matched by ``?search=`` as a prefix, so indexed columns stay usable.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, 'filter_params', {}).items():
+            value = request.query_params.get(param)
+            if value not in (None, ''):
+                queryset = queryset.filter(**{lookup: value})
+
+        search = request.query_params.get('search', '').strip()
+        search_fields = getattr(view, 'search_fields', [])
+        if search and search_fields:
+            condition = Q()
+            for field in search_fields:
+                condition |= Q(**{f'{field}__istartswith': search})
+            queryset = queryset.filter(condition)
+        return queryset
@@ -0,0 +1,63 @@
+from .models import Activity, Grade, StudentSubjectEnrollment, format_grade
+
+# Shown for activities a student has no grade for
+MISSING_GRADE = 'N/A'
+
+
+class GradeRow(dict):
+    """Grades of one student keyed by activity_id; ungraded activities read as 'N/A'"""
+
+    def __missing__(self, key):
+        return MISSING_GRADE
+
+    def get(self, key, default=MISSING_GRADE):
+        return super().get(key, default)
+
+
+def load_grade_rows(subject, student_ids=None):
+    """Load every grade of a subject in one query as {student pk: GradeRow}"""
+    queryset = Grade.objects.filter(activity__subject=subject)
+    if student_ids is not None:
+        queryset = queryset.filter(student_id__in=student_ids)
+
+    rows = {}
+    for student_id, activity_id, score, status in queryset.values_list('student_id', 'activity_id', 'score', 'status'):
+        rows.setdefault(student_id, GradeRow())[activity_id] = format_grade(score, status)
+    return rows
+
+
+def student_grades(student, subject):
+    """Grades of a single student in a subject, keyed by activity_id"""
+    return load_grade_rows(subject, [student.pk]).get(student.pk, GradeRow())
+
+
+def subject_gradebook(subject):
+    """Full student x activity grade matrix of a subject"""
+    activities = list(Activity.objects.filter(subject=subject).order_by('activity_id'))
+    enrollments = StudentSubjectEnrollment.objects.filter(
+        subject=subject
+    ).select_related('student').order_by('student__last_name', 'student__first_name')
+    rows = load_grade_rows(subject)
+
+    students = []
+    for enrollment in enrollments:
+        student = enrollment.student
+        row = rows.get(student.pk, GradeRow())
+        students.append({
+            'student_id': student.student_id,
+            'last_name': student.last_name,
+            'first_name': student.first_name,
+            'middle_name': student.middle_name,
+            'grades': [row[activity.activity_id] for activity in activities],
+        })
+
+    return {
+        'subject': subject.subject_code,
+        'activities': [{
+            'activity_id': activity.activity_id,
+            'activity_name': activity.activity_name,
+            'activity_type': activity.activity_type,
+            'total_items': activity.total_items,
+        } for activity in activities],
+        'students': students,
+    }
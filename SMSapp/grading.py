@@ -0,0 +1,121 @@
+import decimal
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import Activity, CacheVersion, Grade, GradingPolicy, StudentSubjectEnrollment
+
+HUNDRED = Decimal(100)
+# Enrollments per UPDATE when storing computed grades
+STORE_BATCH_SIZE = 500
+
+
+def _round(value, policy):
+    exponent = Decimal(1).scaleb(-policy.decimal_places)
+    return value.quantize(exponent, rounding=getattr(decimal, policy.rounding))
+
+
+def transmute(percentage, policy):
+    """Map a rounded percentage through the policy's transmutation table"""
+    if percentage is None or not policy.transmutation:
+        return percentage
+    table = sorted(((Decimal(str(low)), Decimal(str(grade))) for low, grade in policy.transmutation), reverse=True)
+    for low, grade in table:
+        if percentage >= low:
+            return grade
+    return table[-1][1]
+
+
+def compute_subject_grades(subject, policy=None):
+    """Weighted term grade of every enrolled student, as {enrollment_id: (percentage, final_grade)}.
+
+    One grouped query sums each student's scores (and excused items) per
+    activity type; activities without a grade count as zero. Type weights are
+    renormalized over the types the subject actually has.
+    """
+    policy = policy or GradingPolicy.for_subject(subject)
+    weights = {activity_type: Decimal(str(weight)) for activity_type, weight in policy.weights.items()}
+
+    type_totals = dict(
+        Activity.objects.filter(subject=subject, total_items__gt=0).values('activity_type').annotate(
+            total=Sum('total_items')
+        ).values_list('activity_type', 'total').order_by()
+    )
+    sums = {}
+    for row in Grade.objects.filter(activity__subject=subject, activity__total_items__gt=0).values(
+        'student_id', 'activity__activity_type'
+    ).annotate(
+        earned=Sum('score', filter=Q(status=Grade.GRADED)),
+        excused=Sum('activity__total_items', filter=Q(status=Grade.EXCUSED)),
+    ).order_by():
+        sums[(row['student_id'], row['activity__activity_type'])] = (row['earned'] or 0, row['excused'] or 0)
+
+    results = {}
+    for enrollment_id, student_id in StudentSubjectEnrollment.objects.filter(
+        subject=subject
+    ).values_list('id', 'student_id'):
+        weighted = weight_total = Decimal(0)
+        for activity_type, total in type_totals.items():
+            weight = weights.get(activity_type, Decimal(0))
+            earned, excused = sums.get((student_id, activity_type), (0, 0))
+            possible = total - excused
+            if weight <= 0 or possible <= 0:
+                continue
+            weighted += weight * Decimal(earned) * HUNDRED / possible
+            weight_total += weight
+        if weight_total:
+            percentage = _round(weighted / weight_total, policy)
+            results[enrollment_id] = (percentage, transmute(percentage, policy))
+        else:
+            results[enrollment_id] = (None, None)
+    return results
+
+
+def refresh_final_grades(subject, force=False):
+    """Recompute and store the subject's final grades if any are stale; returns rows written"""
+    if not force and not StudentSubjectEnrollment.objects.filter(subject=subject, grade_stale=True).exists():
+        return 0
+    with transaction.atomic():
+        results = compute_subject_grades(subject)
+        _store_results(results)
+        CacheVersion.objects.bump('enrollment')
+    return len(results)
+
+
+def _store_results(results):
+    """Write computed grades to their enrollments and mark them fresh"""
+    StudentSubjectEnrollment.objects.bulk_update([
+        StudentSubjectEnrollment(id=enrollment_id, grade_percentage=percentage, final_grade=final_grade,
+                                 grade_stale=False)
+        for enrollment_id, (percentage, final_grade) in results.items()
+    ], ['grade_percentage', 'final_grade', 'grade_stale'], batch_size=STORE_BATCH_SIZE)
+
+
+def final_grades(subject):
+    """Stored final grades of a subject's students, refreshed first if stale"""
+    refresh_final_grades(subject)
+    return [{
+        'student_id': row['student__student_id'],
+        'last_name': row['student__last_name'],
+        'first_name': row['student__first_name'],
+        'grade_percentage': row['grade_percentage'],
+        'final_grade': row['final_grade'],
+    } for row in StudentSubjectEnrollment.objects.filter(subject=subject).values(
+        'student__student_id', 'student__last_name', 'student__first_name', 'grade_percentage', 'final_grade'
+    ).order_by('student__last_name', 'student__first_name', 'student__student_id')]
+
+
+def report_card(student):
+    """Final grade of a student in every enrolled subject"""
+    enrollments = StudentSubjectEnrollment.objects.filter(student=student).select_related('subject')
+    for enrollment in enrollments.filter(grade_stale=True):
+        refresh_final_grades(enrollment.subject)
+    return [{
+        'subject_code': enrollment.subject.subject_code,
+        'subject_title': enrollment.subject.subject_title,
+        'school_year': enrollment.subject.school_year,
+        'semester': enrollment.subject.semester,
+        'grade_percentage': enrollment.grade_percentage,
+        'final_grade': enrollment.final_grade,
+    } for enrollment in enrollments.order_by('subject__school_year', 'subject__semester', 'subject__subject_code')]
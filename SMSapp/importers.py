@@ -0,0 +1,217 @@
+import codecs
+import csv
+import itertools
+import json
+
+from django.db import transaction
+
+from .models import Course, Section, Student
+
+# Rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 5000
+# Rows per INSERT statement (Django caps it further under SQLite's parameter limit)
+INSERT_BATCH_SIZE = 500
+
+STUDENT_ID_MAX_LENGTH = Student._meta.get_field('student_id').max_length
+NAME_MAX_LENGTH = Student._meta.get_field('last_name').max_length
+SECTION_MAX_LENGTH = Student._meta.get_field('section').max_length
+STATUSES = {code for code, _ in Student.STATUS_CHOICES}
+YEAR_LEVELS = range(1, 5)
+
+
+def _normalize_key(key):
+    return (key or '').strip().lower().replace(' ', '_')
+
+
+def read_csv_rows(lines):
+    """Rows of a CSV file as dicts; headers like 'Student ID' become 'student_id'"""
+    reader = csv.reader(lines)
+    header = [_normalize_key(key) for key in next(reader, [])]
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield dict(zip(header, values))
+
+
+def read_json_rows(lines):
+    """Rows of a JSON array, or of JSON Lines when the file is not an array.
+
+    JSON Lines are parsed one line at a time; an array is parsed whole, so
+    large imports should use JSON Lines (or CSV).
+    """
+    lines = iter(lines)
+    first = next((line for line in lines if line.strip()), '')
+    if first.lstrip().startswith('['):
+        rows = json.loads(first + ''.join(lines))
+    else:
+        rows = (json.loads(line) for line in itertools.chain([first], lines) if line.strip())
+    for row in rows:
+        yield {_normalize_key(key): value for key, value in row.items()}
+
+
+def upload_format(upload, fmt=None):
+    if fmt not in (None, '', 'csv', 'json'):
+        raise ValueError(f'Unsupported format: {fmt}')
+    return fmt or ('json' if upload.name.lower().endswith(('.json', '.jsonl')) else 'csv')
+
+
+def read_uploaded_rows(upload, fmt=None):
+    """Rows of an uploaded CSV or JSON file, decoded line by line"""
+    return read_file_rows(codecs.iterdecode(upload, 'utf-8-sig'), upload_format(upload, fmt))
+
+
+def read_file_rows(lines, fmt):
+    """Rows of a CSV or JSON file given as text lines (an open file, say)"""
+    if fmt == 'json':
+        return read_json_rows(lines)
+    return read_csv_rows(lines)
+
+
+class StudentImporter:
+    """Validates student rows in chunks and inserts the valid ones in bulk.
+
+    Courses and sections are loaded once; section capacity is tracked in memory
+    so the rows of one import cannot overfill a section between them.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.courses = {course.course_abv.upper(): course for course in Course.objects.all()}
+        self.remaining = {
+            (section.course_id, section.year_level, section.section_name): section.remaining
+            for section in Section.objects.with_occupancy()
+        }
+        self.seen = set()
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows, first_row=1, on_chunk=None):
+        """Import rows numbered from first_row; on_chunk(last row, result so far) follows each commit"""
+        for chunk in self._chunks(rows, first_row):
+            self._import_chunk(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk[-1][0], self.result())
+        return self.result()
+
+    def result(self):
+        return {'created': self.created, 'errors': self.errors}
+
+    def _chunks(self, rows, first_row):
+        chunk = []
+        for item in enumerate(rows, start=first_row):
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _import_chunk(self, chunk):
+        ids = [str(row.get('student_id') or '').strip() for _, row in chunk]
+        existing = set(Student.objects.filter(student_id__in=[i for i in ids if i]).values_list('student_id', flat=True))
+
+        students = []
+        for (line, row), student_id in zip(chunk, ids):
+            student, errors = self._build(row, student_id, existing)
+            if errors:
+                self.errors.append({'row': line, 'student_id': student_id, 'errors': errors})
+            else:
+                students.append((line, student))
+        if not students:
+            return
+
+        # Student.objects.bulk_create() bumps the student cache version
+        with transaction.atomic():
+            inserted = _insert_students([student for _, student in students])
+        self.created += len(inserted)
+        # Taken by a concurrent write between the check above and the insert
+        for line, student in students:
+            if student.student_id not in inserted:
+                self._release_seat(student)
+                self.errors.append({'row': line, 'student_id': student.student_id,
+                                    'errors': {'student_id': 'Student ID already exists'}})
+
+    def _build(self, row, student_id, existing):
+        errors = {}
+        if not student_id:
+            errors['student_id'] = 'Student ID is required'
+        elif len(student_id) > STUDENT_ID_MAX_LENGTH:
+            errors['student_id'] = f'Student ID is longer than {STUDENT_ID_MAX_LENGTH} characters'
+        elif student_id in existing:
+            errors['student_id'] = 'Student ID already exists'
+        elif student_id in self.seen:
+            errors['student_id'] = 'Duplicate student ID in file'
+
+        values = {}
+        for field in ['last_name', 'first_name', 'middle_name']:
+            values[field] = str(row.get(field) or '').strip()
+            if len(values[field]) > NAME_MAX_LENGTH:
+                errors[field] = f'Longer than {NAME_MAX_LENGTH} characters'
+        for field in ['last_name', 'first_name']:
+            if not values[field]:
+                errors[field] = 'This field is required'
+
+        course = self.courses.get(str(row.get('course') or '').strip().upper())
+        if course is None:
+            errors['course'] = 'Invalid course abbreviation'
+
+        try:
+            year_level = int(row.get('year_level'))
+        except (TypeError, ValueError):
+            year_level = None
+        if year_level not in YEAR_LEVELS:
+            errors['year_level'] = 'Year level must be between 1 and 4'
+
+        section = str(row.get('section') or '').strip().upper()
+        if not section:
+            errors['section'] = 'This field is required'
+        elif len(section) > SECTION_MAX_LENGTH:
+            errors['section'] = f'Longer than {SECTION_MAX_LENGTH} characters'
+
+        status = str(row.get('status') or 'R').strip().upper()
+        if status not in STATUSES:
+            errors['status'] = 'Status must be R or I'
+
+        if errors:
+            return None, errors
+
+        # Sections without a Section row have no capacity limit
+        key = (course.pk, year_level, section)
+        if key in self.remaining:
+            if self.remaining[key] <= 0:
+                return None, {'section': f'Section {course.course_abv} {year_level}-{section} is full'}
+            self.remaining[key] -= 1
+
+        self.seen.add(student_id)
+        return Student(student_id=student_id, last_name=values['last_name'], first_name=values['first_name'],
+                       middle_name=values['middle_name'] or None, course=course, year_level=year_level,
+                       section=section, status=status), None
+
+    def _release_seat(self, student):
+        key = (student.course_id, student.year_level, student.section)
+        if key in self.remaining:
+            self.remaining[key] += 1
+
+
+# Fields that tell an imported row from one another writer inserted under the same ID
+INSERTED_FIELDS = ['student_id', 'last_name', 'first_name', 'middle_name', 'course_id', 'year_level',
+                   'section', 'status']
+
+
+def _insert_students(students):
+    """Bulk insert validated students; returns the set of student IDs inserted.
+
+    IDs taken since they were checked are skipped (ignore_conflicts) instead
+    of failing the chunk, and are told apart from the rows of this import by
+    their stored values.
+    """
+    Student.objects.bulk_create(students, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True)
+    wanted = {tuple(getattr(student, field) for field in INSERTED_FIELDS) for student in students}
+    stored = Student.objects.filter(
+        student_id__in=[student.student_id for student in students]
+    ).values_list(*INSERTED_FIELDS)
+    return {row[0] for row in stored if row in wanted}
+
+
+def import_students(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import student rows; returns {'created': n, 'errors': [{'row', 'student_id', 'errors'}]}"""
+    return StudentImporter(chunk_size).run(rows)
@@ -0,0 +1,248 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds (Prometheus "le" labels)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# A statement repeated this often in one request is reported as an N+1 pattern
+DUPLICATE_THRESHOLD = 5
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN (...) lists collapsed, so repeats of one statement match"""
+    sql = _LITERALS.sub('?', sql)
+    return _IN_LISTS.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() that counts queries, DB time and repeated statements"""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.wall_time = 0.0
+        # Async views can run a request's queries on several threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.db_time += elapsed
+                self.count += 1
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold=DUPLICATE_THRESHOLD):
+        """(fingerprint, times) of the statements repeated at least `threshold` times"""
+        return [(sql, times) for sql, times in self.fingerprints.most_common() if times >= threshold]
+
+
+_current_recorder = ContextVar('query_recorder', default=None)
+
+
+def current_recorder():
+    """The recorder of the innermost record_queries() block in this context, if any"""
+    return _current_recorder.get()
+
+
+@contextmanager
+def record_queries():
+    """Record the queries of every database connection of this thread while the block runs.
+
+    Worker threads started through concurrency.db() record into it as well.
+    """
+    recorder = QueryRecorder()
+    start = time.perf_counter()
+    token = _current_recorder.set(recorder)
+    with wrap_connections(recorder):
+        try:
+            yield recorder
+        finally:
+            recorder.wall_time = time.perf_counter() - start
+            _current_recorder.reset(token)
+
+
+def wrap_connections(recorder):
+    """Install recorder on this thread's connections; closing the returned stack removes it"""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return stack
+
+
+@contextmanager
+def instrument(name):
+    """Record a block of code (a command, a task) under `name` in the metrics"""
+    with record_queries() as recorder:
+        yield recorder
+    metrics.observe(name, recorder)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.total}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.total}'
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db_duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.duplicate_requests = 0
+
+
+class MetricsRegistry:
+    """Per-view histograms of the sampled requests, kept in this process.
+
+    Histograms are cumulative, as Prometheus expects; rolling windows come
+    from rate()/histogram_quantile() over the scrapes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, recorder):
+        duplicates = recorder.duplicates()
+        with self._lock:
+            entry = self._views.get(view)
+            if entry is None:
+                entry = self._views[view] = ViewMetrics()
+            entry.duration.observe(recorder.wall_time)
+            entry.db_duration.observe(recorder.db_time)
+            entry.queries.observe(recorder.count)
+            if duplicates:
+                entry.duplicate_requests += 1
+        if duplicates:
+            sql, times = duplicates[0]
+            logger.warning('Possible N+1 in %s: %d queries, one statement ran %d times: %s',
+                           view, recorder.count, times, sql[:300])
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """The metrics in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            views = sorted(self._views.items())
+            families = [
+                ('sms_view_duration_seconds', 'Wall time of sampled requests', 'duration'),
+                ('sms_view_db_seconds', 'Total SQL time of sampled requests', 'db_duration'),
+                ('sms_view_queries', 'SQL queries per sampled request', 'queries'),
+            ]
+            for name, help_text, attribute in families:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for view, entry in views:
+                    lines.extend(getattr(entry, attribute).samples(name, f'view="{_escape(view)}"'))
+            name = 'sms_view_duplicate_query_requests_total'
+            lines += [f'# HELP {name} Sampled requests that repeated a statement (N+1 suspects)',
+                      f'# TYPE {name} counter']
+            lines += [f'{name}{{view="{_escape(view)}"}} {entry.duplicate_requests}' for view, entry in views]
+        lines += ['# HELP sms_metrics_sample_rate Share of requests recorded',
+                  '# TYPE sms_metrics_sample_rate gauge',
+                  f'sms_metrics_sample_rate {sample_rate()}']
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = MetricsRegistry()
+
+
+def sample_rate():
+    return getattr(settings, 'SMS_METRICS_SAMPLE_RATE', 1.0)
+
+
+def sampled():
+    rate = sample_rate()
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class QueryMetricsMiddleware:
+    """Records a sample of requests (SMS_METRICS_SAMPLE_RATE) per view name.
+
+    Unsampled requests cost one random() call; sampled ones add the execute
+    wrapper's bookkeeping to each query. Runs as sync or async middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not sampled():
+            return self.get_response(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        metrics.observe(view_name(request), recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not sampled():
+            return await self.get_response(request)
+        with record_queries() as recorder:
+            # Sync views (and sync middleware) run on the request's thread-sensitive
+            # executor thread, whose connections are not the event loop's
+            executor = await sync_to_async(wrap_connections)(recorder)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(executor.close)()
+        metrics.observe(view_name(request), recorder)
+        return response
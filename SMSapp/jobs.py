@@ -0,0 +1,234 @@
+"""Background jobs for operations too large to finish inside a request.
+
+Views queue a Job and answer 202 with its status URL; `manage.py run_worker`
+processes claim queued jobs from the table and run the handler registered
+for their kind. Handlers report progress as they go, and the partial result
+they report lets a retried job resume where the failed attempt stopped.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+
+from .exports import course_rows, stream_csv, stream_xlsx, subject_rows
+from .importers import StudentImporter, read_file_rows
+from .models import Course, Job, StudentSubjectEnrollment, Subject
+
+logger = logging.getLogger(__name__)
+
+# Errors worth another attempt: a write lock held too long, a dropped connection
+RETRY_ERRORS = (OperationalError, InterfaceError)
+
+# Export rows written between two progress reports
+EXPORT_PROGRESS_ROWS = 5000
+
+# Seconds between two sweeps of SMS_JOB_FILES_DIR by a worker
+PURGE_INTERVAL = 60
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register the function run for jobs of `kind`; it gets the job and its params as keywords"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def wants_job(request, large=False):
+    """Queue the operation when it is large or the client asks for it with ?async=1"""
+    return large or request.GET.get('async') in ('1', 'true')
+
+
+def job_file(job, extension):
+    """A job's output file: named by the job id alone, never by user input"""
+    return Path(settings.SMS_JOB_FILES_DIR) / f'{job.pk}.{extension}'
+
+
+@handler('bulk_enroll')
+def bulk_enroll(job, subject_codes, student_ids):
+    """Enroll subject by subject; a retry skips the subjects already reported"""
+    subjects = list(Subject.objects.filter(subject_code__in=subject_codes).order_by('subject_code'))
+    report = job.result or {'enrolled_count': 0, 'unknown': [], 'subjects': {}}
+    for done, subject in enumerate(subjects, start=1):
+        if subject.subject_code in report['subjects']:
+            continue
+        part = StudentSubjectEnrollment.objects.bulk_enroll([subject], student_ids)
+        report['enrolled_count'] += part['enrolled_count']
+        report['unknown'] = part['unknown']
+        report['subjects'].update(part['subjects'])
+        job.report(done, len(subjects), report)
+    return report
+
+
+def _upload_path(extension):
+    path = Path(settings.SMS_JOB_FILES_DIR) / f'upload-{uuid.uuid4().hex}.{extension}'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_upload(upload, extension):
+    """Store an uploaded file for a job; returns its name in SMS_JOB_FILES_DIR"""
+    path = _upload_path(extension)
+    with path.open('wb') as out:
+        for chunk in upload.chunks():
+            out.write(chunk)
+    return path.name
+
+
+def save_rows(rows):
+    """Store rows sent as a JSON body for a job, as JSON Lines; returns the file's name"""
+    path = _upload_path('json')
+    with path.open('w', encoding='utf-8') as out:
+        for row in rows:
+            out.write(json.dumps(row) + '\n')
+    return path.name
+
+
+def discard_upload(job):
+    """Delete the stored upload of a job that will not run again"""
+    if job.params.get('file'):
+        (Path(settings.SMS_JOB_FILES_DIR) / job.params['file']).unlink(missing_ok=True)
+
+
+def purge_files(older_than):
+    """Delete job files unchanged for `older_than` (a timedelta); returns how many went.
+
+    Uploads of queued or running jobs are kept however old they are.
+    """
+    directory = Path(settings.SMS_JOB_FILES_DIR)
+    if not directory.is_dir():
+        return 0
+    waiting = {
+        params.get('file') for params in
+        Job.objects.filter(status__in=[Job.QUEUED, Job.RUNNING]).values_list('params', flat=True)
+    }
+    cutoff = time.time() - older_than.total_seconds()
+    removed = 0
+    for path in directory.iterdir():
+        if path.name not in waiting and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+@handler('import_students')
+def import_students(job, file, format='csv'):
+    """Import a saved upload; a retry skips the rows already committed"""
+    importer = StudentImporter()
+    if job.result:
+        importer.created, importer.errors = job.result['created'], job.result['errors']
+    start = job.progress_done
+    with (Path(settings.SMS_JOB_FILES_DIR) / file).open(newline='', encoding='utf-8-sig') as handle:
+        result = importer.run(islice(read_file_rows(handle, format), start, None), first_row=start + 1,
+                              on_chunk=lambda row, result: job.report(row, result=result))
+    # The row count is only known once the file has been read
+    job.report(job.progress_done, job.progress_done)
+    return result
+
+
+@handler('export')
+def export(job, scope, code, fmt, name, school_year=None, semester=None):
+    """Write a subject or course grade export to a file served by /api/jobs/<id>/download/"""
+    if scope == 'subject':
+        rows = subject_rows(Subject.objects.get(subject_code=code))
+    else:
+        rows = course_rows(Course.objects.get(course_abv=code), school_year, semester)
+
+    written = 0
+
+    def counted(rows):
+        nonlocal written
+        for written, row in enumerate(rows, start=1):
+            if written % EXPORT_PROGRESS_ROWS == 0:
+                job.report(written)
+            yield row
+
+    path = job_file(job, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.part')
+    if fmt == 'csv':
+        with partial.open('w', newline='', encoding='utf-8') as out:
+            out.writelines(stream_csv(counted(rows)))
+    else:
+        with partial.open('wb') as out:
+            out.writelines(stream_xlsx(counted(rows), sheet_name=name))
+    partial.replace(path)
+    job.report(written, written)
+    # The display name is only used for the download's filename
+    return {'file': f'{name}.{fmt}', 'rows': written}
+
+
+def retry_delay(attempts):
+    """Wait before the next attempt, doubling from SMS_JOB_RETRY_DELAY seconds"""
+    return timedelta(seconds=settings.SMS_JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome; transient database errors are retried"""
+    started = time.perf_counter()
+    try:
+        func = HANDLERS.get(job.kind)
+        if func is None:
+            raise LookupError(f'Unknown job kind: {job.kind}')
+        result = func(job, **job.params)
+    except RETRY_ERRORS as error:
+        logger.warning("Job %s attempt %d failed: %s", job, job.attempts, error)
+        job.fail(error, retry_in=retry_delay(job.attempts))
+    except Exception as error:
+        logger.exception("Job %s failed", job)
+        job.fail(error)
+    else:
+        job.succeed(result)
+        logger.info("Job %s finished in %.2fs", job, time.perf_counter() - started)
+    if job.status != Job.QUEUED:
+        discard_upload(job)
+
+
+def run_pending(worker):
+    """Run due jobs until none is left; returns how many ran"""
+    count = 0
+    while (job := Job.objects.claim(worker)) is not None:
+        run_job(job)
+        count += 1
+    return count
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(stop, poll=1.0, until_idle=False):
+    """Worker loop of one process: run jobs as they come until the `stop` event is set"""
+    name = worker_name()
+    stale_after = timedelta(seconds=settings.SMS_JOB_STALE_AFTER)
+    keep_files = timedelta(seconds=settings.SMS_JOB_FILES_KEEP)
+    next_purge = 0
+    while not stop.is_set():
+        # A worker is a long-lived process with no request signals to recycle its connection
+        close_old_connections()
+        Job.objects.requeue_stale(stale_after)
+        if time.monotonic() >= next_purge:
+            purge_files(keep_files)
+            next_purge = time.monotonic() + PURGE_INTERVAL
+        job = Job.objects.claim(name)
+        if job is not None:
+            try:
+                run_job(job)
+            except RETRY_ERRORS:
+                # The outcome could not be saved; the job is requeued once it goes stale
+                logger.exception("Could not record the outcome of job %s", job)
+        elif until_idle:
+            break
+        else:
+            stop.wait(poll)
+    close_old_connections()
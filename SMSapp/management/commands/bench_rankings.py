@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from SMSapp import rankings
+from SMSapp.grading import refresh_final_grades
+from SMSapp.models import Activity, Course, Grade, Student, StudentSubjectEnrollment, Subject
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time the subject ranking queries on a generated class (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000, help='Students in the generated subject')
+        parser.add_argument('--activities', type=int, default=10, help='Activities in the generated subject')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (best is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                subject = self.seed(options['students'], options['activities'])
+                self.report('final grades (cold)', lambda: refresh_final_grades(subject, force=True), 1)
+                sample = f'BENCH-{options["students"] // 2:06d}'
+                repeat = options['repeat']
+                self.report('top 10', lambda: rankings.top_students(subject, 10), repeat)
+                self.report('rank of one student', lambda: rankings.student_rank(subject, sample), repeat)
+                self.report('quartile buckets', lambda: rankings.percentile_buckets(subject, 4), repeat)
+                self.report('top 10 in a section', lambda: rankings.top_students(subject, 10, 'B'), repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, students, activities):
+        rng = random.Random(42)
+        course, _ = Course.objects.get_or_create(course_abv='BENCH', defaults={'course_name': 'Benchmark'})
+        subject = Subject.objects.create(
+            subject_code='BENCH-RANK', subject_title='Ranking benchmark', course=course,
+            school_year='2025-2026', semester=1, year_level=1, section='A',
+        )
+        Student.objects.bulk_create([
+            Student(student_id=f'BENCH-{n:06d}', last_name=f'Last{n}', first_name=f'First{n}',
+                    course=course, year_level=1, section='ABCD'[n % 4])
+            for n in range(students)
+        ], batch_size=500)
+        ids = [f'BENCH-{n:06d}' for n in range(students)]
+        StudentSubjectEnrollment.objects.bulk_enroll([subject], ids)
+        created = [
+            Activity.objects.create(subject=subject, activity_name=f'Activity {n}',
+                                    activity_type=['Quiz', 'Exam', 'Project', 'Activities'][n % 4], total_items=50)
+            for n in range(activities)
+        ]
+        Grade.objects.save_grades(
+            (activity.activity_id, student_id, str(rng.randint(10, 50)))
+            for activity in created for student_id in ids
+        )
+        return subject
+
+    def report(self, label, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(f'{label:<24} best {min(timings):8.2f} ms')
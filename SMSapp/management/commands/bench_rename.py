@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from SMSapp.benchmarks import COURSE_PREFIX, seed_population
+from SMSapp.instrumentation import record_queries
+from SMSapp.models import Course, Grade, Student, StudentSubjectEnrollment, Subject
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time course, subject and student renames as the number of grades grows (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1200, help='Students in the generated course')
+        parser.add_argument('--activities', type=int, nargs='+', default=[1, 10, 40],
+                            help='Activities per subject for each run; grades grow with them')
+
+    def handle(self, *args, **options):
+        if Course.objects.filter(course_abv__startswith=COURSE_PREFIX).exists():
+            raise CommandError('Generated data already exists; run seed_bench --clear first')
+        self.stdout.write(f"{'grades':>8} {'rename':<8} {'ms':>8} {'queries':>8}")
+        for activities in options['activities']:
+            try:
+                with transaction.atomic():
+                    self.run(options['students'], activities)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def run(self, students, activities):
+        seed_population(students, courses=1, subjects_per_cohort=1, activities=activities)
+        course = f'{COURSE_PREFIX}1'
+        subject = Subject.objects.filter(course__course_abv=course).order_by('subject_code').first().subject_code
+        student = StudentSubjectEnrollment.objects.filter(subject__subject_code=subject).order_by(
+            'student__student_id'
+        ).values_list('student__student_id', flat=True).first()
+        grades = Grade.objects.count()
+        # Deferred foreign keys are checked at COMMIT against a violation counter, so the
+        # rolled-back timings leave out only a constant-time step
+        for label, manager, old, new in [
+            ('course', Course.objects, course, f'{course}X'),
+            ('subject', Subject.objects, subject, f'{subject}X'),
+            ('student', Student.objects, student, f'{student}X'),
+        ]:
+            with record_queries() as recorder:
+                manager.rename(old, new)
+            self.stdout.write(f'{grades:>8} {label:<8} {recorder.wall_time * 1000:>8.2f} {recorder.count:>8}')
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from SMSapp.models import Course, Student
+from SMSapp.serializers import StudentSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF and .values() serialization of generated students (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000, help='Students to generate and serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per path (best is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['students'])
+                queryset = Student.objects.filter(student_id__startswith='BENCH-').order_by('student_id')
+                plan = StudentSerializer.values_plan()
+                lookups = [lookup for _, lookup in plan]
+
+                # .all() each run: a serializer fills the queryset's result cache
+                def serializer_path():
+                    return StudentSerializer(queryset.all(), many=True).data
+
+                def joined_serializer_path():
+                    return StudentSerializer(queryset.select_related('course'), many=True).data
+
+                def values_path():
+                    return [StudentSerializer.from_values(row, plan) for row in queryset.values(*lookups)]
+
+                if JSONRenderer().render(serializer_path()) != JSONRenderer().render(values_path()):
+                    raise AssertionError('Values path output differs from the serializer')
+
+                repeat = options['repeat']
+                baseline = self.report('serializer (per-row course)', serializer_path, repeat)
+                joined = self.report('serializer + select_related', joined_serializer_path, repeat)
+                fast = self.report('values plan', values_path, repeat)
+                self.stdout.write(f'values plan speedup: {baseline / fast:.1f}x over the per-row serializer, '
+                                  f'{joined / fast:.1f}x over the select_related serializer')
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, students):
+        course, _ = Course.objects.get_or_create(course_abv='BENCH', defaults={'course_name': 'Benchmark'})
+        Student.objects.bulk_create([
+            Student(student_id=f'BENCH-{n:06d}', last_name=f'Last{n}', first_name=f'First{n}',
+                    middle_name=f'M{n}', course=course, year_level=1 + n % 4, section='ABCD'[n % 4])
+            for n in range(students)
+        ], batch_size=500)
+
+    def report(self, label, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        best = min(timings)
+        self.stdout.write(f'{label:<30} best {best:9.2f} ms')
+        return best
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from SMSapp.importers import IMPORT_CHUNK_SIZE, import_students, read_file_rows
+
+class Command(BaseCommand):
+    help = 'Import students from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or a JSON array / JSON Lines file')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            help='File format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Rows validated and inserted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+        fmt = options['format'] or ('json' if path.suffix.lower() in ('.json', '.jsonl') else 'csv')
+
+        with path.open(newline='', encoding='utf-8-sig') as handle:
+            rows = read_file_rows(handle, fmt)
+            try:
+                result = import_students(rows, chunk_size=options['chunk_size'])
+            except (ValueError, AttributeError) as e:
+                raise CommandError(f'Could not read {path}: {e}')
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']} ({error['student_id'] or 'no ID'}): {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} students, {len(result['errors'])} rows rejected"
+        ))
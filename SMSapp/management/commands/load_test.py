@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SMSapp.benchmarks import percentile, sample_targets
+
+
+def default_paths():
+    """The heavy read pages and list APIs, on seed_bench data"""
+    targets = sample_targets()
+    if targets is None:
+        raise CommandError('No generated data; run seed_bench first or pass --path')
+    return [
+        '/',
+        f"/subjects/{targets['subject']}/",
+        f"/students/{targets['student']}/",
+        '/api/students/',
+        '/api/subjects/',
+        f"/api/enrollments/?subject={targets['subject']}",
+    ]
+
+
+async def _read_response(reader):
+    """(status, keep-alive) of one HTTP/1.1 response, with its body read and dropped"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def _client(host, port, paths, offset, deadline, results):
+    """One keep-alive connection sending requests back to back until the deadline"""
+    reader = writer = None
+    n = offset
+    while time.monotonic() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n'.encode())
+            status, keep_alive = await _read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as error:
+            results['errors'][type(error).__name__] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+            continue
+        results['timings'].append(time.perf_counter() - start)
+        results['statuses'][status] += 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(base_url, paths, connections, seconds):
+    url = urlsplit(base_url)
+    results = {'timings': [], 'statuses': Counter(), 'errors': Counter()}
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(*(
+        _client(url.hostname, url.port or 80, paths, n, deadline, results) for n in range(connections)
+    ))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Load a running server with many concurrent keep-alive connections and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--connections', type=int, default=200, help='Concurrent connections')
+        parser.add_argument('--seconds', type=float, default=20, help='How long to keep the load on')
+        parser.add_argument('--path', action='append', help='Paths to request in turn (default: heavy reads)')
+
+    def handle(self, *args, **options):
+        if urlsplit(options['url']).scheme != 'http':
+            raise CommandError('Only plain http:// URLs are supported')
+        paths = options['path'] or default_paths()
+        self.stdout.write(f"{options['connections']} connections for {options['seconds']}s "
+                          f"against {options['url']} ({len(paths)} paths)")
+        results = asyncio.run(run_load(options['url'], paths, options['connections'], options['seconds']))
+
+        timings = results['timings']
+        if not timings:
+            raise CommandError(f"No responses; errors: {dict(results['errors'])}")
+        self.stdout.write(f"requests: {len(timings)} ({len(timings) / options['seconds']:.1f}/s)")
+        self.stdout.write(f'latency: p50 {percentile(timings, 0.5) * 1000:.1f} ms, '
+                          f'p90 {percentile(timings, 0.9) * 1000:.1f} ms, '
+                          f'p99 {percentile(timings, 0.99) * 1000:.1f} ms')
+        self.stdout.write(f"statuses: {dict(sorted(results['statuses'].items()))}")
+        if results['errors']:
+            raise CommandError(f"Connection errors: {dict(results['errors'])}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from SMSapp.models import ActivityProgress
+
+class Command(BaseCommand):
+    help = 'Rebuild and verify the per-activity grading progress counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify the stored counters, without rebuilding them',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rebuilt = ActivityProgress.objects.rebuild()
+            self.stdout.write(f'Rebuilt progress for {len(rebuilt)} activities')
+
+        mismatches = ActivityProgress.objects.verify()
+        for activity_id, stored, actual in mismatches:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Activity {activity_id}: stored {stored}, actual (enrolled, graded) {actual}'
+                )
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} progress counters are out of date')
+        self.stdout.write(self.style.SUCCESS('All progress counters match'))
@@ -0,0 +1,54 @@
+import json
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SMSapp.benchmarks import CASES, compare, run_suite
+
+
+class Command(BaseCommand):
+    help = 'Time the hot pages and APIs on seed_bench data; save or compare a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per case')
+        parser.add_argument('--case', action='append', choices=sorted(CASES), help='Only run these cases')
+        parser.add_argument('--warm', action='store_true', help='Keep the read cache between requests')
+        parser.add_argument('--output', help='Write the results to this JSON file (a new baseline)')
+        parser.add_argument('--baseline', help='Compare against this JSON file; fails on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p50 slowdown before it counts as a regression (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        if options['verbosity'] < 2:
+            # Views log every enrollment; keep the table readable
+            logging.getLogger('SMSapp').setLevel(logging.WARNING)
+        self.stdout.write(f"{'case':<24}{'p50':>10}{'p90':>10}{'p99':>10}{'queries':>9}  status")
+        try:
+            report = run_suite(options['repeat'], options['case'], options['warm'], log=self.row)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f"Saved results to {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            if baseline.get('meta', {}).get('students') != report['meta']['students']:
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline was taken with {baseline.get('meta', {}).get('students')} students, "
+                    f"this run has {report['meta']['students']}"
+                ))
+            regressions = compare(report, baseline, options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def row(self, name, result):
+        self.stdout.write(
+            f"{name:<24}{result['p50_ms']:>8.1f}ms{result['p90_ms']:>8.1f}ms{result['p99_ms']:>8.1f}ms"
+            f"{result['queries']:>9}  {','.join(str(code) for code in result['status'])}"
+        )
@@ -0,0 +1,56 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from SMSapp.jobs import work
+from SMSapp.models import Job
+
+
+def _stop_on_signals(stop):
+    # Finish the running job, then exit (Ctrl+C reaches every process of the pool)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+
+
+def _process(stop, poll, until_idle):
+    _stop_on_signals(stop)
+    work(stop, poll, until_idle)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (bulk enrollments, imports, exports) in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Worker processes; jobs run in parallel')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between checks of an empty queue')
+        parser.add_argument('--until-idle', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        queued = Job.objects.filter(status=Job.QUEUED).count()
+        self.stdout.write(f"{options['processes']} worker processes, {queued} jobs queued")
+        if options['processes'] <= 1:
+            stop = threading.Event()
+            _stop_on_signals(stop)
+            work(stop, options['poll'], options['until_idle'])
+            return
+
+        # Children must open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        processes = [
+            context.Process(target=_process, args=(stop, options['poll'], options['until_idle']))
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        _stop_on_signals(stop)
+        for process in processes:
+            process.join()
+        failed = [process.exitcode for process in processes if process.exitcode]
+        if failed:
+            self.stderr.write(f'{len(failed)} worker processes exited with errors: {failed}')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from SMSapp.benchmarks import COURSE_PREFIX, clear_population, parse_scale, seed_population
+from SMSapp.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic school (courses, sections, students, subjects, enrollments, grades) for run_bench'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', default='10k', help='Number of students, e.g. 1k, 10k, 100k')
+        parser.add_argument('--courses', type=int, default=4)
+        parser.add_argument('--subjects-per-cohort', type=int, default=3,
+                            help='Subjects per course/year level/section cohort')
+        parser.add_argument('--activities', type=int, default=5, help='Activities per subject')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--replace', action='store_true', help='Delete previously generated data first')
+        parser.add_argument('--clear', action='store_true', help='Only delete previously generated data')
+
+    def handle(self, *args, **options):
+        exists = Course.objects.filter(course_abv__startswith=COURSE_PREFIX).exists()
+        if options['clear'] or (exists and options['replace']):
+            clear_population()
+            self.stdout.write('Deleted the generated data')
+            if options['clear']:
+                return
+        elif exists:
+            raise CommandError('Generated data already exists; use --replace to regenerate it')
+
+        try:
+            students = parse_scale(options['students'])
+        except ValueError:
+            raise CommandError(f"Invalid --students value: {options['students']}")
+        summary = seed_population(
+            students,
+            courses=options['courses'],
+            subjects_per_cohort=options['subjects_per_cohort'],
+            activities=options['activities'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Generated {students} students, {subjects} subjects, {activities} activities, {grades} grades'.format(
+                **summary
+            )
+        ))
@@ -0,0 +1,98 @@
+import multiprocessing
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+
+from SMSapp.models import Activity, Grade, StudentSubjectEnrollment
+
+
+def _targets(limit):
+    """(activity_id, enrolled student IDs) for up to `limit` activities that have students"""
+    targets = []
+    for activity_id, subject_id in Activity.objects.order_by('activity_id').values_list('activity_id', 'subject_id'):
+        student_ids = list(StudentSubjectEnrollment.objects.filter(subject_id=subject_id).values_list(
+            'student__student_id', flat=True
+        )[:200])
+        if student_ids:
+            targets.append((activity_id, student_ids))
+        if len(targets) == limit:
+            break
+    return targets
+
+
+def _writer(worker, targets, seconds, batch, rollback, results):
+    rng = random.Random(worker)
+    saved = errors = 0
+    timings = []
+    first_error = ''
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        activity_id, student_ids = rng.choice(targets)
+        entries = [(activity_id, student_id, str(rng.randint(0, 50)))
+                   for student_id in rng.sample(student_ids, min(batch, len(student_ids)))]
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                Grade.objects.save_grades(entries)
+                if rollback:
+                    transaction.set_rollback(True)
+            saved += 1
+            timings.append(time.perf_counter() - start)
+        except OperationalError as error:
+            errors += 1
+            first_error = first_error or str(error)
+    connections.close_all()
+    results.put({'saved': saved, 'errors': errors, 'timings': timings, 'first_error': first_error})
+
+
+class Command(BaseCommand):
+    help = 'Save grades from several processes at once and report throughput and lock errors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent writer processes')
+        parser.add_argument('--seconds', type=float, default=10, help='How long each writer runs')
+        parser.add_argument('--batch', type=int, default=40, help='Grades per save_grades() call')
+        parser.add_argument('--rollback', action='store_true', help='Roll every save back (keeps the data)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in (':memory:', ''):
+            raise CommandError('Needs a database file shared by the writer processes')
+        targets = _targets(50)
+        if not targets:
+            raise CommandError('No activities with enrolled students; run seed_bench first')
+
+        options_used = connection.settings_dict.get('OPTIONS', {})
+        self.stdout.write(f"{options['workers']} writers for {options['seconds']}s, "
+                          f"transaction_mode={options_used.get('transaction_mode')}, "
+                          f"timeout={options_used.get('timeout', 5)}s")
+
+        # Children must open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [
+            context.Process(target=_writer, args=(
+                worker, targets, options['seconds'], options['batch'], options['rollback'], results
+            )) for worker in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        saved = sum(report['saved'] for report in reports)
+        errors = sum(report['errors'] for report in reports)
+        timings = sorted(timing for report in reports for timing in report['timings'])
+        self.stdout.write(f"saves: {saved} ({saved / options['seconds']:.1f}/s, "
+                          f"{saved * options['batch'] / options['seconds']:.0f} grades/s)")
+        if timings:
+            p50 = timings[len(timings) // 2] * 1000
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+            self.stdout.write(f'latency: p50 {p50:.1f} ms, p99 {p99:.1f} ms')
+        if errors:
+            first = next(report['first_error'] for report in reports if report['first_error'])
+            raise CommandError(f'{errors} saves failed, e.g. {first}')
+        self.stdout.write(self.style.SUCCESS('No lock errors'))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 04:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_progress(apps, schema_editor):
+    Activity = apps.get_model('SMSapp', 'Activity')
+    ActivityProgress = apps.get_model('SMSapp', 'ActivityProgress')
+    StudentSubjectEnrollment = apps.get_model('SMSapp', 'StudentSubjectEnrollment')
+    Grade = apps.get_model('SMSapp', 'Grade')
+
+    enrolled = dict(
+        StudentSubjectEnrollment.objects.values('subject_id').annotate(
+            total=models.Count('pk')
+        ).values_list('subject_id', 'total')
+    )
+    graded = dict(
+        Grade.objects.values('activity_id').annotate(
+            total=models.Count('pk')
+        ).values_list('activity_id', 'total')
+    )
+    ActivityProgress.objects.bulk_create([
+        ActivityProgress(
+            activity_id=activity_id,
+            enrolled_count=enrolled.get(subject_id, 0),
+            graded_count=graded.get(activity_id, 0),
+        ) for activity_id, subject_id in Activity.objects.values_list('activity_id', 'subject_id')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0015_section_max_students'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityProgress',
+            fields=[
+                ('activity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='SMSapp.activity')),
+                ('enrolled_count', models.IntegerField(default=0)),
+                ('graded_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_progress, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='section',
+            name='section_name',
+            field=models.CharField(max_length=50),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+def remove_duplicates(apps, schema_editor):
+    """Drop duplicate enrollments and grades so the unique constraints apply"""
+    StudentSubjectEnrollment = apps.get_model('SMSapp', 'StudentSubjectEnrollment')
+    Grade = apps.get_model('SMSapp', 'Grade')
+    Activity = apps.get_model('SMSapp', 'Activity')
+    ActivityProgress = apps.get_model('SMSapp', 'ActivityProgress')
+
+    # Keep the first enrollment and the most recently saved grade of each pair
+    keep = StudentSubjectEnrollment.objects.values('student', 'subject').annotate(keep=models.Min('id'))
+    StudentSubjectEnrollment.objects.exclude(id__in=keep.values('keep')).delete()
+    keep = Grade.objects.values('student', 'activity').annotate(keep=models.Max('grade_id'))
+    Grade.objects.exclude(grade_id__in=keep.values('keep')).delete()
+
+    enrolled = dict(
+        StudentSubjectEnrollment.objects.values('subject_id').annotate(
+            total=models.Count('pk')
+        ).values_list('subject_id', 'total')
+    )
+    graded = dict(
+        Grade.objects.values('activity_id').annotate(
+            total=models.Count('pk')
+        ).values_list('activity_id', 'total')
+    )
+    for activity_id, subject_id in Activity.objects.values_list('activity_id', 'subject_id'):
+        ActivityProgress.objects.filter(activity_id=activity_id).update(
+            enrolled_count=enrolled.get(subject_id, 0),
+            graded_count=graded.get(activity_id, 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0016_activityprogress'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['subject', 'activity_type'], name='activity_subject_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['course', 'year_level', 'section', 'status'], name='student_cohort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['date_added'], name='student_date_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubjectenrollment',
+            index=models.Index(fields=['subject', 'student'], name='enrollment_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['is_active'], name='subject_is_active_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(fields=('student', 'activity'), name='unique_student_activity'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentsubjectenrollment',
+            constraint=models.UniqueConstraint(fields=('student', 'subject'), name='unique_student_subject'),
+        ),
+    ]
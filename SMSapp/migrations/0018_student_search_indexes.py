@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 04:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0017_enrollment_grade_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'first_name', 'student_id'], name='student_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='student_last_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='student_first_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2 on 2026-10-18 04:12
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+STATUS_WORDS = {
+    'M': {'M', 'MISSING', 'INC', 'ABSENT'},
+    'E': {'E', 'EX', 'EXCUSED'},
+}
+
+
+# Unconvertible grades listed in the migration error, at most
+SHOWN_UNREADABLE = 20
+
+
+def parse_text(text):
+    """(score, status) for an old text grade, or None when it held no grade.
+
+    Raises ValueError for text that is neither a score nor a status word.
+    """
+    text = (text or '').strip().upper()
+    if text in ('', 'N/A', 'NA'):
+        return None
+    for status, words in STATUS_WORDS.items():
+        if text in words:
+            return None, status
+    try:
+        score = Decimal(text.split('/')[0].strip())
+    except InvalidOperation:
+        raise ValueError(text)
+    if not score.is_finite() or score < 0 or score >= 100000:
+        raise ValueError(text)
+    return score.quantize(Decimal('0.01')), 'G'
+
+
+def grade_batches(Grade, *fields, size=2000):
+    """Grades in grade_id order, a page at a time (safe to update while walking)"""
+    last = 0
+    while True:
+        batch = list(Grade.objects.filter(grade_id__gt=last).order_by('grade_id').only('grade_id', *fields)[:size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1].grade_id
+
+
+def convert_grades(apps, schema_editor):
+    Grade = apps.get_model('SMSapp', 'Grade')
+    ActivityProgress = apps.get_model('SMSapp', 'ActivityProgress')
+
+    empty, unreadable = [], []
+    for batch in grade_batches(Grade, 'student_grade'):
+        converted = []
+        for grade in batch:
+            try:
+                parsed = parse_text(grade.student_grade)
+            except ValueError:
+                unreadable.append((grade.grade_id, grade.student_grade))
+                continue
+            if parsed is None:
+                empty.append(grade.grade_id)
+            else:
+                grade.score, grade.status = parsed
+                converted.append(grade)
+        Grade.objects.bulk_update(converted, ['score', 'status'])
+
+    if unreadable:
+        # Never replace a teacher's grade with a guess; the migration is atomic,
+        # so nothing above is kept and the grades can be fixed and migrated again
+        shown = ', '.join(f'{grade_id}: {text!r}' for grade_id, text in unreadable[:SHOWN_UNREADABLE])
+        more = len(unreadable) - SHOWN_UNREADABLE
+        raise ValueError(
+            f'{len(unreadable)} grade(s) cannot be converted to a score or status; '
+            f'fix their student_grade text and run migrate again. grade_id: text = {shown}'
+            + (f' (and {more} more)' if more > 0 else '')
+        )
+
+    if empty:
+        # 'N/A' rows never counted as grades; drop them and fix the progress counters
+        for start in range(0, len(empty), 500):
+            Grade.objects.filter(grade_id__in=empty[start:start + 500]).delete()
+        ActivityProgress.objects.update(graded_count=Coalesce(
+            models.Subquery(
+                Grade.objects.filter(activity_id=models.OuterRef('activity_id')).order_by().values(
+                    'activity_id'
+                ).annotate(total=models.Count('pk')).values('total')
+            ),
+            0,
+        ))
+
+
+def restore_text(apps, schema_editor):
+    Grade = apps.get_model('SMSapp', 'Grade')
+    labels = {'M': 'Missing', 'E': 'Excused'}
+
+    for batch in grade_batches(Grade, 'score', 'status'):
+        for grade in batch:
+            if grade.status in labels or grade.score is None:
+                grade.student_grade = labels.get(grade.status, 'N/A')
+            else:
+                grade.student_grade = f'{grade.score.normalize():f}'
+        Grade.objects.bulk_update(batch, ['student_grade'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0018_student_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grade',
+            name='score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='grade',
+            name='status',
+            field=models.CharField(choices=[('G', 'Graded'), ('M', 'Missing'), ('E', 'Excused')], default='G', max_length=1),
+        ),
+        migrations.RunPython(convert_grades, restore_text),
+        migrations.RemoveField(
+            model_name='grade',
+            name='student_grade',
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['activity', 'status', 'score'], name='grade_activity_stats_idx'),
+        ),
+    ]
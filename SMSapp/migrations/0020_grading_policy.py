@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 04:14
+
+import SMSapp.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0019_numeric_grades'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingPolicy',
+            fields=[
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grading_policy', serialize=False, to='SMSapp.subject')),
+                ('weights', models.JSONField(default=SMSapp.models.default_weights)),
+                ('transmutation', models.JSONField(blank=True, default=list)),
+                ('decimal_places', models.PositiveSmallIntegerField(default=2)),
+                ('rounding', models.CharField(choices=[('ROUND_HALF_UP', 'Half up'), ('ROUND_HALF_EVEN', 'Half even'), ('ROUND_DOWN', 'Down'), ('ROUND_UP', 'Up')], default='ROUND_HALF_UP', max_length=16)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentsubjectenrollment',
+            name='final_grade',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsubjectenrollment',
+            name='grade_percentage',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentsubjectenrollment',
+            name='grade_stale',
+            field=models.BooleanField(default=True),
+        ),
+    ]
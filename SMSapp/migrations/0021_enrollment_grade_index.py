@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0020_grading_policy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentsubjectenrollment',
+            index=models.Index(fields=['subject', 'grade_percentage'], name='enrollment_subject_grade_idx'),
+        ),
+    ]
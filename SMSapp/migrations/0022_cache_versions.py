@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 04:19
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+ENTITIES = ['course', 'subject', 'section', 'student', 'enrollment', 'activity', 'grade']
+
+
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('SMSapp', 'CacheVersion')
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(name=name, token=uuid.uuid4().hex) for name in ENTITIES], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SMSapp', '0021_enrollment_grade_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('token', models.CharField(max_length=32)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,175 @@
+# Generated by Django 5.2 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# (model, natural code field) of the tables getting an integer primary key
+PARENTS = [('course', 'course_abv'), ('student', 'student_id'), ('subject', 'subject_code')]
+
+# (model, foreign key, parent) of every reference to those tables
+REFERENCES = [
+    ('student', 'course', 'course'),
+    ('subject', 'course', 'course'),
+    ('section', 'course', 'course'),
+    ('studentsubjectenrollment', 'student', 'student'),
+    ('studentsubjectenrollment', 'subject', 'subject'),
+    ('activity', 'subject', 'subject'),
+    ('grade', 'student', 'student'),
+    ('gradingpolicy', 'subject', 'subject'),
+]
+
+
+def number_rows(apps, schema_editor):
+    """Give every course, student and subject a sequential id, in code order"""
+    quote = schema_editor.connection.ops.quote_name
+    for name, code in PARENTS:
+        model = apps.get_model('SMSapp', name)
+        codes = model.objects.order_by(code).values_list(code, flat=True)
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            quote(model._meta.db_table), quote('id'), quote(model._meta.get_field(code).column)
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(sql, list(enumerate(codes, start=1)))
+
+
+def copy_references(apps, schema_editor):
+    """Fill each <fk>_ref column with the id of the row the code column points at"""
+    codes = dict(PARENTS)
+    for name, field, parent in REFERENCES:
+        model = apps.get_model('SMSapp', name)
+        parents = apps.get_model('SMSapp', parent).objects.filter(**{codes[parent]: OuterRef(f'{field}_id')})
+        model.objects.update(**{f'{field}_ref': Subquery(parents.values('id')[:1])})
+
+
+class Migration(migrations.Migration):
+    """Integer surrogate keys for Course, Student and Subject.
+
+    The codes stay as unique columns (URLs and the API still use them);
+    foreign keys move from the codes to the new ids.
+    """
+
+    dependencies = [
+        ('SMSapp', '0022_cache_versions'),
+    ]
+
+    operations = [
+        # Number the parent rows and copy every reference as an integer
+        *[
+            migrations.AddField(model_name=name, name='id', field=models.IntegerField(null=True))
+            for name, _ in PARENTS
+        ],
+        migrations.RunPython(number_rows),
+        *[
+            migrations.AddField(model_name=name, name=f'{field}_ref', field=models.IntegerField(null=True))
+            for name, field, _ in REFERENCES
+        ],
+        migrations.RunPython(copy_references),
+
+        # Drop the code references and the indexes built on them
+        migrations.RemoveIndex(model_name='student', name='student_cohort_idx'),
+        migrations.AlterUniqueTogether(name='section', unique_together=set()),
+        migrations.RemoveConstraint(model_name='studentsubjectenrollment', name='unique_student_subject'),
+        migrations.RemoveIndex(model_name='studentsubjectenrollment', name='enrollment_subject_idx'),
+        migrations.RemoveIndex(model_name='studentsubjectenrollment', name='enrollment_subject_grade_idx'),
+        migrations.RemoveIndex(model_name='activity', name='activity_subject_type_idx'),
+        migrations.RemoveConstraint(model_name='grade', name='unique_student_activity'),
+        *[migrations.RemoveField(model_name=name, name=field) for name, field, _ in REFERENCES],
+
+        # Switch the primary keys; the codes become unique columns
+        *[
+            operation for name, code, max_length in [
+                ('course', 'course_abv', 10), ('student', 'student_id', 20), ('subject', 'subject_code', 20),
+            ] for operation in [
+                migrations.AlterField(
+                    model_name=name,
+                    name='id',
+                    field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+                ),
+                migrations.AlterField(
+                    model_name=name, name=code, field=models.CharField(max_length=max_length, unique=True),
+                ),
+            ]
+        ],
+
+        # Turn the integer copies into the foreign keys
+        migrations.AlterField(
+            model_name='student',
+            name='course_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='SMSapp.course'),
+        ),
+        migrations.AlterField(
+            model_name='subject',
+            name='course_ref',
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='SMSapp.course'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='course_ref',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='SMSapp.course'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='studentsubjectenrollment',
+            name='student_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='SMSapp.student'),
+        ),
+        migrations.AlterField(
+            model_name='studentsubjectenrollment',
+            name='subject_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='SMSapp.subject'),
+        ),
+        migrations.AlterField(
+            model_name='activity',
+            name='subject_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='SMSapp.subject'),
+        ),
+        migrations.AlterField(
+            model_name='grade',
+            name='student_ref',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='SMSapp.student'),
+        ),
+        migrations.AlterField(
+            model_name='gradingpolicy',
+            name='subject_ref',
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grading_policy',
+                serialize=False, to='SMSapp.subject',
+            ),
+        ),
+        *[migrations.RenameField(model_name=name, old_name=f'{field}_ref', new_name=field) for name, field, _ in REFERENCES],
+
+        # Rebuild the indexes and constraints on the integer columns
+        migrations.AlterModelOptions(
+            name='section',
+            options={'ordering': ['course__course_abv', 'year_level', 'section_name']},
+        ),
+        migrations.AlterUniqueTogether(name='section', unique_together={('course', 'year_level', 'section_name')}),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['course', 'year_level', 'section', 'status'], name='student_cohort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubjectenrollment',
+            index=models.Index(fields=['subject', 'student'], name='enrollment_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubjectenrollment',
+            index=models.Index(fields=['subject', 'grade_percentage'], name='enrollment_subject_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['subject', 'activity_type'], name='activity_subject_type_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentsubjectenrollment',
+            constraint=models.UniqueConstraint(fields=('student', 'subject'), name='unique_student_subject'),
+        ),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(fields=('student', 'activity'), name='unique_student_activity'),
+        ),
+    ]
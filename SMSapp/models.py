@@ -1,45 +1,78 @@
 from django.db import models, transaction  # Add transaction here
+from django.db.models.functions import Coalesce, Lower
 from django.utils import timezone
 import datetime
+import uuid
+from decimal import Decimal, InvalidOperation
 from django.core.exceptions import ValidationError  # Import ValidationError
 
 
+class RenameManagerMixin:
+    """Renames a row's natural code (course_abv, subject_code, student_id).
+
+    Foreign keys point at the integer id, so a rename is one UPDATE of one
+    row however much data hangs off it.
+    """
+    code_field = None
+    # Cache entities whose data shows this model's code
+    rename_entities = ()
+
+    def rename(self, old, new):
+        """Change the code `old` to `new`; returns the renamed row"""
+        if old == new:
+            return self.get(**{self.code_field: old})
+        name = self.model._meta.verbose_name.capitalize()
+        with transaction.atomic():
+            if self.filter(**{self.code_field: new}).exists():
+                raise ValidationError(f'{name} {new} already exists')
+            if not self.filter(**{self.code_field: old}).update(**{self.code_field: new}):
+                raise self.model.DoesNotExist(f'{name} {old} not found')
+            # update() sends no signals
+            CacheVersion.objects.bump(*self.rename_entities)
+        return self.get(**{self.code_field: new})
+
+
+class CourseManager(RenameManagerMixin, models.Manager):
+    code_field = 'course_abv'
+    rename_entities = ('course', 'student', 'subject', 'section')
+
+
 class Course(models.Model):
-    course_abv = models.CharField(max_length=10, primary_key=True)
+    course_abv = models.CharField(max_length=10, unique=True)
     course_name = models.CharField(max_length=100)
 
+    objects = CourseManager()
+
     def __str__(self):
         return self.course_name
 
 
-class StudentManager(models.Manager):
+class StudentManager(RenameManagerMixin, models.Manager):
+    code_field = 'student_id'
+    rename_entities = ('student', 'enrollment', 'grade')
+
+    def ids_for(self, student_ids, batch_size=500):
+        """{student_id code: primary key} of the codes that exist"""
+        ids = {}
+        for batch in chunked(student_ids, batch_size):
+            ids.update(self.filter(student_id__in=batch).values_list('student_id', 'id'))
+        return ids
+
     def update_student_id(self, old_id, new_data):
-        student = self.get(student_id=old_id)
         new_id = new_data.get('student_id', old_id)
-        
-        # If ID is changing and new ID doesn't exist
-        if new_id != old_id:
-            # Create new student with new ID
-            self.create(
-                student_id=new_id,
-                last_name=new_data.get('last_name', student.last_name),
-                first_name=new_data.get('first_name', student.first_name),
-                middle_name=new_data.get('middle_name', student.middle_name),
-                course=new_data.get('course', student.course),
-                year_level=new_data.get('year_level', student.year_level),
-                section=new_data.get('section', student.section)
-            )
-            # Delete old student record
-            student.delete()
-            # Get and return the new student record
-            return self.get(student_id=new_id)
-        
-        # If no ID change, just update fields
-        for key, value in new_data.items():
-            setattr(student, key, value)
-        student.save()
+        with transaction.atomic():
+            student = self.rename(old_id, new_id)
+            for key, value in new_data.items():
+                setattr(student, key, value)
+            student.save()
         return student
 
+    def bulk_create(self, objs, *args, **kwargs):
+        # Bulk inserts send no post_save signal, so invalidate cached rosters here
+        created = super().bulk_create(objs, *args, **kwargs)
+        CacheVersion.objects.bump('student')
+        return created
+
 
 class Student(models.Model):
     STATUS_CHOICES = [
@@ -47,7 +80,7 @@ class Student(models.Model):
         ('I', 'Irregular')
     ]
     
-    student_id = models.CharField(max_length=20, primary_key=True)
+    student_id = models.CharField(max_length=20, unique=True)
     last_name = models.CharField(max_length=50)
     first_name = models.CharField(max_length=50)
     middle_name = models.CharField(max_length=50, blank=True, null=True)
@@ -59,9 +92,29 @@ class Student(models.Model):
 
     objects = StudentManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'year_level', 'section', 'status'], name='student_cohort_idx'),
+            models.Index(fields=['date_added'], name='student_date_added_idx'),
+            models.Index(fields=['last_name', 'first_name', 'student_id'], name='student_name_idx'),
+            # Case-insensitive prefix search on names
+            models.Index(Lower('last_name'), name='student_last_name_lower_idx'),
+            models.Index(Lower('first_name'), name='student_first_name_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student_id} - {self.last_name}, {self.first_name}"
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ActivityProgress.objects.students_removed([self.pk])
+            return super().delete(*args, **kwargs)
+
+
+class SubjectManager(RenameManagerMixin, models.Manager):
+    code_field = 'subject_code'
+    rename_entities = ('subject', 'activity', 'enrollment')
+
 
 class Subject(models.Model):
     SEMESTER_CHOICES = [
@@ -70,7 +123,7 @@ class Subject(models.Model):
         (3, 'Summer'),
     ]
 
-    subject_code = models.CharField(max_length=20, primary_key=True)
+    subject_code = models.CharField(max_length=20, unique=True)
     subject_title = models.CharField(max_length=100)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True)  # Make course optional
     school_year = models.CharField(max_length=20)
@@ -82,17 +135,23 @@ class Subject(models.Model):
     is_active = models.BooleanField(default=True)
     archived_date = models.DateTimeField(null=True, blank=True)
 
+    objects = SubjectManager()
+
     class Meta:
         ordering = ['subject_code']
+        indexes = [
+            models.Index(fields=['is_active'], name='subject_is_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject_code} - {self.subject_title}"
 
     def update_subject_code(self, new_code):
         """Update subject code safely"""
+        new_code = new_code.upper()
         if new_code != self.subject_code:
+            Subject.objects.rename(self.subject_code, new_code)
             self.subject_code = new_code
-        self.save()
         return self
 
     def save(self, *args, **kwargs):
@@ -114,23 +173,98 @@ class Subject(models.Model):
             # Handle subject code change if needed
             new_code = data.get('subject_code')
             if new_code and new_code.upper() != original_code:
-                # Use raw SQL to update the primary key directly
-                from django.db import connection
-                with connection.cursor() as cursor:
-                    cursor.execute(
-                        "UPDATE SMSapp_subject SET subject_code = %s WHERE subject_code = %s",
-                        [new_code.upper(), original_code]
-                    )
-                self.subject_code = new_code.upper()
-            else:
-                self.save()
+                self.update_subject_code(new_code)
+            self.save()
             
         return self
 
 
+def chunked(items, size):
+    """Split a list into lists of at most size items"""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class EnrollmentManager(models.Manager):
+    # Keeps IN (...) lists and INSERT batches under SQLite's variable limits
+    BATCH_SIZE = 500
+
+    def bulk_enroll(self, subjects, student_ids):
+        """Enroll students (given by student_id code) into subjects with set-based queries in one transaction.
+
+        Returns a report with the unknown student IDs and, per subject code,
+        the newly enrolled and already enrolled (skipped) student IDs.
+        """
+        requested = list(dict.fromkeys(str(student_id) for student_id in student_ids))
+        subjects = list(subjects)
+
+        with transaction.atomic():
+            ids = Student.objects.ids_for(requested)
+            valid = [student_id for student_id in requested if student_id in ids]
+
+            # Only used to report skipped students; inserts rely on the constraint
+            existing = set()
+            for batch in chunked([ids[student_id] for student_id in valid], self.BATCH_SIZE):
+                existing.update(
+                    self.filter(subject__in=subjects, student_id__in=batch)
+                    .values_list('subject_id', 'student_id')
+                )
+
+            report = {'unknown': [sid for sid in requested if sid not in ids], 'subjects': {}}
+            new_rows = []
+            for subject in subjects:
+                enrolled = [sid for sid in valid if (subject.pk, ids[sid]) not in existing]
+                skipped = [sid for sid in valid if (subject.pk, ids[sid]) in existing]
+                new_rows.extend(self.model(subject_id=subject.pk, student_id=ids[sid]) for sid in enrolled)
+                report['subjects'][subject.subject_code] = {'enrolled': enrolled, 'skipped': skipped}
+
+            # The unique constraint settles races with concurrent enrollments
+            self.bulk_create(new_rows, batch_size=self.BATCH_SIZE, ignore_conflicts=True)
+            ActivityProgress.objects.recount_enrolled([subject.pk for subject in subjects])
+
+        report['enrolled_count'] = len(new_rows)
+        return report
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        CacheVersion.objects.bump('enrollment')
+        return created
+
+    def roster(self, subject):
+        """A subject's enrollments by student name, with student and course joined in"""
+        return self.filter(subject=subject).select_related('student__course').order_by(
+            'student__last_name', 'student__first_name', 'student__student_id'
+        )
+
+    def mark_grades_stale(self, subject_ids, student_ids=None):
+        """Flag stored final grades for recomputation (all students, or only student_ids)"""
+        queryset = self.filter(subject_id__in=list(subject_ids))
+        if student_ids is not None:
+            queryset = queryset.filter(student_id__in=list(student_ids))
+        updated = queryset.update(grade_stale=True)
+        if updated:
+            CacheVersion.objects.bump('enrollment')
+        return updated
+
+
 class StudentSubjectEnrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    # Term grade computed by grading.refresh_final_grades()
+    grade_percentage = models.DecimalField(max_digits=7, decimal_places=3, null=True, blank=True)
+    final_grade = models.DecimalField(max_digits=7, decimal_places=3, null=True, blank=True)
+    grade_stale = models.BooleanField(default=True)
+
+    objects = EnrollmentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'subject'], name='unique_student_subject'),
+        ]
+        indexes = [
+            models.Index(fields=['subject', 'student'], name='enrollment_subject_idx'),
+            models.Index(fields=['subject', 'grade_percentage'], name='enrollment_subject_grade_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} enrolled in {self.subject}"
@@ -143,37 +277,323 @@ class Activity(models.Model):
     activity_type = models.CharField(max_length=50)
     total_items = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject', 'activity_type'], name='activity_subject_type_idx'),
+        ]
+
     def __str__(self):
         return f"{self.activity_name} ({self.subject.subject_code})"
 
+    def save(self, *args, **kwargs):
+        subject_ids = {self.subject_id}
+        if self.pk is not None:
+            subject_ids.update(Activity.objects.filter(pk=self.pk).values_list('subject_id', flat=True))
+        super().save(*args, **kwargs)
+        # Keep the grading progress row in step (the subject may have changed)
+        ActivityProgress.objects.rebuild(activities=[self])
+        StudentSubjectEnrollment.objects.mark_grades_stale(subject_ids)
+
+    def delete(self, *args, **kwargs):
+        StudentSubjectEnrollment.objects.mark_grades_stale([self.subject_id])
+        return super().delete(*args, **kwargs)
+
+    def get_progress(self):
+        """Returns the stored grading progress, rebuilding it if missing"""
+        try:
+            return self.progress
+        except ActivityProgress.DoesNotExist:
+            return ActivityProgress.objects.rebuild(activities=[self])[0]
+
     def pending_grades(self):
         """Returns number of students without grades for this activity"""
-        total_students = self.subject.studentsubjectenrollment_set.count()
-        graded_students = self.grade_set.count()
-        return total_students - graded_students
+        return self.get_progress().pending
 
     def needs_grading(self):
         """Returns True if there are enrolled students without grades"""
-        enrolled_count = self.subject.studentsubjectenrollment_set.count()
-        graded_count = Grade.objects.filter(activity=self).count()
-        return enrolled_count > graded_count
+        return self.get_progress().pending > 0
 
     def pending_grades_count(self):
         """Returns number of students that need grading"""
-        enrolled_count = self.subject.studentsubjectenrollment_set.count()
-        graded_count = Grade.objects.filter(activity=self).count()
-        return enrolled_count - graded_count
+        return self.get_progress().pending
+
+
+# Words accepted in place of a score, by grade status
+GRADE_STATUS_WORDS = {
+    'M': {'M', 'MISSING', 'INC', 'ABSENT'},
+    'E': {'E', 'EX', 'EXCUSED'},
+}
+NO_GRADE = {'', 'N/A', 'NA'}
+
+
+def parse_grade(value):
+    """Parse a grade as typed in the UI into (score, status); None clears the grade.
+
+    Accepts numbers ('8', '8.5', '45/50' keeps the score), status words such as
+    'Missing' or 'Excused', and 'N/A' or blank for no grade.
+    """
+    if value is None:
+        return None
+    text = str(value).strip().upper()
+    if text in NO_GRADE:
+        return None
+    for status, words in GRADE_STATUS_WORDS.items():
+        if text in words:
+            return None, status
+    try:
+        score = Decimal(text.split('/')[0].strip())
+    except InvalidOperation:
+        raise ValueError(f'Invalid grade: {value}')
+    if not score.is_finite() or score < 0 or score >= 100000:
+        raise ValueError(f'Invalid grade: {value}')
+    return score.quantize(Decimal('0.01')), Grade.GRADED
+
+
+def format_grade(score, status):
+    """Display text of a stored grade, e.g. '9', '8.5', 'Missing'"""
+    if status == Grade.MISSING:
+        return 'Missing'
+    if status == Grade.EXCUSED:
+        return 'Excused'
+    if score is None:
+        return 'N/A'
+    return f'{Decimal(score).normalize():f}'
+
+
+class GradeManager(models.Manager):
+    # Keeps IN (...) lists and write batches under SQLite's variable limits
+    BATCH_SIZE = 500
+
+    def save_grades(self, entries):
+        """Upsert grades given as (activity_id, student_id, grade) entries.
+
+        Students are given by their student_id code. Grades are parsed with
+        parse_grade() and the codes resolved before anything is written, so
+        an invalid grade or unknown student raises ValueError and saves
+        nothing. A grade of 'N/A' removes the stored grade. Grades are written
+        with INSERT ... ON CONFLICT DO UPDATE against the (student, activity)
+        unique constraint, so no grade is read before writing.
+        """
+        # Last entry wins when the same cell is submitted twice
+        submitted = {}
+        for activity_id, student_id, grade in entries:
+            submitted[(int(activity_id), str(student_id))] = parse_grade(grade)
+
+        ids = Student.objects.ids_for({student_id for _, student_id in submitted}, self.BATCH_SIZE)
+        unknown = {student_id for _, student_id in submitted} - ids.keys()
+        if unknown:
+            raise ValueError(f"Unknown student: {', '.join(sorted(unknown))}")
+        submitted = {(activity_id, ids[student_id]): value for (activity_id, student_id), value in submitted.items()}
+
+        to_save = [
+            self.model(activity_id=activity_id, student_id=student_id, score=value[0], status=value[1])
+            for (activity_id, student_id), value in submitted.items() if value is not None
+        ]
+        to_delete = {}
+        for (activity_id, student_id), value in submitted.items():
+            if value is None:
+                to_delete.setdefault(activity_id, []).append(student_id)
+
+        deleted = 0
+        with transaction.atomic():
+            self.bulk_create(
+                to_save,
+                batch_size=self.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['student', 'activity'],
+                update_fields=['score', 'status'],
+            )
+            if to_delete:
+                condition = models.Q()
+                for activity_id, student_ids in to_delete.items():
+                    condition |= models.Q(activity_id=activity_id, student_id__in=student_ids)
+                deleted, _ = self.filter(condition).delete()
+            ActivityProgress.objects.recount_graded({activity_id for activity_id, _ in submitted})
+            CacheVersion.objects.bump('grade')
+
+            # Only the final grades of the students whose grades changed go stale
+            changed = {}
+            for activity_id, student_id in submitted:
+                changed.setdefault(activity_id, []).append(student_id)
+            condition = models.Q()
+            for activity_id, student_ids in changed.items():
+                condition |= models.Q(subject__activity=activity_id, student_id__in=student_ids)
+            if changed:
+                StudentSubjectEnrollment.objects.filter(condition).update(grade_stale=True)
+
+        return {'saved': len(to_save), 'deleted': deleted}
 
 
 class Grade(models.Model):
+    GRADED = 'G'
+    MISSING = 'M'
+    EXCUSED = 'E'
+    STATUS_CHOICES = [
+        (GRADED, 'Graded'),
+        (MISSING, 'Missing'),
+        (EXCUSED, 'Excused'),
+    ]
+
     grade_id = models.AutoField(primary_key=True)
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE)
-    student_grade = models.CharField(max_length=50, default='N/A')
+    score = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=GRADED)
+
+    objects = GradeManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'activity'], name='unique_student_activity'),
+        ]
+        indexes = [
+            # Covers per-activity aggregates without touching the table
+            models.Index(fields=['activity', 'status', 'score'], name='grade_activity_stats_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.activity}: {self.student_grade}"
 
+    @property
+    def student_grade(self):
+        """The grade as display text; kept for code written against the old text column"""
+        return format_grade(self.score, self.status)
+
+    @student_grade.setter
+    def student_grade(self, value):
+        # 'N/A' or blank clears the score; it must not turn into Missing
+        parsed = parse_grade(value)
+        self.score, self.status = parsed if parsed is not None else (None, self.GRADED)
+
+
+def _count(queryset):
+    """Correlated COUNT(*) subquery over queryset, 0 when empty"""
+    return Coalesce(
+        models.Subquery(
+            queryset.order_by().annotate(c=models.Func('pk', function='COUNT', output_field=models.IntegerField())).values('c')
+        ),
+        0,
+    )
+
+
+class ActivityProgressManager(models.Manager):
+    def _apply_deltas(self, field, lookup, deltas):
+        """Shift a counter by a per-key delta, one UPDATE per distinct delta"""
+        keys_by_delta = {}
+        for key, delta in deltas.items():
+            if delta:
+                keys_by_delta.setdefault(delta, []).append(key)
+        for delta, keys in keys_by_delta.items():
+            self.filter(**{f'{lookup}__in': keys}).update(**{field: models.F(field) + delta})
+
+    def enrollments_changed(self, subject_deltas):
+        """Apply {subject_id: +/-students} (subject primary keys) to every activity of those subjects"""
+        self._apply_deltas('enrolled_count', 'activity__subject_id', subject_deltas)
+
+    def grades_changed(self, activity_deltas):
+        """Apply {activity_id: +/-grades} to the graded counters"""
+        self._apply_deltas('graded_count', 'activity_id', activity_deltas)
+
+    def recount_enrolled(self, subject_ids):
+        """Recount enrolled students for every activity of the given subjects"""
+        enrolled = StudentSubjectEnrollment.objects.filter(subject__activity=models.OuterRef('activity_id'))
+        self.filter(activity__subject_id__in=list(subject_ids)).update(enrolled_count=_count(enrolled))
+
+    def recount_graded(self, activity_ids):
+        """Recount stored grades for the given activities"""
+        graded = Grade.objects.filter(activity_id=models.OuterRef('activity_id'))
+        self.filter(activity_id__in=list(activity_ids)).update(graded_count=_count(graded))
+
+    def students_removed(self, student_ids):
+        """Discount the enrollments and grades of students (primary keys) about to be deleted"""
+        subject_deltas = {
+            row['subject_id']: -row['total']
+            for row in StudentSubjectEnrollment.objects.filter(
+                student_id__in=student_ids
+            ).values('subject_id').annotate(total=models.Count('pk')).order_by()
+        }
+        activity_deltas = {
+            row['activity_id']: -row['total']
+            for row in Grade.objects.filter(
+                student_id__in=student_ids
+            ).values('activity_id').annotate(total=models.Count('pk')).order_by()
+        }
+        self.enrollments_changed(subject_deltas)
+        self.grades_changed(activity_deltas)
+
+    def counted_activities(self, activities=None):
+        """Activities annotated with freshly counted enrolled/graded totals"""
+        queryset = Activity.objects.all()
+        if activities is not None:
+            queryset = queryset.filter(pk__in=[getattr(a, 'pk', a) for a in activities])
+        return queryset.annotate(
+            fresh_enrolled=_count(StudentSubjectEnrollment.objects.filter(subject=models.OuterRef('subject'))),
+            fresh_graded=_count(Grade.objects.filter(activity=models.OuterRef('pk'))),
+        ).values('activity_id', 'fresh_enrolled', 'fresh_graded')
+
+    def rebuild(self, activities=None):
+        """Recount progress rows from scratch for the given (or all) activities"""
+        rows = [
+            self.model(
+                activity_id=row['activity_id'],
+                enrolled_count=row['fresh_enrolled'],
+                graded_count=row['fresh_graded'],
+            ) for row in self.counted_activities(activities)
+        ]
+        with transaction.atomic():
+            stale = self.all()
+            if activities is not None:
+                stale = stale.filter(activity_id__in=[row.activity_id for row in rows])
+            stale.delete()
+            created = self.bulk_create(rows, batch_size=500)
+            # Progress counters are shown with the activities
+            CacheVersion.objects.bump('activity')
+            return created
+
+    def verify(self):
+        """Returns (activity_id, stored, actual) for every counter that drifted"""
+        stored = {
+            row['activity_id']: (row['enrolled_count'], row['graded_count'])
+            for row in self.values('activity_id', 'enrolled_count', 'graded_count')
+        }
+        mismatches = []
+        for row in self.counted_activities():
+            actual = (row['fresh_enrolled'], row['fresh_graded'])
+            if stored.get(row['activity_id']) != actual:
+                mismatches.append((row['activity_id'], stored.get(row['activity_id']), actual))
+        return mismatches
+
+
+class ActivityProgress(models.Model):
+    """Denormalized enrolled/graded counters, maintained by the write paths"""
+    activity = models.OneToOneField(
+        Activity, on_delete=models.CASCADE, primary_key=True, related_name='progress'
+    )
+    enrolled_count = models.IntegerField(default=0)
+    graded_count = models.IntegerField(default=0)
+
+    objects = ActivityProgressManager()
+
+    def __str__(self):
+        return f"{self.activity_id}: {self.graded_count}/{self.enrolled_count}"
+
+    @property
+    def pending(self):
+        return self.enrolled_count - self.graded_count
+
+
+class SectionQuerySet(models.QuerySet):
+    def with_occupancy(self):
+        """Annotate student_count and remaining capacity in the same query"""
+        students = Student.objects.filter(
+            course=models.OuterRef('course'),
+            year_level=models.OuterRef('year_level'),
+            section=models.OuterRef('section_name'),
+        )
+        return self.annotate(student_count=_count(students)).annotate(
+            remaining=models.F('max_students') - models.F('student_count')
+        )
+
 
 class Section(models.Model):
     YEAR_CHOICES = [(i, f'Year {i}') for i in range(1, 5)]
@@ -182,10 +602,12 @@ class Section(models.Model):
     year_level = models.IntegerField(choices=YEAR_CHOICES)
     section_name = models.CharField(max_length=50)  # Changed from max_length=1
     max_students = models.IntegerField(default=40)
+
+    objects = SectionQuerySet.as_manager()
     
     class Meta:
         unique_together = ('course', 'year_level', 'section_name')
-        ordering = ['course', 'year_level', 'section_name']
+        ordering = ['course__course_abv', 'year_level', 'section_name']
 
     def save(self, *args, **kwargs):
         self.section_name = self.section_name.upper()
@@ -195,12 +617,14 @@ class Section(models.Model):
         return f"{self.course.course_abv} {self.year_level}-{self.section_name}"
 
     def is_full(self):
-        from .models import Student
-        current_count = Student.objects.filter(
-            course=self.course,
-            year_level=self.year_level,
-            section=self.section_name
-        ).count()
+        # Sections loaded through with_occupancy() already carry the count
+        current_count = getattr(self, 'student_count', None)
+        if current_count is None:
+            current_count = Student.objects.filter(
+                course_id=self.course_id,
+                year_level=self.year_level,
+                section=self.section_name
+            ).count()
         return current_count >= self.max_students
 
     def validate_unique(self, exclude=None):
@@ -211,3 +635,174 @@ class Section(models.Model):
         ).exists():
             raise ValidationError('Section already exists for this course and year level')
         super().validate_unique(exclude)
+
+
+def default_weights():
+    return {'Quiz': 25, 'Exam': 25, 'Project': 25, 'Activities': 25}
+
+
+class GradingPolicy(models.Model):
+    ROUNDING_CHOICES = [
+        ('ROUND_HALF_UP', 'Half up'),
+        ('ROUND_HALF_EVEN', 'Half even'),
+        ('ROUND_DOWN', 'Down'),
+        ('ROUND_UP', 'Up'),
+    ]
+
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True, related_name='grading_policy')
+    # Percentage weight per activity type, e.g. {"Quiz": 30, "Exam": 40, ...}
+    weights = models.JSONField(default=default_weights)
+    # [[min_percentage, grade], ...]; the highest row at or below the percentage applies
+    transmutation = models.JSONField(default=list, blank=True)
+    decimal_places = models.PositiveSmallIntegerField(default=2)
+    rounding = models.CharField(max_length=16, choices=ROUNDING_CHOICES, default='ROUND_HALF_UP')
+
+    def __str__(self):
+        return f"Grading policy of {self.subject.subject_code}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        StudentSubjectEnrollment.objects.mark_grades_stale([self.subject_id])
+
+    @classmethod
+    def for_subject(cls, subject):
+        """The subject's saved policy (read fresh, not from the relation cache), or an unsaved default"""
+        return cls.objects.filter(subject=subject).first() or cls(subject=subject)
+
+
+# Names of the cached entities; views list the ones their data depends on
+CACHE_ENTITIES = ['course', 'subject', 'section', 'student', 'enrollment', 'activity', 'grade']
+
+
+class CacheVersionManager(models.Manager):
+    def bump(self, *names):
+        """Give each entity a new version token so cached reads built on it are never used again.
+
+        Tokens are random rather than incremented: a rolled-back bump restores
+        the previous token, and the next bump still can't reuse the one that
+        was rolled back.
+        """
+        token = uuid.uuid4().hex
+        updated = self.filter(name__in=names).update(token=token, changed_at=timezone.now())
+        if updated < len(set(names)):
+            # Only for names the migration did not create
+            self.bulk_create([self.model(name=name, token=token) for name in names], ignore_conflicts=True)
+
+    def tokens(self, names):
+        """Current token of each name, in order ('' for names never bumped)"""
+        current = dict(self.filter(name__in=names).values_list('name', 'token'))
+        return [current.get(name, '') for name in names]
+
+
+class CacheVersion(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    token = models.CharField(max_length=32)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = CacheVersionManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.token}"
+
+
+class JobManager(models.Manager):
+    def enqueue(self, kind, params=None, max_attempts=3):
+        """Queue a background job (run by `manage.py run_worker`); returns the Job"""
+        return self.create(kind=kind, params=params or {}, max_attempts=max_attempts)
+
+    def claim(self, worker):
+        """Mark the oldest due job running for `worker` and return it, or None when nothing is due.
+
+        The claim is a conditional UPDATE, so two workers racing for the same
+        row can't both get it; the loser moves on to the next candidate.
+        """
+        while True:
+            now = timezone.now()
+            candidates = list(self.filter(
+                status=Job.QUEUED, run_after__lte=now, attempts__lt=models.F('max_attempts')
+            ).order_by(
+                'run_after', 'id'
+            ).values_list('id', flat=True)[:10])
+            if not candidates:
+                return None
+            for job_id in candidates:
+                claimed = self.filter(pk=job_id, status=Job.QUEUED, attempts__lt=models.F('max_attempts')).update(
+                    status=Job.RUNNING, worker=worker, attempts=models.F('attempts') + 1,
+                    started_at=now, heartbeat_at=now,
+                )
+                if claimed:
+                    return self.get(pk=job_id)
+
+    def requeue_stale(self, older_than):
+        """Queue running jobs again whose worker has not reported for `older_than` (a timedelta).
+
+        Jobs out of attempts fail instead, so a job that keeps killing its
+        worker (out of memory, say) is not picked up forever.
+        """
+        now = timezone.now()
+        stale = self.filter(status=Job.RUNNING, heartbeat_at__lt=now - older_than)
+        stale.filter(attempts__gte=models.F('max_attempts')).update(
+            status=Job.FAILED, worker='', error='The worker stopped while running the job', finished_at=now
+        )
+        return stale.update(status=Job.QUEUED, worker='', run_after=now)
+
+
+class Job(models.Model):
+    """A queued background operation and its progress and outcome"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    worker = models.CharField(max_length=100, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    def report(self, done, total=None, result=None):
+        """Record progress (and a partial result to resume from); doubles as the worker's heartbeat"""
+        self.progress_done = done
+        fields = {'progress_done': done, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            self.progress_total = fields['progress_total'] = total
+        if result is not None:
+            self.result = fields['result'] = result
+        Job.objects.filter(pk=self.pk).update(**fields)
+
+    def succeed(self, result):
+        self.status, self.result, self.error = Job.SUCCEEDED, result, ''
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'result', 'error', 'finished_at'])
+
+    def fail(self, error, retry_in=None):
+        """Queue the job again after `retry_in` (a timedelta) while attempts remain, else mark it failed"""
+        self.error = str(error)
+        if retry_in is not None and self.attempts < self.max_attempts:
+            self.status, self.worker = Job.QUEUED, ''
+            self.run_after = timezone.now() + retry_in
+        else:
+            self.status = Job.FAILED
+            self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'worker', 'run_after', 'finished_at'])
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor (keyset) pagination over each viewset's stable ordering.
+
+    Views declare ``cursor_ordering``; it should be unique (usually the
+    primary key) so pages never skip or repeat rows.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = 'pk'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Count, F, Max, Q, Subquery, Window
+from django.db.models.functions import Ntile, PercentRank, Rank
+
+from .grading import refresh_final_grades
+from .models import Student, StudentSubjectEnrollment
+
+GRADE_PLACES = Decimal(1).scaleb(-StudentSubjectEnrollment._meta.get_field('grade_percentage').decimal_places)
+
+
+def ranked_enrollments(subject, section=None):
+    """Graded enrollments of a subject (optionally one section), refreshed if stale"""
+    refresh_final_grades(subject)
+    queryset = StudentSubjectEnrollment.objects.filter(subject=subject, grade_percentage__isnull=False)
+    if section:
+        queryset = queryset.filter(student__section=section)
+    return queryset
+
+
+def _standing(queryset):
+    return queryset.values(
+        'student__student_id', 'grade_percentage', 'final_grade',
+        last_name=F('student__last_name'),
+        first_name=F('student__first_name'),
+        section=F('student__section'),
+    )
+
+
+def _row(row, **changes):
+    """A standing keyed like the API: the student's code first, as 'student_id'"""
+    code = row.pop('student__student_id')
+    return {'student_id': code, **row, **changes}
+
+
+def top_students(subject, limit=10, section=None):
+    """The best `limit` students with RANK and PERCENT_RANK, in one query"""
+    by_grade = F('grade_percentage').desc()
+    rows = _standing(ranked_enrollments(subject, section)).annotate(
+        rank=Window(Rank(), order_by=by_grade),
+        percentile=Window(PercentRank(), order_by=F('grade_percentage').asc()),
+    ).order_by(by_grade, 'student__last_name', 'student__first_name', 'student__student_id')[:limit]
+    return [_row(row, percentile=round(row['percentile'] * 100, 2)) for row in rows]
+
+
+def student_rank(subject, student_id, section=None):
+    """Rank and percentile of one student, counted in one aggregate query.
+
+    RANK is 1 + the number of strictly higher grades and PERCENT_RANK is the
+    share of the other students with strictly lower grades, which gives the
+    same numbers as the window functions without ranking the whole class.
+    """
+    queryset = ranked_enrollments(subject, section)
+    # The student's primary key as a scalar subquery, so the class aggregate needs no join
+    student = Q(student_id=Subquery(Student.objects.filter(student_id=student_id).values('id')[:1]))
+    grade = Subquery(queryset.filter(student).values('grade_percentage')[:1])
+    row = queryset.aggregate(
+        total=Count('pk'),
+        higher=Count('pk', filter=Q(grade_percentage__gt=grade)),
+        lower=Count('pk', filter=Q(grade_percentage__lt=grade)),
+        grade_percentage=Max('grade_percentage', filter=student),
+        final_grade=Max('final_grade', filter=student),
+    )
+    if row['grade_percentage'] is None:
+        return None
+    return {
+        'student_id': student_id,
+        'grade_percentage': row['grade_percentage'],
+        'final_grade': row['final_grade'],
+        'rank': row['higher'] + 1,
+        'percentile': round(row['lower'] * 100 / (row['total'] - 1), 2) if row['total'] > 1 else 0.0,
+        'out_of': row['total'],
+    }
+
+
+def _grade(value):
+    """A grade read by raw SQL (SQLite hands back int or float) as a Decimal"""
+    return Decimal(str(value)).quantize(GRADE_PLACES)
+
+
+def percentile_buckets(subject, buckets=4, section=None):
+    """Split the class into `buckets` equal groups (NTILE, best first) with their grade ranges.
+
+    The NTILE query is grouped by an outer query, so only one row per bucket
+    comes back however large the class is.
+    """
+    ranked = ranked_enrollments(subject, section).annotate(
+        bucket=Window(Ntile(buckets), order_by=F('grade_percentage').desc())
+    ).values('bucket', 'grade_percentage')
+    sql, params = ranked.query.sql_with_params()
+    with connections[ranked.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT bucket, COUNT(*), MAX(grade_percentage), MIN(grade_percentage) '
+            f'FROM ({sql}) ranked GROUP BY bucket ORDER BY bucket',
+            params,
+        )
+        return [
+            {'bucket': bucket, 'count': count, 'max': _grade(high), 'min': _grade(low)}
+            for bucket, count, high, low in cursor.fetchall()
+        ]
@@ -0,0 +1,123 @@
+import base64
+import json
+import string
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import Student
+
+# Sort keys accepted by the student search; every ordering ends in the
+# unique student_id so keyset cursors are unambiguous.
+STUDENT_SORTS = {
+    'name': ('last_name', 'first_name', 'student_id'),
+    'student_id': ('student_id',),
+    'newest': ('-date_added', '-student_id'),
+}
+
+# Result key -> .values() lookup
+STUDENT_FIELDS = {
+    'student_id': 'student_id',
+    'last_name': 'last_name',
+    'first_name': 'first_name',
+    'middle_name': 'middle_name',
+    'course': 'course__course_abv',
+    'year_level': 'year_level',
+    'section': 'section',
+    'status': 'status',
+}
+
+
+# SQLite's LOWER() only folds A-Z, so queries are folded the same way to
+# compare like with like. Non-ASCII letters stay case-sensitive ("Ñuñez"
+# matches "ÑUñ" but not "ñuñ"); folding them too would need a stored, fully
+# folded search column in place of the Lower() indexes.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold(text):
+    """Lowercase text the way SQLite's LOWER() does (ASCII letters only)"""
+    return text.translate(ASCII_LOWER)
+
+
+def prefix_range(prefix):
+    """(low, high) bounds matching strings that start with prefix, so B-tree indexes apply"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_after(ordering, values):
+    """Q matching rows that sort strictly after the given ordering key values"""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        step = Q(**{f'{name}__lt' if field.startswith('-') else f'{name}__gt': values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def search_students(query='', course=None, sort='name', cursor=None, page_size=25):
+    """One page of students matching a name/ID prefix, in a stable sort order.
+
+    Returns ``{'results': [...], 'next': cursor}``; pass ``next`` back as
+    ``cursor`` for the following page. Pages are fetched by key, never by
+    OFFSET, so deep pages cost the same as the first one.
+    """
+    ordering = STUDENT_SORTS.get(sort)
+    if ordering is None:
+        raise ValueError(f'Unknown sort: {sort}')
+
+    queryset = Student.objects.annotate(
+        last_name_lower=Lower('last_name'),
+        first_name_lower=Lower('first_name'),
+    )
+    if course:
+        queryset = queryset.filter(course__course_abv=course)
+
+    query = query.strip()
+    if query:
+        low, high = prefix_range(fold(query))
+        id_low, id_high = prefix_range(query.upper())
+        queryset = queryset.filter(
+            Q(last_name_lower__gte=low, last_name_lower__lt=high) |
+            Q(first_name_lower__gte=low, first_name_lower__lt=high) |
+            Q(student_id__gte=query, student_id__lt=prefix_range(query)[1]) |
+            Q(student_id__gte=id_low, student_id__lt=id_high)
+        )
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise ValueError('Invalid cursor')
+        queryset = queryset.filter(keyset_after(ordering, values))
+
+    columns = [field.lstrip('-') for field in ordering]
+    lookups = list(STUDENT_FIELDS.values())
+    selected = lookups + [column for column in columns if column not in lookups]
+    rows = list(queryset.order_by(*ordering).values(*selected)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            last[column].isoformat() if hasattr(last[column], 'isoformat') else last[column]
+            for column in columns
+        ])
+
+    return {
+        'results': [{key: row[lookup] for key, lookup in STUDENT_FIELDS.items()} for row in rows],
+        'next': next_cursor,
+    }
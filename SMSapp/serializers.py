@@ -1,13 +1,134 @@
 from rest_framework import serializers
-from .models import Subject, Activity, StudentSubjectEnrollment, Student, Course, Grade, Section
+from rest_framework.utils.serializer_helpers import ReturnDict
+from .models import Subject, Activity, StudentSubjectEnrollment, Student, Course, Grade, Section, GradingPolicy, Job
 from datetime import date
+from django.urls import reverse
 from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def requested_field_names(request):
+    """Field names asked for with ?fields=a,b,c, or None for all fields"""
+    if request is None or not hasattr(request, 'query_params'):
+        return None
+    names = {name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()}
+    return names or None
+
+
+def requested_fields(serializer):
+    return requested_field_names(serializer.context.get('request'))
+
+
+class SparseListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        rows = super().to_representation(data)
+        names = requested_fields(self) if self.parent is None else None
+        if names:
+            rows = [{key: value for key, value in row.items() if key in names} for row in rows]
+        return rows
+
+
+class SparseFieldsMixin:
+    """Sparse fieldsets: top-level responses only render the ?fields= columns.
+
+    Nested serializers (e.g. the student inside an enrollment) are left
+    whole. Serializers using this mixin set list_serializer_class to
+    SparseListSerializer in their Meta.
+    """
+
+    def _is_top_level(self):
+        return self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None
+        )
+
+    @property
+    def _readable_fields(self):
+        names = requested_fields(self) if self._is_top_level() else None
+        for field in super()._readable_fields:
+            if names is None or field.field_name in names:
+                yield field
+
+    @property
+    def data(self):
+        data = super().data
+        names = requested_fields(self) if self.parent is None else None
+        if names:
+            return ReturnDict({key: value for key, value in data.items() if key in names}, serializer=self)
+        return data
+
+
+class ValuesRepresentationMixin:
+    """Read-only fast path building responses straight from .values() rows.
+
+    ``Meta.values_fields`` maps every output key, in output order, to the
+    .values() lookup that holds it, so list/retrieve (see fastread.py) skip
+    model instances and per-field serialization. The result must stay equal
+    to to_representation(); serializers with rules beyond a plain mapping
+    override from_values().
+    """
+
+    @classmethod
+    def values_plan(cls, names=None):
+        """(key, lookup) pairs of the keys to render (all, or only ?fields= names)"""
+        return [(key, lookup) for key, lookup in cls.Meta.values_fields.items() if names is None or key in names]
+
+    @classmethod
+    def from_values(cls, row, plan):
+        return {key: row[lookup] for key, lookup in plan}
+
+
+class StudentSerializer(ValuesRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    course = serializers.SlugRelatedField(
+        slug_field='course_abv', queryset=Course.objects.all(), required=False, allow_null=True
+    )
 
-class StudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
+        list_serializer_class = SparseListSerializer
         fields = ['student_id', 'last_name', 'first_name', 'middle_name', 
                  'course', 'year_level', 'section', 'status']
+        values_fields = {
+            'student_id': 'student_id',
+            'last_name': 'last_name',
+            'first_name': 'first_name',
+            'middle_name': 'middle_name',
+            'course': 'course__course_abv',
+            'year_level': 'year_level',
+            'section': 'section',
+            'status': 'status',
+            'course_name': 'course__course_name',
+        }
+
+    @classmethod
+    def from_values(cls, row, plan):
+        data = super().from_values(row, plan)
+        # Like to_representation(): no course_name for students without a course
+        if data.get('course_name', '') is None:
+            del data['course_name']
+        return data
+
+    def validate(self, data):
+        # Only check capacity when the student is placed in a (different) section
+        course = data.get('course', self.instance.course if self.instance else None)
+        year_level = data.get('year_level', self.instance.year_level if self.instance else None)
+        section = data.get('section', self.instance.section if self.instance else None)
+        placement = (getattr(course, 'pk', course), year_level, section)
+        if self.instance and placement == (self.instance.course_id, self.instance.year_level, self.instance.section):
+            return data
+
+        if course and year_level and section:
+            target = Section.objects.with_occupancy().filter(
+                course=course,
+                year_level=year_level,
+                section_name=section
+            ).first()
+            if target is not None and target.is_full():
+                raise serializers.ValidationError({
+                    'section': f'Section {target} is full ({target.max_students} students)'
+                })
+        return data
 
     def _get_course(self, course_data):
         if isinstance(course_data, str):
@@ -45,12 +166,27 @@ class StudentSerializer(serializers.ModelSerializer):
             data['course_name'] = instance.course.course_name
         return data
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(ValuesRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    course = serializers.SlugRelatedField(
+        slug_field='course_abv', queryset=Course.objects.all(), required=False, allow_null=True
+    )
+
     class Meta:
         model = Subject
+        list_serializer_class = SparseListSerializer
         fields = ['subject_code', 'subject_title', 'course', 'school_year', 
                  'semester', 'year_level', 'section', 'archive']
         read_only_fields = ['archive']
+        values_fields = {
+            'subject_code': 'subject_code',
+            'subject_title': 'subject_title',
+            'course': 'course__course_abv',
+            'school_year': 'school_year',
+            'semester': 'semester',
+            'year_level': 'year_level',
+            'section': 'section',
+            'archive': 'archive',
+        }
 
     def validate(self, data):
         # Only check for duplicate subject code if it's being changed
@@ -77,31 +213,36 @@ class SubjectSerializer(serializers.ModelSerializer):
         except Exception as e:
             raise serializers.ValidationError(str(e))
 
-class ActivitySerializer(serializers.ModelSerializer):
+class ActivitySerializer(ValuesRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    subject = serializers.SlugRelatedField(slug_field='subject_code', queryset=Subject.objects.all())
+
     class Meta:
         model = Activity
+        list_serializer_class = SparseListSerializer
         fields = ['activity_id', 'subject', 'activity_type', 'activity_name', 'total_items']
+        values_fields = {
+            'activity_id': 'activity_id',
+            'subject': 'subject__subject_code',
+            'activity_type': 'activity_type',
+            'activity_name': 'activity_name',
+            'total_items': 'total_items',
+        }
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        # Include these fields in every response
-        data['activity_id'] = instance.activity_id
-        data['activity_type'] = instance.activity_type
-        data['activity_name'] = instance.activity_name
-        data['total_items'] = instance.total_items
-        return data
-
-class StudentSubjectEnrollmentSerializer(serializers.ModelSerializer):
+class StudentSubjectEnrollmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
-    
+    subject = serializers.SlugRelatedField(slug_field='subject_code', queryset=Subject.objects.all())
+
     class Meta:
         model = StudentSubjectEnrollment
+        list_serializer_class = SparseListSerializer
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(ValuesRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
+        list_serializer_class = SparseListSerializer
         fields = ['course_abv', 'course_name']
+        values_fields = {'course_abv': 'course_abv', 'course_name': 'course_name'}
 
     def validate(self, data):
         # Convert course_abv to uppercase
@@ -130,14 +271,28 @@ class CourseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(str(e))
 
 class GradeSerializer(serializers.ModelSerializer):
+    student = serializers.SlugRelatedField(slug_field='student_id', queryset=Student.objects.all())
+    student_grade = serializers.CharField(read_only=True)
+
     class Meta:
         model = Grade
-        fields = ['grade_id', 'student', 'activity', 'student_grade']
+        fields = ['grade_id', 'student', 'activity', 'score', 'status', 'student_grade']
+
+class SectionSerializer(ValuesRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    course = serializers.SlugRelatedField(slug_field='course_abv', queryset=Course.objects.all())
 
-class SectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Section
+        list_serializer_class = SparseListSerializer
         fields = ['id', 'course', 'year_level', 'section_name']
+        # Same keys and order as to_representation()
+        values_fields = {
+            'id': 'id',
+            'course': 'course__course_abv',
+            'course_name': 'course__course_name',
+            'year_level': 'year_level',
+            'section_name': 'section_name',
+        }
 
     def validate(self, data):
         try:
@@ -183,14 +338,14 @@ class SectionSerializer(serializers.ModelSerializer):
         except serializers.ValidationError:
             raise
         except Exception as e:
-            print(f"Validation error: {str(e)}")
+            logger.warning("Section validation error: %s", e)
             raise serializers.ValidationError(str(e))
 
     def create(self, validated_data):
         try:
             return Section.objects.create(**validated_data)
         except Exception as e:
-            print(f"Error creating section: {str(e)}")  # Debug log
+            logger.warning("Error creating section: %s", e)
             raise serializers.ValidationError(str(e))
 
     def to_representation(self, instance):
@@ -201,3 +356,54 @@ class SectionSerializer(serializers.ModelSerializer):
             'year_level': instance.year_level,
             'section_name': instance.section_name
         }
+
+class GradingPolicySerializer(serializers.ModelSerializer):
+    subject = serializers.SlugRelatedField(slug_field='subject_code', read_only=True)
+
+    class Meta:
+        model = GradingPolicy
+        fields = ['subject', 'weights', 'transmutation', 'decimal_places', 'rounding']
+        read_only_fields = ['subject']
+
+    def validate_weights(self, value):
+        if not isinstance(value, dict) or not value:
+            raise serializers.ValidationError("Weights must map activity types to percentages")
+        for activity_type, weight in value.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                raise serializers.ValidationError(f"Invalid weight for {activity_type}")
+        if not any(value.values()):
+            raise serializers.ValidationError("At least one weight must be positive")
+        return value
+
+    def validate_transmutation(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Transmutation must be a list of [min_percentage, grade] rows")
+        for row in value:
+            if (not isinstance(row, (list, tuple)) or len(row) != 2
+                    or not all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in row)):
+                raise serializers.ValidationError("Transmutation must be a list of [min_percentage, grade] rows")
+        return value
+
+    def validate_decimal_places(self, value):
+        if value > 4:
+            raise serializers.ValidationError("At most 4 decimal places")
+        return value
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Status of a background job; its params (possibly a whole uploaded file) stay private"""
+    progress = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'progress', 'result', 'error', 'attempts', 'max_attempts',
+                  'created_at', 'started_at', 'finished_at', 'download']
+
+    def get_progress(self, job):
+        return {'done': job.progress_done, 'total': job.progress_total}
+
+    def get_download(self, job):
+        if job.status == Job.SUCCEEDED and 'file' in (job.result or {}):
+            return reverse('job-download', args=[job.pk])
+        return None
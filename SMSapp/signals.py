@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import Activity, CacheVersion, Course, Section, Student, Subject
+
+# Cached entities bumped when a single instance is saved or deleted. Grades and
+# enrollments are written in bulk and bump from their managers instead, which
+# also keeps their cascaded deletes on Django's fast path (no per-row signals).
+MODEL_ENTITIES = {
+    Course: ('course',),
+    Subject: ('subject',),
+    Section: ('section',),
+    Student: ('student',),
+    Activity: ('activity',),
+}
+
+# Deleting these cascades into enrollments and grades, whose rows go without a signal
+DELETE_ENTITIES = {
+    Subject: ('enrollment', 'grade'),
+    Student: ('enrollment', 'grade'),
+    Activity: ('enrollment', 'grade'),
+}
+
+
+def bump_cache_version(sender, **kwargs):
+    CacheVersion.objects.bump(*MODEL_ENTITIES[sender])
+
+
+def bump_cache_version_on_delete(sender, **kwargs):
+    CacheVersion.objects.bump(*MODEL_ENTITIES[sender], *DELETE_ENTITIES.get(sender, ()))
+
+
+def connect():
+    for model in MODEL_ENTITIES:
+        post_save.connect(bump_cache_version, sender=model, dispatch_uid=f'cache_version_save_{model.__name__}')
+        post_delete.connect(
+            bump_cache_version_on_delete, sender=model, dispatch_uid=f'cache_version_delete_{model.__name__}'
+        )
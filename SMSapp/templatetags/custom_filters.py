@@ -4,6 +4,9 @@ register = template.Library()
 
 @register.filter
 def get_item(dictionary, key):
+    """Looks up key in a dict (grade rows answer 'N/A' for missing activities)"""
+    if dictionary is None:
+        return None
     return dictionary.get(key)
 
 @register.filter
@@ -1,3 +1,1487 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
+from io import BytesIO, StringIO
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import Http404
+from django.utils import timezone
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver
+from django.urls.resolvers import RegexPattern
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from SMS.settings import SQLITE_PRODUCTION_OPTIONS
+
+from . import jobs, urls, views
+from .concurrency import use_async_views
+from .dashboard import aget_dashboard_stats, get_dashboard_stats
+from .analytics import activity_stats, subject_stats
+from .gradebook import student_grades
+from .rankings import percentile_buckets, student_rank, top_students
+from .grading import compute_subject_grades, final_grades, refresh_final_grades
+from . import importers
+from .importers import import_students, read_json_rows
+from .search import search_students
+from .caching import cached, get_cache, stats as cache_stats
+from .instrumentation import metrics, record_queries
+from .benchmarks import compare, parse_scale, run_suite, seed_population
+from .serializers import (
+    ActivitySerializer, CourseSerializer, SectionSerializer, StudentSerializer, SubjectSerializer,
+)
+from .models import (
+    Course, Student, Subject, StudentSubjectEnrollment, Activity, Grade, ActivityProgress, Section, GradingPolicy,
+    Job,
+)
+
+
+def make_students(course, count, start=0, year_level=1, section='A'):
+    return Student.objects.bulk_create([
+        Student(
+            student_id=f'{course.course_abv}-{start + i:05d}',
+            last_name=f'Last{start + i}',
+            first_name=f'First{start + i}',
+            course=course,
+            year_level=year_level,
+            section=section,
+        ) for i in range(count)
+    ])
+
+
+def make_subject(course, code, year_level=1, section='A'):
+    return Subject.objects.create(
+        subject_code=code,
+        subject_title=f'{code} Title',
+        course=course,
+        school_year='2025-2026',
+        semester=1,
+        year_level=year_level,
+        section=section,
+    )
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSIT', course_name='Information Technology')
+        self.subject = make_subject(self.course, 'IT101')
+        self.students = make_students(self.course, 3)
+        for student in self.students:
+            StudentSubjectEnrollment.objects.create(student=student, subject=self.subject)
+        self.quiz = Activity.objects.create(
+            subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10
+        )
+        self.exam = Activity.objects.create(
+            subject=self.subject, activity_name='Midterm', activity_type='Exam', total_items=50
+        )
+        Grade.objects.create(student=self.students[0], activity=self.quiz, student_grade='8')
+        ActivityProgress.objects.rebuild()
+
+    def grow(self, scale):
+        """Add more courses, subjects, students and activities to the database"""
+        for n in range(scale):
+            course = Course.objects.create(course_abv=f'C{n}', course_name=f'Course {n}')
+            subject = make_subject(course, f'S{n}', year_level=n % 4 + 1)
+            students = make_students(course, 5, year_level=n % 4 + 1)
+            StudentSubjectEnrollment.objects.bulk_create([
+                StudentSubjectEnrollment(student=student, subject=subject) for student in students
+            ])
+            for activity_type in ['Quiz', 'Project', 'Activities']:
+                activity = Activity.objects.create(
+                    subject=subject, activity_name=activity_type, activity_type=activity_type, total_items=20
+                )
+                Grade.objects.create(student=students[0], activity=activity, student_grade='15')
+        ActivityProgress.objects.rebuild()
+
+    def test_values(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_students'], 3)
+        self.assertEqual(stats['total_courses'], 1)
+        self.assertEqual(stats['total_subjects'], 1)
+        self.assertEqual(stats['new_students'], 3)
+        self.assertEqual(stats['pending_activities'], 1)
+        by_type = {row['type']: row for row in stats['activity_stats']}
+        self.assertEqual(by_type['Quiz'], {'type': 'Quiz', 'count': 1, 'pending': 0})
+        self.assertEqual(by_type['Exam'], {'type': 'Exam', 'count': 1, 'pending': 1})
+        self.assertEqual(by_type['Project']['count'], 0)
+        pending = {a.activity_id: a.pending_count for a in stats['recent_activities']}
+        self.assertEqual(pending, {self.quiz.activity_id: 2, self.exam.activity_id: 3})
+        self.assertEqual(stats['year_stats'][0]['percentage'], 100)
+
+    def test_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            get_dashboard_stats()
+        self.grow(10)
+        with self.assertNumQueries(len(small)):
+            get_dashboard_stats()
+
+    def test_index_and_json_endpoint(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_students'], 3)
+
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['total_students'], 3)
+        self.assertEqual(data['recent_students'][0]['course'], 'BSIT')
+
+
+class ActivityProgressTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 4)
+        self.activity = Activity.objects.create(
+            subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10
+        )
+
+    def enroll(self, students):
+        return self.client.post('/api/enrollments/bulk_enroll/', {
+            'subject_code': self.subject.subject_code,
+            'student_ids': [student.student_id for student in students],
+        }, content_type='application/json')
+
+    def save_grades(self, grades):
+        return self.client.post(f'/api/activities/{self.activity.activity_id}/grades/', {
+            'grades': [{'student_id': s, 'grade': g} for s, g in grades],
+        }, content_type='application/json')
+
+    def progress(self):
+        return ActivityProgress.objects.get(activity=self.activity)
+
+    def test_created_with_activity(self):
+        progress = self.progress()
+        self.assertEqual((progress.enrolled_count, progress.graded_count), (0, 0))
+
+    def test_write_paths_keep_counters_current(self):
+        self.enroll(self.students)
+        self.assertEqual(self.progress().enrolled_count, 4)
+
+        ids = [student.student_id for student in self.students]
+        self.save_grades([(ids[0], '9'), (ids[1], '7'), (ids[2], '5')])
+        self.save_grades([(ids[0], '10'), (ids[1], 'N/A')])
+        self.assertEqual(self.progress().graded_count, 2)
+        self.assertEqual(self.activity.pending_grades(), 2)
+
+        self.client.post('/api/enrollments/remove_student/', {
+            'subject_code': self.subject.subject_code, 'student_id': ids[3],
+        }, content_type='application/json')
+        self.assertEqual(self.progress().enrolled_count, 3)
+
+        self.client.delete(f'/api/students/{ids[0]}/')
+        progress = self.progress()
+        self.assertEqual((progress.enrolled_count, progress.graded_count), (2, 1))
+        self.assertEqual(ActivityProgress.objects.verify(), [])
+
+    def test_rest_enrollment_writes_keep_counters_current(self):
+        self.enroll(self.students[:2])
+        other = make_subject(self.course, 'CS102')
+        Activity.objects.create(subject=other, activity_name='Quiz 1', activity_type='Quiz', total_items=10)
+        enrollments = list(StudentSubjectEnrollment.objects.filter(subject=self.subject).order_by('id'))
+
+        response = self.client.patch(f'/api/enrollments/{enrollments[0].pk}/', {'subject': 'CS102'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.progress().enrolled_count, 1)
+        self.assertEqual(ActivityProgress.objects.verify(), [])
+
+        response = self.client.delete(f'/api/enrollments/{enrollments[1].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.progress().enrolled_count, 0)
+        self.assertEqual(ActivityProgress.objects.verify(), [])
+
+    def test_reads_are_single_lookups(self):
+        self.enroll(self.students)
+        activity = Activity.objects.select_related('progress').get(pk=self.activity.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(activity.needs_grading())
+            self.assertEqual(activity.pending_grades_count(), 4)
+
+    def test_rebuild_command(self):
+        StudentSubjectEnrollment.objects.bulk_create([
+            StudentSubjectEnrollment(student=student, subject=self.subject) for student in self.students
+        ])
+        self.assertEqual(len(ActivityProgress.objects.verify()), 1)
+        call_command('rebuild_progress', stdout=StringIO())
+        self.assertEqual(self.progress().enrolled_count, 4)
+        call_command('rebuild_progress', '--check', stdout=StringIO())
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS102')
+        self.students = make_students(self.course, 3)
+        StudentSubjectEnrollment.objects.bulk_create([
+            StudentSubjectEnrollment(student=student, subject=self.subject) for student in self.students
+        ])
+        self.activities = [
+            Activity.objects.create(
+                subject=self.subject, activity_name=f'Quiz {n}', activity_type='Quiz', total_items=10
+            ) for n in range(3)
+        ]
+        Grade.objects.create(student=self.students[0], activity=self.activities[0], student_grade='9')
+        Grade.objects.create(student=self.students[0], activity=self.activities[2], student_grade='7')
+        Grade.objects.create(student=self.students[1], activity=self.activities[1], student_grade='10')
+
+    def test_student_grades_single_query(self):
+        with self.assertNumQueries(1):
+            grades = student_grades(self.students[0], self.subject)
+        self.assertEqual(grades[self.activities[0].activity_id], '9')
+        self.assertEqual(grades.get(self.activities[1].activity_id), 'N/A')
+
+    def test_student_subject_page_query_count_is_constant(self):
+        url = f'/students/{self.students[0].student_id}/subjects/{self.subject.subject_code}/'
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(url)
+        self.assertEqual(response.context['grades'][self.activities[0].activity_id], '9')
+        for n in range(10):
+            Activity.objects.create(
+                subject=self.subject, activity_name=f'Extra {n}', activity_type='Quiz', total_items=5
+            )
+        with self.assertNumQueries(len(few)):
+            self.client.get(url)
+
+    def test_gradebook_endpoint(self):
+        response = self.client.get(f'/api/subjects/{self.subject.subject_code}/gradebook/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([a['activity_id'] for a in data['activities']],
+                         [a.activity_id for a in self.activities])
+        rows = {row['student_id']: row['grades'] for row in data['students']}
+        self.assertEqual(rows[self.students[0].student_id], ['9', 'N/A', '7'])
+        self.assertEqual(rows[self.students[1].student_id], ['N/A', '10', 'N/A'])
+        self.assertEqual(rows[self.students[2].student_id], ['N/A', 'N/A', 'N/A'])
+
+
+class BulkEnrollTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subjects = [make_subject(self.course, f'CS20{n}', year_level=2) for n in range(3)]
+        self.students = make_students(self.course, 30, year_level=2)
+        self.ids = [student.student_id for student in self.students]
+
+    def post(self, payload):
+        return self.client.post('/api/enrollments/bulk_enroll/', payload, content_type='application/json')
+
+    def test_reports_enrolled_skipped_and_unknown(self):
+        StudentSubjectEnrollment.objects.create(student=self.students[0], subject=self.subjects[0])
+        response = self.post({
+            'subject_code': 'CS200',
+            'student_ids': self.ids[:3] + ['NOPE-1'],
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['enrolled_count'], 2)
+        self.assertEqual(data['unknown'], ['NOPE-1'])
+        self.assertEqual(data['subjects']['CS200'], {'enrolled': self.ids[1:3], 'skipped': self.ids[:1]})
+
+    def test_query_count_independent_of_student_count(self):
+        with CaptureQueriesContext(connection) as few:
+            self.post({'subject_code': 'CS200', 'student_ids': self.ids[:2]})
+        with self.assertNumQueries(len(few)):
+            self.post({'subject_code': 'CS201', 'student_ids': self.ids})
+
+    def test_enroll_year_level_into_many_subjects(self):
+        response = self.post({
+            'subject_codes': [subject.subject_code for subject in self.subjects],
+            'course': 'BSCS',
+            'year_level': 2,
+        })
+        self.assertEqual(response.json()['data']['enrolled_count'], 90)
+        self.assertEqual(StudentSubjectEnrollment.objects.count(), 90)
+
+    def test_unknown_subject(self):
+        response = self.post({'subject_codes': ['CS200', 'XX999'], 'student_ids': self.ids})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(StudentSubjectEnrollment.objects.count(), 0)
+
+
+class SaveGradesTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS301')
+        self.students = make_students(self.course, 40)
+        self.ids = [student.student_id for student in self.students]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids)
+        self.activities = [
+            Activity.objects.create(
+                subject=self.subject, activity_name=f'Quiz {n}', activity_type='Quiz', total_items=10
+            ) for n in range(2)
+        ]
+        self.url = f'/api/activities/{self.activities[0].activity_id}/grades/'
+
+    def post(self, url, grades):
+        return self.client.post(url, {'grades': grades}, content_type='application/json')
+
+    def grades(self, activity):
+        return {grade.student.student_id: grade.student_grade
+                for grade in Grade.objects.filter(activity=activity).select_related('student')}
+
+    def test_insert_update_delete(self):
+        self.post(self.url, [{'student_id': sid, 'grade': '5'} for sid in self.ids[:3]])
+        response = self.post(self.url, [
+            {'student_id': self.ids[0], 'grade': '9'},
+            {'student_id': self.ids[1], 'grade': 'N/A'},
+            {'student_id': self.ids[2], 'grade': '5'},
+            {'student_id': self.ids[3], 'grade': '7'},
+            {'student_id': self.ids[4], 'grade': 'N/A'},
+        ])
+        self.assertEqual(response.json()['data'], {'saved': 3, 'deleted': 1})
+        self.assertEqual(self.grades(self.activities[0]), {self.ids[0]: '9', self.ids[2]: '5', self.ids[3]: '7'})
+        self.assertEqual(self.activities[0].get_progress().graded_count, 3)
+
+    def test_query_count_independent_of_class_size(self):
+        self.post(self.url, [{'student_id': sid, 'grade': '5'} for sid in self.ids[:20]])
+        payload = [
+            {'student_id': self.ids[0], 'grade': '6'},
+            {'student_id': self.ids[1], 'grade': 'N/A'},
+            {'student_id': self.ids[20], 'grade': '6'},
+            {'student_id': self.ids[21], 'grade': '6'},
+        ]
+        with CaptureQueriesContext(connection) as few:
+            self.post(self.url, payload)
+        payload = (
+            [{'student_id': sid, 'grade': '7'} for sid in self.ids[2:10]] +
+            [{'student_id': sid, 'grade': 'N/A'} for sid in self.ids[10:20]] +
+            [{'student_id': sid, 'grade': '8'} for sid in self.ids[22:]]
+        )
+        with self.assertNumQueries(len(few)):
+            self.post(self.url, payload)
+
+    def test_save_gradebook_grid(self):
+        response = self.post('/api/grades/', [
+            {'activity_id': activity.activity_id, 'student_id': sid, 'grade': '10'}
+            for activity in self.activities for sid in self.ids
+        ])
+        self.assertEqual(response.json()['data']['saved'], 80)
+        for activity in self.activities:
+            self.assertEqual(activity.get_progress().pending, 0)
+
+        response = self.post('/api/grades/', [{'activity_id': 999999, 'student_id': self.ids[0], 'grade': '1'}])
+        self.assertEqual(response.status_code, 404)
+
+
+class ConstraintTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS401')
+        self.student = make_students(self.course, 1)[0]
+        self.activity = Activity.objects.create(
+            subject=self.subject, activity_name='Quiz', activity_type='Quiz', total_items=10
+        )
+
+    def test_duplicates_rejected(self):
+        StudentSubjectEnrollment.objects.create(student=self.student, subject=self.subject)
+        Grade.objects.create(student=self.student, activity=self.activity, student_grade='1')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StudentSubjectEnrollment.objects.create(student=self.student, subject=self.subject)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Grade.objects.create(student=self.student, activity=self.activity, student_grade='2')
+
+    def test_write_paths_tolerate_existing_rows(self):
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [self.student.student_id])
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [self.student.student_id])
+        Grade.objects.save_grades([(self.activity.activity_id, self.student.student_id, '4')])
+        Grade.objects.save_grades([(self.activity.activity_id, self.student.student_id, '6')])
+        self.assertEqual(StudentSubjectEnrollment.objects.count(), 1)
+        self.assertEqual(Grade.objects.get().student_grade, '6')
+        self.assertEqual(ActivityProgress.objects.verify(), [])
+
+
+class ListEndpointTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.other = Course.objects.create(course_abv='BSIT', course_name='Information Technology')
+        make_students(self.course, 120, year_level=1)
+        make_students(self.other, 30, year_level=2, section='B')
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        seen = []
+        url = '/api/students/?page_size=40'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 40)
+            seen.extend(row['student_id'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(len(seen), 150)
+        self.assertEqual(seen, sorted(set(seen)))
+
+    def test_filters_and_search(self):
+        page = self.client.get('/api/students/?course=BSIT&year_level=2&section=B').json()
+        self.assertEqual(len(page['results']), 30)
+        page = self.client.get('/api/students/?search=bscs-0011').json()
+        self.assertEqual([row['student_id'] for row in page['results']],
+                         [f'BSCS-0011{n}' for n in range(10)])
+
+    def test_sparse_fieldsets(self):
+        page = self.client.get('/api/students/?fields=student_id,last_name&page_size=2').json()
+        self.assertEqual(page['results'][0], {'student_id': 'BSCS-00000', 'last_name': 'Last0'})
+        data = self.client.get('/api/courses/BSCS/?fields=course_name').json()['data']
+        self.assertEqual(data, {'course_name': 'Computer Science'})
+
+    def test_nested_serializers_keep_all_fields(self):
+        subject = make_subject(self.course, 'CS501')
+        StudentSubjectEnrollment.objects.bulk_enroll([subject], ['BSCS-00000'])
+        page = self.client.get('/api/enrollments/?subject=CS501&fields=student').json()
+        self.assertEqual(list(page['results'][0]), ['student'])
+        self.assertEqual(page['results'][0]['student']['course'], 'BSCS')
+        self.assertIn('last_name', page['results'][0]['student'])
+
+    def test_page_query_count_independent_of_table_size(self):
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/api/enrollments/?page_size=10')
+        subject = make_subject(self.course, 'CS502')
+        StudentSubjectEnrollment.objects.bulk_enroll([subject], Student.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(len(before)):
+            self.client.get('/api/enrollments/?page_size=10')
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.other = Course.objects.create(course_abv='BSIT', course_name='Information Technology')
+        make_students(self.course, 60)
+        make_students(self.other, 10)
+        Student.objects.create(
+            student_id='2025-0001', last_name='Santos', first_name='Maria',
+            course=self.course, year_level=1, section='A',
+        )
+
+    def search(self, **params):
+        response = self.client.get('/api/students/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_prefix_search_on_names_and_ids(self):
+        self.assertEqual([r['student_id'] for r in self.search(q='sant')['results']], ['2025-0001'])
+        self.assertEqual([r['student_id'] for r in self.search(q='MAR')['results']], ['2025-0001'])
+        self.assertEqual(len(self.search(q='bsit-')['results']), 10)
+        self.assertEqual(len(self.search(q='2025')['results']), 1)
+
+    def test_non_ascii_names_fold_like_sqlite(self):
+        Student.objects.create(
+            student_id='2025-0002', last_name='Ñuñez', first_name='Jose',
+            course=self.course, year_level=1, section='A',
+        )
+        # Only the ASCII letters are case-insensitive, as in SQLite's LOWER()
+        self.assertEqual([r['student_id'] for r in self.search(q='ÑUñ')['results']], ['2025-0002'])
+        self.assertEqual(self.search(q='ñuñ')['results'], [])
+
+    def test_keyset_pages_cover_every_row_in_order(self):
+        for sort in ['name', 'student_id', 'newest']:
+            seen, cursor = [], None
+            while True:
+                params = {'sort': sort, 'page_size': 7, 'course': 'BSCS'}
+                if cursor:
+                    params['cursor'] = cursor
+                page = self.search(**params)
+                seen.extend(row['student_id'] for row in page['results'])
+                cursor = page['next']
+                if not cursor:
+                    break
+            self.assertEqual(len(seen), 61)
+            self.assertEqual(len(set(seen)), 61)
+        names = [(r['last_name'], r['first_name']) for r in self.search(page_size=100)['results']]
+        self.assertEqual(names, sorted(names))
+
+    def test_page_costs_one_query(self):
+        cursor = self.search(page_size=10)['next']
+        with self.assertNumQueries(1):
+            search_students(cursor=cursor, page_size=10)
+
+    def test_bad_cursor(self):
+        response = self.client.get('/api/students/search/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_students_page_is_bounded(self):
+        make_students(self.course, 200, start=1000)
+        response = self.client.get('/students/')
+        self.assertEqual(len(response.context['initial_students']['results']), 25)
+        self.assertNotContains(response, 'BSCS-01100')
+
+
+class SectionOccupancyTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.full = Section.objects.create(course=self.course, year_level=1, section_name='A', max_students=3)
+        self.open = Section.objects.create(course=self.course, year_level=1, section_name='B', max_students=5)
+        make_students(self.course, 3, section='A')
+        make_students(self.course, 2, start=10, section='B')
+
+    def test_occupancy_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/sections/occupancy/?course=BSCS').json()['data']
+        by_name = {row['section_name']: row for row in data}
+        self.assertEqual(by_name['A']['student_count'], 3)
+        self.assertTrue(by_name['A']['is_full'])
+        self.assertEqual(by_name['B']['remaining'], 3)
+        self.assertFalse(by_name['B']['is_full'])
+
+    def test_courses_page_query_count_independent_of_sections(self):
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/courses/')
+        for name in 'CDEFG':
+            Section.objects.create(course=self.course, year_level=2, section_name=name)
+        with self.assertNumQueries(len(before)):
+            response = self.client.get('/courses/')
+        self.assertContains(response, '3/3')
+
+    def test_student_cannot_join_full_section(self):
+        student = {'last_name': 'New', 'first_name': 'Student', 'course': 'BSCS', 'year_level': 1}
+        response = self.client.post('/api/students/', dict(student, student_id='X-1', section='A'),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('section', response.json()['message'])
+        response = self.client.post('/api/students/', dict(student, student_id='X-2', section='B'),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        # Editing a student already in the full section is still allowed
+        response = self.client.patch('/api/students/BSCS-00000/', {'last_name': 'Renamed'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        students = make_students(self.course, 5)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in students[:4]])
+        self.quiz = Activity.objects.create(subject=self.subject, activity_name='Quiz 1',
+                                            activity_type='Quiz', total_items=10)
+        self.exam = Activity.objects.create(subject=self.subject, activity_name='Midterm',
+                                            activity_type='Exam', total_items=50)
+        Grade.objects.save_grades([
+            (self.quiz.pk, 'BSCS-00000', '9'),
+            (self.exam.pk, 'BSCS-00000', '45'),
+            (self.exam.pk, 'BSCS-00002', '30'),
+            # Graded but not enrolled: left out of the export
+            (self.quiz.pk, 'BSCS-00004', '7'),
+        ])
+
+    def read_csv(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_subject_csv_matrix(self):
+        rows = self.read_csv('/api/subjects/CS101/export.csv')
+        self.assertEqual(rows[0][4:], ['Quiz 1 (Quiz, 10)', 'Midterm (Exam, 50)'])
+        self.assertEqual([row[0] for row in rows[1:]], [f'BSCS-0000{n}' for n in range(4)])
+        self.assertEqual(rows[1][4:], ['9', '45'])
+        self.assertEqual(rows[2][4:], ['N/A', 'N/A'])
+        self.assertEqual(rows[3][4:], ['N/A', '30'])
+
+    def test_subject_xlsx_is_a_valid_workbook(self):
+        response = self.client.get('/api/subjects/CS101/export.xlsx')
+        workbook = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 5)
+        self.assertIn('<c><v>45</v></c>', sheet)
+        self.assertIn('<t>Midterm (Exam, 50)</t>', sheet)
+
+    def test_query_count_independent_of_size(self):
+        with CaptureQueriesContext(connection) as before:
+            b''.join(self.client.get('/api/subjects/CS101/export.csv').streaming_content)
+        more = make_students(self.course, 50, start=100)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in more])
+        with self.assertNumQueries(len(before)):
+            b''.join(self.client.get('/api/subjects/CS101/export.csv').streaming_content)
+
+    async def test_asgi_export_streams_without_buffering(self):
+        response = await self.async_client.get('/api/subjects/CS101/export.csv')
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertEqual([row[0] for row in rows[1:]], [f'BSCS-0000{n}' for n in range(4)])
+
+    def test_course_semester_export(self):
+        other = make_subject(self.course, 'CS102')
+        other.semester = 2
+        other.save()
+        rows = self.read_csv('/api/courses/BSCS/export.csv?school_year=2025-2026&semester=1')
+        self.assertEqual(len(rows), 1 + 4 * 2)
+        self.assertEqual(rows[1][:3], ['CS101', 'CS101 Title', 'BSCS-00000'])
+        self.assertEqual(self.client.get('/api/courses/BSCS/export.pdf').status_code, 404)
+        self.assertEqual(self.client.get('/api/courses/BSCS/export.csv?semester=x').status_code, 400)
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        Section.objects.create(course=self.course, year_level=1, section_name='A', max_students=3)
+        make_students(self.course, 1, section='A')
+
+    def test_rows_are_validated_without_aborting_the_batch(self):
+        rows = [
+            {'student_id': 'S-1', 'last_name': 'Cruz', 'first_name': 'Ana', 'course': 'bscs', 'year_level': '1', 'section': 'a'},
+            {'student_id': 'S-1', 'last_name': 'Cruz', 'first_name': 'Ben', 'course': 'BSCS', 'year_level': '1', 'section': 'B'},
+            {'student_id': 'BSCS-00000', 'last_name': 'Old', 'first_name': 'One', 'course': 'BSCS', 'year_level': '1', 'section': 'B'},
+            {'student_id': 'S-2', 'last_name': 'Reyes', 'first_name': 'Carl', 'course': 'BSIT', 'year_level': '7', 'section': 'B'},
+            {'student_id': 'S-3', 'last_name': 'Lim', 'first_name': 'Dan', 'course': 'BSCS', 'year_level': '1', 'section': 'A'},
+            # Section A (capacity 3) is full after S-1 and S-3
+            {'student_id': 'S-4', 'last_name': 'Tan', 'first_name': 'Eve', 'course': 'BSCS', 'year_level': '1', 'section': 'A'},
+            {'student_id': 'S-5', 'last_name': 'Go', 'first_name': 'Fay', 'course': 'BSCS', 'year_level': '2', 'section': 'C'},
+        ]
+        result = import_students(rows, chunk_size=3)
+        self.assertEqual(result['created'], 3)
+        errors = {error['row']: error['errors'] for error in result['errors']}
+        self.assertEqual(set(errors), {2, 3, 4, 6})
+        self.assertIn('student_id', errors[2])
+        self.assertIn('student_id', errors[3])
+        self.assertEqual(set(errors[4]), {'course', 'year_level'})
+        self.assertIn('section', errors[6])
+        self.assertEqual(Student.objects.get(student_id='S-1').section, 'A')
+
+    def test_import_endpoint_accepts_csv_upload(self):
+        upload = BytesIO(b'Student ID,Last Name,First Name,Course,Year Level,Section\n'
+                         b'S-10,Cruz,Ana,BSCS,2,B\n'
+                         b'S-11,,Ben,BSCS,2,B\n')
+        upload.name = 'students.csv'
+        response = self.client.post('/api/students/import/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(data['errors'][0]['errors'], {'last_name': 'This field is required'})
+
+    def test_ids_taken_during_the_import_are_reported(self):
+        insert = importers._insert_students
+
+        def racing(rows):
+            Student.objects.create(student_id='S-1', last_name='Other', first_name='One', course=self.course,
+                                   year_level=1, section='B')
+            return insert(rows)
+
+        rows = [{'student_id': f'S-{n}', 'last_name': 'Cruz', 'first_name': 'Ana', 'course': 'BSCS',
+                 'year_level': 1, 'section': 'A'} for n in (1, 2)]
+        with mock.patch.object(importers, '_insert_students', side_effect=racing):
+            result = import_students(rows)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(result['errors'], [{'row': 1, 'student_id': 'S-1',
+                                             'errors': {'student_id': 'Student ID already exists'}}])
+        self.assertEqual(Student.objects.get(student_id='S-1').last_name, 'Other')
+
+    def test_json_lines_are_read_one_line_at_a_time(self):
+        lines = iter(['{"Student ID": "J-1"}\n', '\n', '{"student_id": "J-2"}\n'])
+        rows = read_json_rows(lines)
+        self.assertEqual(next(rows), {'student_id': 'J-1'})
+        self.assertEqual(list(lines), ['\n', '{"student_id": "J-2"}\n'])
+        self.assertEqual(list(read_json_rows(['[{"student_id": "J-3"},\n', ' {"student_id": "J-4"}]'])),
+                         [{'student_id': 'J-3'}, {'student_id': 'J-4'}])
+
+    def test_queries_do_not_grow_per_row(self):
+        rows = [{'student_id': f'N-{i}', 'last_name': 'L', 'first_name': 'F', 'course': 'BSCS',
+                 'year_level': 3, 'section': 'A'} for i in range(400)]
+        with CaptureQueriesContext(connection) as queries:
+            import_students(rows)
+        # Inserts are batched under SQLite's parameter limit, not issued per row
+        self.assertLess(len(queries), len(rows) // 20)
+        self.assertEqual(Student.objects.filter(student_id__startswith='N-').count(), 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'students.json'
+            path.write_text(json.dumps([{'student_id': 'J-1', 'last_name': 'Uy', 'first_name': 'Gio',
+                                         'course': 'BSCS', 'year_level': 4, 'section': 'D'}]))
+            call_command('import_students', str(path), stdout=out)
+        self.assertIn('Imported 1 students', out.getvalue())
+        self.assertTrue(Student.objects.filter(student_id='J-1').exists())
+
+
+class NumericGradeTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 6)
+        self.ids = [student.student_id for student in self.students]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids)
+        self.quiz = Activity.objects.create(subject=self.subject, activity_name='Quiz 1',
+                                            activity_type='Quiz', total_items=10)
+        self.exam = Activity.objects.create(subject=self.subject, activity_name='Midterm',
+                                            activity_type='Exam', total_items=50)
+        Grade.objects.save_grades(
+            [(self.quiz.pk, sid, grade) for sid, grade in zip(self.ids, ['10', '8.5', '7', '3', 'Missing', 'Excused'])] +
+            [(self.exam.pk, sid, grade) for sid, grade in zip(self.ids, ['45/50', '40', '20', 'N/A'])]
+        )
+
+    def test_grades_are_stored_as_scores(self):
+        grade = Grade.objects.get(activity=self.quiz, student__student_id=self.ids[1])
+        self.assertEqual((grade.score, grade.status, grade.student_grade), (Decimal('8.5'), 'G', '8.5'))
+        grade = Grade.objects.get(activity=self.quiz, student__student_id=self.ids[4])
+        self.assertEqual((grade.score, grade.status, grade.student_grade), (None, 'M', 'Missing'))
+        self.assertEqual(Grade.objects.get(activity=self.exam, student__student_id=self.ids[0]).score, 45)
+        self.assertEqual(student_grades(self.students[5], self.subject)[self.quiz.pk], 'Excused')
+
+    def test_student_grade_setter_clears_the_score_for_no_grade(self):
+        grade = Grade.objects.get(activity=self.quiz, student__student_id=self.ids[0])
+        for text in ['N/A', '']:
+            grade.student_grade = text
+            self.assertEqual((grade.score, grade.status, grade.student_grade), (None, 'G', 'N/A'))
+
+    def test_invalid_grade_saves_nothing(self):
+        response = self.client.post(f'/api/activities/{self.quiz.pk}/grades/', {'grades': [
+            {'student_id': self.ids[0], 'grade': '1'},
+            {'student_id': self.ids[1], 'grade': 'abc'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Grade.objects.get(activity=self.quiz, student__student_id=self.ids[0]).score, 10)
+
+    def test_activity_stats(self):
+        stats = activity_stats(self.quiz)
+        self.assertEqual(stats['graded'], 4)
+        self.assertEqual((stats['missing'], stats['excused']), (1, 1))
+        self.assertEqual(stats['average_score'], 7.12)
+        self.assertEqual(stats['average_percentage'], 71.25)
+        self.assertEqual((stats['min_percentage'], stats['max_percentage']), (30.0, 100.0))
+        self.assertEqual(stats['pass_rate'], 50.0)
+        counts = {row['range']: row['count'] for row in stats['distribution']}
+        self.assertEqual((counts['90-100'], counts['80-89'], counts['70-79'], counts['30-39']), (1, 1, 1, 1))
+
+    def test_subject_stats_use_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as before:
+            subject_stats(self.subject)
+        for n in range(5):
+            Activity.objects.create(subject=self.subject, activity_name=f'Extra {n}',
+                                    activity_type='Project', total_items=20)
+        with self.assertNumQueries(len(before)):
+            stats = subject_stats(self.subject)
+        self.assertEqual(stats['graded'], 7)
+        self.assertEqual([row['activity_type'] for row in stats['activity_types']], ['Exam', 'Quiz'])
+
+    def test_analytics_endpoints(self):
+        data = self.client.get(f'/api/subjects/{self.subject.subject_code}/analytics/').json()['data']
+        self.assertEqual(data['enrolled'], 6)
+        self.assertEqual(len(data['activities']), 2)
+        rows = self.client.get(f'/api/subjects/{self.subject.subject_code}/analytics/students/').json()['data']
+        self.assertEqual(rows[0]['student_id'], self.ids[0])
+        self.assertEqual(rows[0]['average_percentage'], 95.0)
+        data = self.client.get(f'/api/students/{self.ids[2]}/analytics/').json()['data']
+        self.assertEqual(data['subjects'][0]['average_percentage'], 55.0)
+        data = self.client.get(f'/api/activities/{self.exam.pk}/analytics/').json()['data']
+        self.assertEqual(data['graded'], 3)
+
+
+class FinalGradeTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 3)
+        self.ids = [student.student_id for student in self.students]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids)
+        self.quiz = Activity.objects.create(subject=self.subject, activity_name='Quiz 1',
+                                            activity_type='Quiz', total_items=10)
+        self.quiz2 = Activity.objects.create(subject=self.subject, activity_name='Quiz 2',
+                                             activity_type='Quiz', total_items=30)
+        self.exam = Activity.objects.create(subject=self.subject, activity_name='Final',
+                                            activity_type='Exam', total_items=50)
+        GradingPolicy.objects.create(subject=self.subject, weights={'Quiz': 40, 'Exam': 60})
+        Grade.objects.save_grades([
+            (self.quiz.pk, self.ids[0], '10'), (self.quiz2.pk, self.ids[0], '30'), (self.exam.pk, self.ids[0], '40'),
+            (self.quiz.pk, self.ids[1], '5'), (self.quiz2.pk, self.ids[1], 'Excused'), (self.exam.pk, self.ids[1], '25'),
+        ])
+
+    def grades(self):
+        return {row['student_id']: row['final_grade'] for row in final_grades(self.subject)}
+
+    def test_weighted_grades(self):
+        grades = self.grades()
+        # 40% of 100 + 60% of 80
+        self.assertEqual(grades[self.ids[0]], Decimal('88.00'))
+        # Excused quiz is left out: quizzes 5/10, exam 25/50
+        self.assertEqual(grades[self.ids[1]], Decimal('50.00'))
+        # Ungraded activities count as zero
+        self.assertEqual(grades[self.ids[2]], Decimal('0.00'))
+
+    def test_transmutation_and_rounding(self):
+        policy = self.subject.grading_policy
+        policy.transmutation = [[90, 1.0], [85, 1.5], [75, 3.0], [0, 5.0]]
+        policy.decimal_places = 0
+        policy.save()
+        grades = self.grades()
+        self.assertEqual(grades[self.ids[0]], Decimal('1.5'))
+        self.assertEqual(grades[self.ids[1]], Decimal('5.0'))
+
+    def test_results_are_stored_and_only_recomputed_when_stale(self):
+        self.grades()
+        self.assertFalse(StudentSubjectEnrollment.objects.filter(grade_stale=True).exists())
+        self.assertEqual(refresh_final_grades(self.subject), 0)
+
+        # A grade change only invalidates that student's enrollment
+        Grade.objects.save_grades([(self.exam.pk, self.ids[2], '50')])
+        stale = StudentSubjectEnrollment.objects.filter(grade_stale=True).values_list('student__student_id', flat=True)
+        self.assertEqual(list(stale), [self.ids[2]])
+        self.assertEqual(self.grades()[self.ids[2]], Decimal('60.00'))
+
+        # Activity and policy changes invalidate the whole subject
+        self.exam.total_items = 100
+        self.exam.save()
+        self.assertEqual(StudentSubjectEnrollment.objects.filter(grade_stale=True).count(), 3)
+        self.assertEqual(self.grades()[self.ids[0]], Decimal('64.00'))
+        response = self.client.put(f'/api/subjects/{self.subject.subject_code}/grading-policy/',
+                                   {'weights': {'Quiz': 1, 'Exam': 1}}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.grades()[self.ids[0]], Decimal('70.00'))
+
+    def test_computation_query_count_independent_of_class_size(self):
+        with CaptureQueriesContext(connection) as before:
+            compute_subject_grades(self.subject)
+        more = make_students(self.course, 40, start=100)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in more])
+        with self.assertNumQueries(len(before)):
+            compute_subject_grades(self.subject)
+
+    def test_endpoints(self):
+        response = self.client.put(f'/api/subjects/{self.subject.subject_code}/grading-policy/', {'weights': {'Quiz': -1}},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        data = self.client.get(f'/api/subjects/{self.subject.subject_code}/final-grades/').json()['data']
+        self.assertEqual(len(data), 3)
+        card = self.client.get(f'/api/students/{self.ids[0]}/report-card/').json()['data']
+        self.assertEqual(card[0]['subject_code'], 'CS101')
+        self.assertEqual(Decimal(card[0]['final_grade']), Decimal('88'))
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 4, section='A') + make_students(self.course, 4, start=4, section='B')
+        self.ids = [student.student_id for student in self.students]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids)
+        self.exam = Activity.objects.create(subject=self.subject, activity_name='Final',
+                                            activity_type='Exam', total_items=100)
+        # Two students tie at 90
+        scores = ['90', '70', '90', '50', '80', '60', '40', '30']
+        Grade.objects.save_grades([(self.exam.pk, sid, score) for sid, score in zip(self.ids, scores)])
+        refresh_final_grades(self.subject)
+
+    def test_top_students_with_ties(self):
+        with self.assertNumQueries(2):
+            top = top_students(self.subject, 3)
+        self.assertEqual([(row['student_id'], row['rank']) for row in top],
+                         [(self.ids[0], 1), (self.ids[2], 1), (self.ids[4], 3)])
+        self.assertEqual(top[0]['percentile'], 85.71)
+
+    def test_student_rank_matches_window_functions(self):
+        for row in top_students(self.subject, 8):
+            rank = student_rank(self.subject, row['student_id'])
+            self.assertEqual((rank['rank'], rank['percentile']), (row['rank'], row['percentile']))
+        self.assertIsNone(student_rank(self.subject, 'NOPE'))
+
+    def test_section_standings_and_buckets(self):
+        top = top_students(self.subject, 10, section='B')
+        self.assertEqual([row['student_id'] for row in top], self.ids[4:])
+        self.assertEqual(student_rank(self.subject, self.ids[4], section='B')['rank'], 1)
+        buckets = percentile_buckets(self.subject, 4)
+        self.assertEqual([bucket['count'] for bucket in buckets], [2, 2, 2, 2])
+        self.assertEqual((buckets[0]['max'], buckets[-1]['min']), (Decimal('90'), Decimal('30')))
+        self.assertIsInstance(buckets[0]['max'], Decimal)
+        with CaptureQueriesContext(connection) as queries:
+            percentile_buckets(self.subject, 4)
+        self.assertIn('GROUP BY bucket', queries[-1]['sql'])
+
+    def test_endpoint(self):
+        url = f'/api/subjects/{self.subject.subject_code}/rankings/'
+        data = self.client.get(url, {'top': 2, 'student': self.ids[3], 'buckets': 2}).json()['data']
+        self.assertEqual(len(data['top']), 2)
+        self.assertEqual(data['student']['rank'], 6)
+        self.assertEqual(len(data['buckets']), 2)
+        self.assertEqual(self.client.get(url, {'student': 'NOPE'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'top': 'x'}).status_code, 400)
+
+
+class CacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        cache_stats.reset()
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 3)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in self.students])
+        self.quiz = Activity.objects.create(subject=self.subject, activity_name='Quiz 1',
+                                            activity_type='Quiz', total_items=10)
+
+    def sections(self):
+        return self.client.get('/api/student-sections/', {'course': 'BSCS', 'year_level': 1}).json()['data']
+
+    def test_hit_costs_one_query(self):
+        Section.objects.create(course=self.course, year_level=1, section_name='A', max_students=40)
+        self.sections()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.sections(), [{'section_name': 'A'}])
+        counts = self.client.get('/api/cache/stats/').json()['data']['get_student_sections']
+        self.assertEqual((counts['hits'], counts['misses']), (1, 1))
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.sections(), [])
+        section = Section.objects.create(course=self.course, year_level=1, section_name='A', max_students=40)
+        self.assertEqual(self.sections(), [{'section_name': 'A'}])
+        section.delete()
+        self.assertEqual(self.sections(), [])
+
+    def test_parent_deletes_invalidate_enrollments_and_grades(self):
+        Grade.objects.save_grades([(self.quiz.pk, s.student_id, '8') for s in self.students])
+        counts = lambda: cached('counts', ['enrollment', 'grade'], lambda: (
+            StudentSubjectEnrollment.objects.count(), Grade.objects.count()
+        ))
+        self.assertEqual(counts(), (3, 3))
+        self.students[0].delete()
+        self.assertEqual(counts(), (2, 2))
+        self.quiz.delete()
+        self.assertEqual(counts(), (2, 0))
+        self.subject.delete()
+        self.assertEqual(counts(), (0, 0))
+
+    def test_subject_info_sees_grades_and_renames(self):
+        url = f'/subjects/{self.subject.subject_code}/'
+        activity = lambda: self.client.get(url).context['activities'][0]
+        self.assertEqual(activity().graded_count, 0)
+        Grade.objects.save_grades([(self.quiz.pk, self.students[0].student_id, '8')])
+        self.assertEqual(activity().graded_count, 1)
+
+        response = self.client.get('/courses/')
+        self.assertEqual(response.context['sections'], [])
+        self.client.put('/api/courses/BSCS/', {'course_abv': 'BSIT', 'course_name': 'IT'},
+                        content_type='application/json')
+        courses = self.client.get('/courses/').context['courses']
+        self.assertEqual([course.course_abv for course in courses], ['BSIT'])
+
+
+class SubjectInfoTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.other = make_subject(self.course, 'CS102')
+        self.ids = [student.student_id for student in make_students(self.course, 5)]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids[:3])
+        StudentSubjectEnrollment.objects.bulk_enroll([self.other], self.ids)
+        Activity.objects.create(subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10)
+
+    def page(self, **params):
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/subjects/{self.subject.subject_code}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.context, len(queries)
+
+    def test_roster_is_only_this_subject(self):
+        context, _ = self.page()
+        self.assertEqual([e.student.student_id for e in context['enrolled_students']], self.ids[:3])
+        self.assertEqual(context['total_students'], 3)
+
+    def test_query_count_does_not_grow_with_the_roster(self):
+        _, small = self.page()
+        more = make_students(self.course, 250, start=100)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in more])
+        context, large = self.page(page=3)
+        # versions, subject, roster count, roster page, activities
+        self.assertEqual((small, large), (5, 5))
+        self.assertEqual(context['total_students'], 253)
+        self.assertEqual(context['roster_page'], {'number': 3, 'num_pages': 3, 'start': 201, 'end': 253})
+        self.assertEqual(len(context['enrolled_students']), 53)
+        self.assertEqual(self.page(page='x')[0]['roster_page']['number'], 1)
+
+
+class ETagTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        self.students = make_students(self.course, 3)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [s.student_id for s in self.students])
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return first['ETag']
+
+    def test_not_modified_costs_one_query(self):
+        for url in ['/api/sections/?course=BSCS', f'/api/subjects/{self.subject.subject_code}/available-students/',
+                    f'/api/enrollments/?subject={self.subject.subject_code}', '/api/activities/']:
+            self.assertRevalidates(url)
+
+    def test_writes_change_the_etag(self):
+        url = f'/api/enrollments/?subject={self.subject.subject_code}'
+        etag = self.assertRevalidates(url)
+        self.client.post('/api/enrollments/remove_student/',
+                         {'subject_code': self.subject.subject_code, 'student_id': self.students[0].student_id},
+                         content_type='application/json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertNotEqual(response['ETag'], etag)
+        # Each query string is its own representation
+        self.assertNotEqual(self.client.get(url + '&fields=id')['ETag'], response['ETag'])
+
+    def test_cascading_parent_delete_changes_the_etag(self):
+        etag = self.assertRevalidates('/api/enrollments/')
+        self.client.delete(f'/api/subjects/{self.subject.subject_code}/')
+        self.assertFalse(StudentSubjectEnrollment.objects.exists())
+        response = self.client.get('/api/enrollments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()['results']), (200, []))
+
+    def test_undeclared_actions_have_no_etag(self):
+        response = self.client.get(f'/api/subjects/{self.subject.subject_code}/analytics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class FastReadTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        make_students(self.course, 5)
+        Student.objects.create(student_id='NOCOURSE', last_name='Doe', first_name='Jane',
+                               course=None, year_level=2, section='B', middle_name=None)
+        self.subject = make_subject(self.course, 'CS101')
+        make_subject(None, 'GE101')
+        Activity.objects.create(subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10)
+        Section.objects.create(course=self.course, year_level=1, section_name='A', max_students=40)
+
+    def assertSameOutput(self, url, serializer_class, queryset, fields=None):
+        params = {'page_size': 500, **({'fields': fields} if fields else {})}
+        request = Request(APIRequestFactory().get(url, params))
+        expected = serializer_class(queryset, many=True, context={'request': request}).data
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(JSONRenderer().render(response.json()['results']), JSONRenderer().render(expected))
+
+    def test_lists_match_the_serializers(self):
+        cases = [
+            ('/api/students/', StudentSerializer, Student.objects.order_by('student_id')),
+            ('/api/subjects/', SubjectSerializer, Subject.objects.filter(archive=False).order_by('subject_code')),
+            ('/api/activities/', ActivitySerializer, Activity.objects.order_by('activity_id')),
+            ('/api/courses/', CourseSerializer, Course.objects.order_by('course_abv')),
+            ('/api/sections/', SectionSerializer, Section.objects.order_by('id')),
+        ]
+        for url, serializer_class, queryset in cases:
+            for fields in [None, 'course_name', 'status,course,course_name', 'course']:
+                with self.subTest(url=url, fields=fields):
+                    self.assertSameOutput(url, serializer_class, queryset, fields)
+
+    def test_pages_and_retrieve(self):
+        first = self.client.get('/api/students/', {'page_size': 4}).json()
+        rest = self.client.get(first['next']).json()
+        ids = [row['student_id'] for row in first['results'] + rest['results']]
+        self.assertEqual(ids, sorted(Student.objects.values_list('student_id', flat=True)))
+
+        expected = StudentSerializer(Student.objects.get(student_id='NOCOURSE')).data
+        self.assertEqual(self.client.get('/api/students/NOCOURSE/').json()['data'], expected)
+        self.assertEqual(self.client.get('/api/students/NOPE/').status_code, 404)
+
+    def test_list_query_count(self):
+        with self.assertNumQueries(2):
+            # version tokens for the ETag, then one page query
+            self.client.get('/api/students/')
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.students = make_students(self.course, 6)
+
+    def test_recorder_flags_repeated_statements(self):
+        with record_queries() as recorder:
+            for student in self.students:
+                Student.objects.get(pk=student.pk)
+            Course.objects.count()
+        self.assertEqual(recorder.count, 7)
+        [(sql, times)] = recorder.duplicates()
+        self.assertEqual(times, 6)
+        self.assertNotIn('BSCS-', sql)
+        self.assertGreater(recorder.wall_time, 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/students/')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE sms_view_queries histogram', body)
+        self.assertIn('sms_view_queries_count{view="student-list"} 1', body)
+        self.assertIn('sms_view_duration_seconds_bucket{view="student-list",le="+Inf"} 1', body)
+
+    async def test_sync_views_are_counted_under_asgi(self):
+        response = await self.async_client.get('/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(metrics._views['courses'].queries.sum, 0)
+
+    def test_unsampled_requests_are_not_recorded(self):
+        with self.settings(SMS_METRICS_SAMPLE_RATE=0):
+            self.client.get('/api/students/')
+        self.assertNotIn('student-list', metrics.render())
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_seed_run_and_compare(self):
+        summary = seed_population(24, courses=1, subjects_per_cohort=1, activities=2)
+        self.assertEqual((summary['students'], summary['subjects'], summary['activities']), (24, 12, 24))
+        self.assertEqual(ActivityProgress.objects.verify(), [])
+
+        report = run_suite(repeat=2, cases=['subject_info', 'save_grades', 'students_list'])
+        self.assertEqual(report['meta']['students'], 24)
+        self.assertTrue(all(result['status'] == [200] for result in report['results'].values()))
+        # Writes are rolled back after each timed request
+        self.assertEqual(Grade.objects.count(), summary['grades'])
+
+        self.assertEqual(compare(report, report), [])
+        slower = json.loads(json.dumps(report))
+        slower['results']['students_list']['queries'] += 1
+        self.assertEqual(len(compare(slower, report)), 1)
+
+    def test_parse_scale(self):
+        self.assertEqual([parse_scale(value) for value in ['1k', '10K', '2500', '0.5m']], [1000, 10000, 2500, 500000])
+
+
+class SQLiteProfileTests(TestCase):
+    def open(self, path):
+        settings_dict = {**connection.settings_dict, 'NAME': path, 'OPTIONS': SQLITE_PRODUCTION_OPTIONS}
+        return DatabaseWrapper(settings_dict, alias='sqlite-profile')
+
+    def test_production_pragmas_and_concurrent_writers(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = str(Path(directory.name) / 'profile.sqlite3')
+        setup = self.open(path)
+        self.addCleanup(setup.close)
+        with setup.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(cursor.execute('PRAGMA temp_store').fetchone()[0], 2)  # MEMORY
+            cursor.execute('CREATE TABLE scores (writer INTEGER, n INTEGER)')
+
+        errors = []
+
+        def write(writer):
+            db = self.open(path)
+            try:
+                # Outside autocommit every write transaction starts with BEGIN IMMEDIATE
+                db.set_autocommit(False)
+                for n in range(50):
+                    with db.cursor() as cursor:
+                        cursor.execute('INSERT INTO scores VALUES (%s, %s)', [writer, n])
+                    db.commit()
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                db.close()
+
+        # Each wrapper is only used by the thread that opened it
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with setup.cursor() as cursor:
+            self.assertEqual(cursor.execute('SELECT COUNT(*) FROM scores').fetchone()[0], 200)
+
+
+class RenameTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS301')
+        self.ids = [student.student_id for student in make_students(self.course, 10)]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids)
+        GradingPolicy.objects.create(subject=self.subject)
+        Section.objects.create(course=self.course, year_level=1, section_name='A')
+        self.activity = Activity.objects.create(
+            subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10
+        )
+        Grade.objects.save_grades([(self.activity.activity_id, sid, '7') for sid in self.ids])
+
+    def test_rename_course_keeps_related_rows(self):
+        response = self.client.put('/api/courses/BSCS/', {'course_abv': 'CS', 'course_name': 'CompSci'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Course.objects.values_list('course_abv', 'course_name')), [('CS', 'CompSci')])
+        self.assertEqual(Student.objects.filter(course__course_abv='CS').count(), 10)
+        self.assertEqual(Subject.objects.get().course.course_abv, 'CS')
+        self.assertEqual(Section.objects.get().course.course_abv, 'CS')
+        self.assertEqual(Grade.objects.count(), 10)
+
+    def test_rename_subject_and_student(self):
+        response = self.client.put('/api/subjects/CS301/', {'subject_code': 'cs401', 'subject_title': 'Renamed'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        subject = Subject.objects.get()
+        self.assertEqual((subject.subject_code, subject.subject_title), ('CS401', 'Renamed'))
+        self.assertEqual(Activity.objects.get().subject.subject_code, 'CS401')
+        self.assertEqual(StudentSubjectEnrollment.objects.filter(subject__subject_code='CS401').count(), 10)
+        self.assertEqual(GradingPolicy.objects.get().subject.subject_code, 'CS401')
+
+        response = self.client.put(f'/api/students/{self.ids[0]}/', {'student_id': 'NEW-1', 'first_name': 'Ana'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        student = Student.objects.get(student_id='NEW-1')
+        self.assertEqual(student.first_name, 'Ana')
+        # Previously the old row was deleted and its grades cascaded away
+        self.assertEqual(Grade.objects.filter(student=student).count(), 1)
+        self.assertEqual(StudentSubjectEnrollment.objects.filter(student=student).count(), 1)
+        self.assertEqual(Grade.objects.count(), 10)
+
+    def test_rename_is_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            Course.objects.rename('BSCS', 'CS')
+        more = make_students(Course.objects.get(), 50, start=100)
+        activity = Activity.objects.create(subject=self.subject, activity_name='Quiz 2', activity_type='Quiz',
+                                           total_items=10)
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], [student.student_id for student in more])
+        Grade.objects.save_grades([(activity.activity_id, student.student_id, '5') for student in more])
+        with self.assertNumQueries(len(small)):
+            Course.objects.rename('CS', 'BSCS')
+        self.assertEqual(Student.objects.filter(course__course_abv='BSCS').count(), 60)
+
+    def test_rename_only_touches_the_renamed_row(self):
+        keys = list(Grade.objects.order_by('pk').values_list('student_id', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            Student.objects.rename(self.ids[0], 'NEW-1')
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)  # the student row and the cache versions
+        self.assertTrue(updates[0].startswith('UPDATE "SMSapp_student"'))
+        self.assertEqual(list(Grade.objects.order_by('pk').values_list('student_id', flat=True)), keys)
+        # The API still speaks in codes
+        rows = self.client.get('/api/enrollments/?subject=CS301').json()['results']
+        self.assertIn('NEW-1', [row['student']['student_id'] for row in rows])
+
+    def test_rename_to_existing_key_fails(self):
+        Course.objects.create(course_abv='BSIT', course_name='Information Technology')
+        with self.assertRaises(ValidationError):
+            Course.objects.rename('BSCS', 'BSIT')
+        self.assertEqual(Student.objects.filter(course__course_abv='BSCS').count(), 10)
+
+
+@override_settings(SMS_ASYNC_DB_THREADS=False)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subject = make_subject(self.course, 'CS101')
+        other = make_subject(self.course, 'CS102')
+        self.ids = [student.student_id for student in make_students(self.course, 4)]
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subject], self.ids[:3])
+        StudentSubjectEnrollment.objects.bulk_enroll([other], self.ids)
+        Activity.objects.create(subject=self.subject, activity_name='Quiz 1', activity_type='Quiz', total_items=10)
+        self.factory = RequestFactory()
+
+    def call(self, view, path, *args):
+        return async_to_sync(view)(self.factory.get(path), *args)
+
+    def test_async_builders_match_the_sync_ones(self):
+        self.assertEqual(async_to_sync(aget_dashboard_stats)(), get_dashboard_stats())
+        self.assertEqual(async_to_sync(views._subject_info_context_async)('CS101', 1),
+                         views._subject_info_context('CS101', 1))
+        self.assertIsNone(async_to_sync(views._subject_info_context_async)('NOPE'))
+
+    def test_pages(self):
+        self.assertEqual(self.call(views.index_async, '/').status_code, 200)
+        response = self.call(views.subject_info_async, '/subjects/CS101/', 'CS101')
+        self.assertContains(response, self.ids[2])
+        self.assertNotContains(response, self.ids[3])
+        self.assertContains(self.call(views.student_info_async, '/students/x/', self.ids[3]), 'CS102')
+        with self.assertRaises(Http404):
+            self.call(views.student_info_async, '/students/x/', 'NOPE')
+
+    def test_async_urls(self):
+        patterns = use_async_views(urls.urlpatterns, {'index': views.index_async}, threaded=['student-list'])
+        resolver = URLResolver(RegexPattern(r'^/'), patterns)
+        self.assertIs(resolver.resolve('/').func, views.index_async)
+        self.assertIs(resolver.resolve('/index/').func, views.index_async)
+        self.assertFalse(iscoroutinefunction(resolver.resolve('/api/courses/').func))
+        students = resolver.resolve('/api/students/').func
+        self.assertTrue(iscoroutinefunction(students))
+        response = async_to_sync(students)(self.factory.get('/api/students/'))
+        self.assertEqual(len(json.loads(response.content)['results']), 4)
+
+
+class AsyncWorkerThreadTests(TransactionTestCase):
+    def test_queries_run_on_worker_threads_and_are_recorded(self):
+        course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        subject = make_subject(course, 'CS101')
+        StudentSubjectEnrollment.objects.bulk_enroll([subject], [s.student_id for s in make_students(course, 3)])
+        with CaptureQueriesContext(connection) as here, record_queries() as recorder:
+            context = async_to_sync(views._subject_info_context_async)('CS101', 1)
+        self.assertEqual(context['total_students'], 3)
+        # subject, roster count and activities at once, then the roster page
+        self.assertEqual((len(here), recorder.count), (0, 4))
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        settings = override_settings(SMS_JOB_FILES_DIR=self.files.name, SMS_JOB_INLINE_ROWS=20)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.course = Course.objects.create(course_abv='BSCS', course_name='Computer Science')
+        self.subjects = [make_subject(self.course, f'CS10{n}') for n in range(2)]
+        self.ids = [student.student_id for student in make_students(self.course, 15)]
+
+    def accepted(self, response):
+        self.assertEqual(response.status_code, 202)
+        url = response.json()['data']['url']
+        self.assertEqual(response['Location'], url)
+        return url
+
+    def test_large_bulk_enroll_runs_as_a_job(self):
+        small = self.client.post('/api/enrollments/bulk_enroll/', {'subject_code': 'CS100', 'student_ids': self.ids[:5]},
+                                 content_type='application/json')
+        self.assertEqual(small.status_code, 200)
+        url = self.accepted(self.client.post('/api/enrollments/bulk_enroll/', {
+            'subject_codes': ['CS100', 'CS101'], 'student_ids': self.ids,
+        }, content_type='application/json'))
+        self.assertEqual(self.client.get(url).json()['data']['status'], 'queued')
+
+        self.assertEqual(jobs.run_pending('test'), 1)
+        job = self.client.get(url).json()['data']
+        self.assertEqual((job['status'], job['progress']), ('succeeded', {'done': 2, 'total': 2}))
+        self.assertEqual(job['result']['enrolled_count'], 25)
+        self.assertEqual(job['result']['subjects']['CS100']['skipped'], self.ids[:5])
+        self.assertEqual(StudentSubjectEnrollment.objects.count(), 30)
+
+    def test_queued_import_and_export(self):
+        upload = BytesIO(b'Student ID,Last Name,First Name,Course,Year Level,Section\n'
+                         b'S-10,Cruz,Ana,BSCS,1,A\n'
+                         b'S-11,,Ben,BSCS,1,A\n')
+        upload.name = 'students.csv'
+        self.accepted(self.client.post('/api/students/import/?async=1', {'file': upload}))
+        StudentSubjectEnrollment.objects.bulk_enroll([self.subjects[0]], self.ids[:3])
+        url = self.accepted(self.client.get('/api/subjects/CS100/export.csv?async=1'))
+        self.assertEqual(jobs.run_pending('test'), 2)
+
+        imported = Job.objects.get(kind='import_students')
+        self.assertEqual(imported.params['format'], 'csv')
+        self.assertNotIn('text', imported.params)
+        self.assertEqual((imported.result['created'], imported.progress_done), (1, 2))
+        self.assertTrue(Student.objects.filter(student_id='S-10').exists())
+        export = self.client.get(url).json()['data']
+        self.assertEqual(export['result']['rows'], 4)
+        self.assertEqual(sorted(path.name for path in Path(self.files.name).iterdir()), [f"{export['id']}.csv"])
+        download = self.client.get(export['download'])
+        self.assertEqual(download['Content-Type'], 'text/csv')
+        self.assertIn('filename="CS100_grades.csv"', download['Content-Disposition'])
+        self.assertEqual(b''.join(download.streaming_content),
+                         b''.join(self.client.get('/api/subjects/CS100/export.csv').streaming_content))
+        self.assertEqual(self.client.get(f'/api/jobs/{imported.pk}/download/').status_code, 409)
+
+    def test_queued_json_body_is_stored_on_disk(self):
+        rows = [{'student_id': f'J-{n}', 'last_name': 'Cruz', 'first_name': 'Ana', 'course': 'BSCS',
+                 'year_level': 1, 'section': 'A'} for n in range(25)]
+        self.accepted(self.client.post('/api/students/import/', rows, content_type='application/json'))
+        job = Job.objects.get(kind='import_students')
+        self.assertEqual(set(job.params), {'file', 'format'})
+        self.assertTrue((Path(self.files.name) / job.params['file']).exists())
+        jobs.run_pending('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result['created']), ('succeeded', 25))
+        self.assertEqual(list(Path(self.files.name).iterdir()), [])
+
+    def test_job_files_are_cleaned_up(self):
+        files = Path(self.files.name)
+        (files / 'upload-broken.json').write_text('{not json\n')
+        broken = Job.objects.enqueue('import_students', {'file': 'upload-broken.json', 'format': 'json'})
+        with self.assertLogs('SMSapp.jobs', 'ERROR'):
+            jobs.run_pending('test')
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, 'failed')
+        self.assertFalse((files / 'upload-broken.json').exists())
+
+        (files / '1.csv').write_text('old export')
+        (files / 'upload-waiting.csv').write_text('queued upload')
+        Job.objects.enqueue('import_students', {'file': 'upload-waiting.csv', 'format': 'csv'})
+        week_ago = time.time() - 8 * 24 * 3600
+        for path in files.iterdir():
+            os.utime(path, (week_ago, week_ago))
+        (files / '2.csv').write_text('new export')
+        self.assertEqual(jobs.purge_files(timedelta(days=7)), 1)
+        self.assertEqual(sorted(path.name for path in files.iterdir()), ['2.csv', 'upload-waiting.csv'])
+
+    def test_export_names_cannot_escape_the_files_dir(self):
+        response = self.client.get('/api/courses/BSCS/export.csv?async=1&school_year=x/../../outside/foo')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+        url = self.accepted(self.client.get('/api/courses/BSCS/export.csv?async=1&school_year=2025-2026'))
+        jobs.run_pending('test')
+        download = self.client.get(self.client.get(url).json()['data']['download'])
+        self.assertIn('filename="BSCS_2025-2026_grades.csv"', download['Content-Disposition'])
+
+    def test_transient_errors_are_retried_and_resume(self):
+        job = Job.objects.enqueue('bulk_enroll', {'subject_codes': ['CS100', 'CS101'], 'student_ids': self.ids})
+        bulk_enroll = StudentSubjectEnrollment.objects.bulk_enroll
+        calls = []
+
+        def locked_once(subjects, student_ids):
+            calls.append(subjects[0].subject_code)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            return bulk_enroll(subjects, student_ids)
+
+        with mock.patch.object(StudentSubjectEnrollment.objects, 'bulk_enroll', side_effect=locked_once):
+            with self.assertLogs('SMSapp.jobs', 'WARNING'):
+                jobs.run_pending('test')
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.error), ('queued', 1, 'database is locked'))
+            self.assertGreater(job.run_after, timezone.now())
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            jobs.run_pending('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('succeeded', 2))
+        self.assertEqual(calls, ['CS100', 'CS101', 'CS101'])
+        self.assertEqual(job.result['enrolled_count'], 30)
+
+    def test_failures_and_stale_jobs(self):
+        broken = Job.objects.enqueue('export', {'scope': 'subject', 'code': 'NOPE', 'fmt': 'csv', 'name': 'x'})
+        with self.assertLogs('SMSapp.jobs', 'ERROR'):
+            jobs.run_pending('test')
+        broken.refresh_from_db()
+        self.assertEqual((broken.status, broken.attempts), ('failed', 1))
+
+        stale = Job.objects.enqueue('bulk_enroll', {'subject_codes': ['CS100'], 'student_ids': self.ids})
+        self.assertEqual(Job.objects.claim('gone').pk, stale.pk)
+        self.assertIsNone(Job.objects.claim('other'))
+        Job.objects.filter(pk=stale.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=20))
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=10)), 1)
+        self.assertEqual(jobs.run_pending('test'), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.attempts), ('succeeded', 2))
+
+    def test_jobs_that_keep_killing_their_worker_fail(self):
+        job = Job.objects.enqueue('bulk_enroll', {'subject_codes': ['CS100'], 'student_ids': self.ids}, max_attempts=2)
+        for _ in range(2):
+            self.assertEqual(Job.objects.claim('killed').pk, job.pk)
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=20))
+            Job.objects.requeue_stale(timedelta(minutes=10))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('worker stopped', job.error)
+        # A queued job out of attempts is never claimed
+        Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+        self.assertIsNone(Job.objects.claim('other'))
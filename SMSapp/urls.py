@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .concurrency import use_async_views
 
 router = DefaultRouter()
 router.register(r'subjects', views.SubjectViewSet)
@@ -9,10 +11,16 @@ router.register(r'enrollments', views.EnrollmentViewSet, basename='enrollment')
 router.register(r'courses', views.CourseViewSet)
 router.register(r'students', views.StudentViewSet)
 router.register(r'sections', views.SectionViewSet, basename='section')
+router.register(r'jobs', views.JobViewSet)
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('api/', include(router.urls)),
+    path('api/dashboard/', views.dashboard_stats, name='dashboard_stats'),
+    path('api/cache/stats/', views.cache_stats_view, name='cache_stats'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('api/subjects/<str:subject_code>/export.<str:fmt>', views.export_subject, name='export_subject'),
+    path('api/courses/<str:course_abv>/export.<str:fmt>', views.export_course, name='export_course'),
     path('index/', views.index, name='index'),
     path('subjects/', views.subjects, name='subjects'),
     path('subjects/<str:subject_code>/', views.subject_info, name='subject_info'),
@@ -24,6 +32,9 @@ urlpatterns = [
     path('api/activities/<int:activity_id>/grades/', views.GradeViewSet.as_view({
         'post': 'save_grades',
     }), name='save_grades'),
+    path('api/grades/', views.GradeViewSet.as_view({
+        'post': 'save_gradebook',
+    }), name='save_gradebook'),
     path('archived-subjects/', views.archived_subjects, name='archived_subjects'),
     path('api/subjects/<str:subject_code>/archive/', views.archive_subject, name='archive_subject'),
     path('api/subjects/<str:subject_code>/', views.delete_subject, name='delete_subject'),
@@ -33,4 +44,12 @@ urlpatterns = [
     path('api/subjects/<str:subject_code>/available-students/', views.get_available_students, name='get_available_students'),
     path('api/student-sections/', views.get_student_sections, name='student_sections'),  # Use existing view
     path('api/subject-sections/', views.get_student_sections, name='subject_sections'),
-]
\ No newline at end of file
+]
+
+if settings.SMS_ASYNC_VIEWS:
+    # Under ASGI: async pages, and the list APIs on worker threads that keep their connections
+    urlpatterns = use_async_views(urlpatterns, {
+        'index': views.index_async,
+        'subject_info': views.subject_info_async,
+        'student_info': views.student_info_async,
+    }, threaded=[f'{basename}-list' for _, _, basename in router.registry])
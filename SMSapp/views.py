@@ -1,10 +1,20 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from rest_framework.decorators import api_view
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from rest_framework.decorators import api_view, permission_classes
 from django.db import models, transaction
 import json  # Add json import here
+import logging
+import re
 
-from .models import Subject, Activity, Grade, Student, Course, Section
+from .models import (
+    Subject, Activity, Grade, Student, Course, Section, ActivityProgress, GradingPolicy, CacheVersion, Job,
+    format_grade,
+)
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -13,133 +23,207 @@ from django.db import models  # Add this import
 from .models import Subject, Activity, StudentSubjectEnrollment, Course, Student, Grade
 from .serializers import (
     SubjectSerializer, ActivitySerializer, 
-    StudentSubjectEnrollmentSerializer, CourseSerializer, StudentSerializer,SectionSerializer, GradeSerializer
+    StudentSubjectEnrollmentSerializer, CourseSerializer, StudentSerializer,SectionSerializer, GradeSerializer,
+    GradingPolicySerializer, JobSerializer
 )
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime
 from django.utils import timezone
-from django.db.models import Count, Q, OuterRef, Exists
+from django.db.models import Count, Q, OuterRef, Exists, Subquery
+from django.db.models.functions import Coalesce
+from .dashboard import aget_dashboard_stats, get_dashboard_stats, dashboard_stats_json
+from .gradebook import student_grades, subject_gradebook
+from .search import search_students
+from .exports import course_rows, stream_csv, stream_xlsx, subject_rows
+from .importers import import_students, read_uploaded_rows, upload_format
+from . import analytics
+from .grading import final_grades, report_card, refresh_final_grades
+from . import rankings as ranking_service
+from .caching import acached, cached, stats as cache_stats
+from .concurrency import db, gather
+from .etags import ConditionalGetMixin, etag_view
+from .fastread import ValuesReadMixin
+from .instrumentation import metrics
+from .jobs import job_file, save_rows, save_upload, wants_job
+
+logger = logging.getLogger(__name__)
+
+# Rows per page on the students page and its search API
+STUDENT_PAGE_SIZE = 25
 
 def index(request):
-    # Summary statistics
-    total_students = Student.objects.count()
-    total_courses = Course.objects.count()
-    total_subjects = Subject.objects.filter(is_active=True).count()
-    archived_subjects = Subject.objects.filter(is_active=False).count()
-    
-    # Calculate new students this month
-    this_month = timezone.now().replace(day=1)
-    new_students = Student.objects.filter(date_added__gte=this_month).count()
-
-    # Course statistics with student counts
-    course_stats = Course.objects.annotate(
-        student_count=Count('student')
-    ).values('course_abv', 'course_name', 'student_count')
-
-    # Year level distribution with percentages
-    total_count = Student.objects.count()
-    year_stats = Student.objects.values('year_level').annotate(
-        student_count=Count('student_id')
-    ).order_by('year_level')
-    
-    for year in year_stats:
-        year['percentage'] = (year['student_count'] / total_count * 100) if total_count > 0 else 0
-
-    # Activity type distribution
-    activity_stats = []
-    for activity_type in ['Quiz', 'Exam', 'Project', 'Activities']:
-        count = Activity.objects.filter(activity_type=activity_type).count()
-        pending = Activity.objects.filter(
-            activity_type=activity_type
-        ).exclude(
-            activity_id__in=Grade.objects.values('activity')
-        ).count()
-        
-        activity_stats.append({
-            'type': activity_type,
-            'count': count,
-            'pending': pending
-        })
+    context = get_dashboard_stats()
+    return render(request, 'index.html', context)
 
-    # Recent activities with pending grades count
-    recent_activities = Activity.objects.select_related('subject').order_by('-activity_id')[:5]
-    for activity in recent_activities:
-        total_students = StudentSubjectEnrollment.objects.filter(subject=activity.subject).count()
-        graded_count = Grade.objects.filter(activity=activity).count()
-        activity.pending_count = total_students - graded_count
+@api_view(['GET'])
+def dashboard_stats(request):
+    """Dashboard tiles as JSON, computed by the same service as the home page"""
+    return JsonResponse({
+        'status': 'success',
+        'data': dashboard_stats_json(get_dashboard_stats())
+    })
+
+# School years look like 2025-2026
+SCHOOL_YEAR_PATTERN = re.compile(r'\d{4}-\d{4}')
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+async def _stream_async(content):
+    """Hand a sync stream to ASGI chunk by chunk; Django would read it all into memory first"""
+    # Thread-sensitive: every chunk is pulled on the request's own thread, where its cursors live
+    next_chunk = sync_to_async(next)
+    iterator = iter(content)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+def _job_accepted(job, message):
+    """202 for a queued job; the client polls its status URL (also in the Location header)"""
+    url = reverse('job-detail', args=[job.pk])
+    response = JsonResponse({
+        'status': 'success',
+        'message': message,
+        'data': {'job_id': job.pk, 'status': job.status, 'url': url}
+    }, status=202)
+    response['Location'] = url
+    return response
+
+def _export_response(request, rows, fmt, name):
+    content = stream_csv(rows) if fmt == 'csv' else stream_xlsx(rows, sheet_name=name)
+    if isinstance(request, ASGIRequest):
+        content = _stream_async(content)
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = content_disposition_header(True, f'{name}.{fmt}')
+    return response
 
-    context = {
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'total_subjects': total_subjects,
-        'archived_subjects': archived_subjects,
-        'new_students': new_students,
-        'pending_activities': Activity.objects.filter(
-            activity_id__in=StudentSubjectEnrollment.objects.values('subject__activity')
-        ).exclude(
-            activity_id__in=Grade.objects.values('activity')
-        ).count(),
-        'course_stats': course_stats,
-        'year_stats': year_stats,
-        'activity_stats': activity_stats,
-        'recent_students': Student.objects.select_related('course').order_by('-date_added')[:5],
-        'recent_activities': recent_activities,
-    }
-    
-    return render(request, 'index.html', context)
+@require_http_methods(["GET"])
+def export_subject(request, subject_code, fmt):
+    """Stream the student x activity grade matrix of a subject as CSV or XLSX"""
+    subject = get_object_or_404(Subject, subject_code=subject_code)
+    if fmt not in EXPORT_CONTENT_TYPES:
+        raise Http404(f'Unsupported export format: {fmt}')
+    name = f'{subject.subject_code}_grades'
+    if wants_job(request):
+        job = Job.objects.enqueue('export', {'scope': 'subject', 'code': subject.subject_code, 'fmt': fmt, 'name': name})
+        return _job_accepted(job, 'Export queued')
+    return _export_response(request, subject_rows(subject), fmt, name)
+
+@require_http_methods(["GET"])
+def export_course(request, course_abv, fmt):
+    """Stream the grades of every subject of a course, optionally for one semester"""
+    course = get_object_or_404(Course, course_abv=course_abv)
+    if fmt not in EXPORT_CONTENT_TYPES:
+        raise Http404(f'Unsupported export format: {fmt}')
+    school_year = request.GET.get('school_year')
+    semester = request.GET.get('semester')
+    # Both end up in the file name
+    if school_year and not SCHOOL_YEAR_PATTERN.fullmatch(school_year):
+        return JsonResponse({'status': 'error', 'message': 'Invalid school year'}, status=400)
+    if semester and not semester.isdigit():
+        return JsonResponse({'status': 'error', 'message': 'Invalid semester'}, status=400)
+    name = '_'.join(part for part in [course.course_abv, school_year, semester and f'sem{semester}', 'grades'] if part)
+    if wants_job(request):
+        job = Job.objects.enqueue('export', {
+            'scope': 'course', 'code': course.course_abv, 'fmt': fmt, 'name': name,
+            'school_year': school_year, 'semester': semester,
+        })
+        return _job_accepted(job, 'Export queued')
+    return _export_response(request, course_rows(course, school_year, semester), fmt, name)
 
 # default view for subjects
 def subjects(request):
-    subjects = Subject.objects.filter(is_active=True)  # Only show non-archived subjects
-    courses = Course.objects.all()
-    context = {
-        'subjects': subjects,
-        'courses': courses,
-    }
+    # Only show non-archived subjects
+    context = cached('subjects', ['subject', 'course'], lambda: {
+        'subjects': list(Subject.objects.filter(is_active=True)),
+        'courses': list(Course.objects.all()),
+    })
     return render(request, 'subjects.html', context)
 
 # view for subject details including activities and enrolled students
+# Students per page of the subject page's roster
+ROSTER_PAGE_SIZE = 100
+SUBJECT_INFO_ENTITIES = ['subject', 'course', 'student', 'enrollment', 'activity', 'grade']
+
+def _page_number(request):
+    try:
+        return max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        return 1
+
 def subject_info(request, subject_code):
-    subject = get_object_or_404(Subject, subject_code=subject_code)
-    enrollments = StudentSubjectEnrollment.objects.filter(student__course__subject=subject)
-    enrolled_count = enrollments.count()
-    
-    # Get all activities with their grading status
-    activities = Activity.objects.filter(subject=subject).annotate(
-        graded_count=Count('grade'),
+    page_number = _page_number(request)
+    context = cached(
+        'subject_info',
+        SUBJECT_INFO_ENTITIES,
+        lambda: _subject_info_context(subject_code, page_number),
+        parts=[subject_code, page_number],
+    )
+    if context is None:
+        raise Http404('Subject not found')
+    return render(request, 'subjectinfo.html', context)
+
+def _subject_activities(subject):
+    """A subject's activities with their stored grading status"""
+    return Activity.objects.filter(subject=subject).annotate(
+        graded_count=Coalesce('progress__graded_count', 0),
         is_pending=models.Case(
-            models.When(graded_count__lt=enrolled_count, then=True),
+            models.When(progress__graded_count__lt=models.F('progress__enrolled_count'), then=True),
             default=False,
             output_field=models.BooleanField(),
         )
     )
 
-    # Count pending activities
-    pending_activities = activities.filter(is_pending=True).count()
+def _roster_page(total, page_number):
+    """(offset, page info) of a roster page, clamped to the pages that exist"""
+    num_pages = max(1, -(-total // ROSTER_PAGE_SIZE))
+    number = min(page_number, num_pages)
+    offset = (number - 1) * ROSTER_PAGE_SIZE
+    return offset, {
+        'number': number,
+        'num_pages': num_pages,
+        'start': offset + 1 if total else 0,
+        'end': min(offset + ROSTER_PAGE_SIZE, total),
+    }
 
-    context = {
+def _subject_info_page(subject, activities, enrollments, total, roster_page):
+    return {
         'subject': subject,
         'activities': activities,
         'enrolled_students': enrollments,
-        'pending_activities': pending_activities,
-        'total_students': enrolled_count,
+        'roster_page': roster_page,
+        'pending_activities': sum(1 for activity in activities if activity.is_pending),
+        'total_students': total,
     }
-    
-    return render(request, 'subjectinfo.html', context)
 
-def student_info(request, student_id):
-    student = get_object_or_404(Student, student_id=student_id)
-    enrollments = StudentSubjectEnrollment.objects.filter(
+def _subject_info_context(subject_code, page_number=1):
+    subject = Subject.objects.select_related('course').filter(subject_code=subject_code).first()
+    if subject is None:
+        return None
+    # One page of this subject's roster (a COUNT plus one joined query)
+    roster = StudentSubjectEnrollment.objects.roster(subject)
+    total = roster.count()
+    offset, roster_page = _roster_page(total, page_number)
+    enrollments = list(roster[offset:offset + ROSTER_PAGE_SIZE])
+    activities = list(_subject_activities(subject))
+    return _subject_info_page(subject, activities, enrollments, total, roster_page)
+
+def _active_enrollments(student):
+    # Only show active (non-archived) subjects
+    return StudentSubjectEnrollment.objects.filter(
         student=student,
-        subject__is_active=True  # Only show active (non-archived) subjects
+        subject__is_active=True
     ).select_related('subject')
-    
+
+def student_info(request, student_id):
+    student = get_object_or_404(Student, student_id=student_id)
     context = {
         'student': student,
-        'enrollments': enrollments,
+        'enrollments': _active_enrollments(student),
     }
     return render(request, 'studentinfo.html', context)
 
@@ -148,32 +232,44 @@ def student_subject_info(request, student_id, subject_code):
     subject = get_object_or_404(Subject, subject_code=subject_code)
     activities = Activity.objects.filter(subject=subject)
     
-    # Get grades for each activity
-    grades = {}
-    for activity in activities:
-        grade = Grade.objects.filter(
-            student=student,
-            activity=activity
-        ).first()
-        grades[activity.activity_id] = grade.student_grade if grade else 'N/A'
+    # All of the student's grades for this subject in one query
+    grades = student_grades(student, subject)
+
+    # Stored weighted term grade, recomputed only if something changed
+    enrollment = StudentSubjectEnrollment.objects.filter(student=student, subject=subject).first()
+    if enrollment is not None and enrollment.grade_stale:
+        refresh_final_grades(subject)
+        enrollment.refresh_from_db()
     
     context = {
         'student': student,
         'subject': subject,
         'activities': activities,
         'grades': grades,
+        'enrollment': enrollment,
     }
     return render(request, 'studentsubinfo.html', context)
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
     queryset = Subject.objects.filter(archive=False)
     serializer_class = SubjectSerializer
+    etag_entities = ['subject', 'course']
     lookup_field = 'subject_code'
+    cursor_ordering = 'subject_code'
+    filter_params = {
+        'course': 'course__course_abv',
+        'year_level': 'year_level',
+        'section': 'section',
+        'semester': 'semester',
+        'school_year': 'school_year',
+        'is_active': 'is_active',
+    }
+    search_fields = ['subject_code', 'subject_title']
 
     def create(self, request, *args, **kwargs):
         try:
-            print("Received data:", request.data)  # Debug print
+            logger.debug("Creating subject: %s", request.data)
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
                 self.perform_create(serializer)
@@ -182,15 +278,13 @@ class SubjectViewSet(viewsets.ModelViewSet):
                     'message': 'Subject created successfully',
                     'data': serializer.data
                 })
-            print("Validation errors:", serializer.errors)  # Debug print
+            logger.info("Subject validation failed: %s", serializer.errors)
             return JsonResponse({
                 'status': 'error',
                 'message': serializer.errors
             }, status=400)
         except Exception as e:
-            import traceback
-            print("Exception:", str(e))  # Debug print
-            print("Traceback:", traceback.format_exc())  # Debug print
+            logger.exception("Error creating subject")
             return JsonResponse({
                 'status': 'error',
                 'message': f"Server error: {str(e)}"
@@ -207,35 +301,14 @@ class SubjectViewSet(viewsets.ModelViewSet):
                     data[field] = int(data[field])
             
             with transaction.atomic():
-                # If subject code is changing and there are related records
-                if 'subject_code' in data and data['subject_code'] != instance.subject_code:
-                    new_code = data['subject_code'].upper()
-                    
-                    # Create new subject with new code and all updated data
-                    new_subject = Subject.objects.create(
-                        subject_code=new_code,
-                        subject_title=data.get('subject_title', instance.subject_title),
-                        course=instance.course if not data.get('course') else Course.objects.get(course_abv=data['course']),
-                        school_year=data.get('school_year', instance.school_year),
-                        semester=data.get('semester', instance.semester),
-                        year_level=data.get('year_level', instance.year_level),
-                        section=data.get('section', instance.section),
-                        archive=instance.archive,
-                        is_active=instance.is_active
-                    )
-                    
-                    # Update foreign key references from related models
-                    Activity.objects.filter(subject=instance).update(subject=new_subject)
-                    StudentSubjectEnrollment.objects.filter(subject=instance).update(subject=new_subject)
-                    
-                    # Delete old subject after moving all relations
-                    instance.delete()
-                    updated_instance = new_subject
-                else:
-                    # Regular update without changing subject code
-                    serializer = self.get_serializer(instance, data=data, partial=True)
-                    if serializer.is_valid():
-                        updated_instance = serializer.save()
+                # If subject code is changing, rename it in place; activities,
+                # enrollments and the grading policy follow the new code
+                if 'subject_code' in data and data['subject_code'].upper() != instance.subject_code:
+                    instance = Subject.objects.rename(instance.subject_code, data['subject_code'].upper())
+
+                serializer = self.get_serializer(instance, data=data, partial=True)
+                serializer.is_valid(raise_exception=True)
+                updated_instance = serializer.save()
                 
                 return JsonResponse({
                     'status': 'success',
@@ -244,7 +317,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
                 })
                 
         except Exception as e:
-            print(f"Error updating subject: {str(e)}")
+            logger.warning("Error updating subject: %s", e)
             return JsonResponse({
                 'status': 'error',
                 'message': str(e)
@@ -264,12 +337,101 @@ class SubjectViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=400)
 
+    @action(detail=True, methods=['get'])
+    def gradebook(self, request, subject_code=None):
+        """Student x activity grade matrix for the subject"""
+        try:
+            subject = self.get_object()
+            return JsonResponse({
+                'status': 'success',
+                'data': subject_gradebook(subject)
+            })
+        except Exception as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, subject_code=None):
+        """Class-wide grade statistics: overall, per activity, per type and distribution"""
+        subject = self.get_object()
+        return JsonResponse({
+            'status': 'success',
+            'data': analytics.subject_stats(subject)
+        })
+
+    @action(detail=True, methods=['get'], url_path='analytics/students')
+    def student_analytics(self, request, subject_code=None):
+        """Average percentage of each student in the subject"""
+        subject = self.get_object()
+        return JsonResponse({
+            'status': 'success',
+            'data': analytics.subject_student_stats(subject)
+        })
+
+    @action(detail=True, methods=['get', 'put'], url_path='grading-policy')
+    def grading_policy(self, request, subject_code=None):
+        """Read or replace the weights, transmutation and rounding of the subject"""
+        subject = self.get_object()
+        policy = GradingPolicy.for_subject(subject)
+        if request.method == 'GET':
+            return Response({'status': 'success', 'data': GradingPolicySerializer(policy).data})
+
+        serializer = GradingPolicySerializer(policy, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'message': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(subject=subject)
+        return Response({
+            'status': 'success',
+            'message': 'Grading policy saved',
+            'data': serializer.data
+        })
+
+    @action(detail=True, methods=['get'], url_path='final-grades')
+    def final_grades(self, request, subject_code=None):
+        """Stored weighted final grades of every enrolled student"""
+        subject = self.get_object()
+        return Response({'status': 'success', 'data': final_grades(subject)})
+
+    @action(detail=True, methods=['get'])
+    def rankings(self, request, subject_code=None):
+        """Class standings: ?top=N, ?student=<id>, ?buckets=K, optionally within ?section="""
+        subject = self.get_object()
+        section = request.query_params.get('section') or None
+        try:
+            top = int(request.query_params.get('top', 10))
+            buckets = int(request.query_params.get('buckets', 0))
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'top and buckets must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {'subject': subject.subject_code, 'section': section}
+        if top > 0:
+            data['top'] = ranking_service.top_students(subject, min(top, 500), section)
+        student_id = request.query_params.get('student')
+        if student_id:
+            data['student'] = ranking_service.student_rank(subject, student_id, section)
+            if data['student'] is None:
+                return Response({
+                    'status': 'error',
+                    'message': f'No final grade for student {student_id} in {subject.subject_code}'
+                }, status=status.HTTP_404_NOT_FOUND)
+        if buckets > 0:
+            data['buckets'] = ranking_service.percentile_buckets(subject, min(buckets, 100), section)
+        return Response({'status': 'success', 'data': data})
+
     @action(detail=True, methods=['get'])
     def info(self, request, subject_code=None):
         try:
             subject = self.get_object()
-            activities = Activity.objects.filter(subject=subject)
-            enrollments = StudentSubjectEnrollment.objects.filter(subject=subject).select_related('student')
+            activities = Activity.objects.filter(subject=subject).select_related('subject')
+            enrollments = StudentSubjectEnrollment.objects.filter(subject=subject).select_related('student', 'subject')
             
             return JsonResponse({
                 'status': 'success',
@@ -285,11 +447,27 @@ class SubjectViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=400)
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
-    queryset = Activity.objects.all()
+    queryset = Activity.objects.select_related('subject')
     serializer_class = ActivitySerializer
+    etag_entities = ['activity']
     lookup_field = 'activity_id'
+    cursor_ordering = 'activity_id'
+    filter_params = {
+        'subject': 'subject__subject_code',
+        'activity_type': 'activity_type',
+    }
+    search_fields = ['activity_name']
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, activity_id=None):
+        """Score statistics and percentage distribution of one activity"""
+        activity = self.get_object()
+        return JsonResponse({
+            'status': 'success',
+            'data': analytics.activity_stats(activity)
+        })
 
     def retrieve(self, request, *args, **kwargs):
         try:
@@ -369,37 +547,75 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=400)
 
-    def get_queryset(self):
-        queryset = Activity.objects.all()
-        subject_code = self.request.query_params.get('subject', None)
-        if subject_code:
-            queryset = queryset.filter(subject__subject_code=subject_code)
-        return queryset
-
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
-    queryset = StudentSubjectEnrollment.objects.all()
+    queryset = StudentSubjectEnrollment.objects.select_related('student__course', 'subject')
     serializer_class = StudentSubjectEnrollmentSerializer
-
-    def get_queryset(self):
-        queryset = StudentSubjectEnrollment.objects.all()
-        subject_code = self.request.query_params.get('subject', None)
-        if subject_code:
-            queryset = queryset.filter(subject__subject_code=subject_code)
-        return queryset
+    # Deleting a student or subject cascades into enrollments
+    etag_entities = ['enrollment', 'student', 'subject', 'course', 'grade']
+    cursor_ordering = 'id'
+    filter_params = {
+        'subject': 'subject__subject_code',
+        'student': 'student__student_id',
+        'course': 'student__course__course_abv',
+        'year_level': 'student__year_level',
+        'section': 'student__section',
+        'status': 'student__status',
+    }
+    search_fields = ['student__student_id', 'student__last_name', 'student__first_name']
+
+    # Enrollments have no cache signals (they would disable fast deletes), so
+    # the progress counters and cache version are kept current here
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            ActivityProgress.objects.enrollments_changed({serializer.instance.subject_id: 1})
+            CacheVersion.objects.bump('enrollment')
+
+    def perform_update(self, serializer):
+        old_subject_id = serializer.instance.subject_id
+        with transaction.atomic():
+            super().perform_update(serializer)
+            new_subject_id = serializer.instance.subject_id
+            if new_subject_id != old_subject_id:
+                ActivityProgress.objects.enrollments_changed({old_subject_id: -1, new_subject_id: 1})
+            CacheVersion.objects.bump('enrollment')
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            ActivityProgress.objects.enrollments_changed({instance.subject_id: -1})
+            CacheVersion.objects.bump('enrollment')
 
     @action(detail=False, methods=['post'])
     def bulk_enroll(self, request):
+        """Enroll students into one or more subjects.
+
+        Accepts ``subject_code`` or ``subject_codes`` plus either explicit
+        ``student_ids`` or a ``course``/``year_level`` (optionally ``section``)
+        cohort, so whole year levels can be enrolled in one call.
+        """
         try:
-            print("Received enrollment data:", request.data)  # Debug log
-            subject_code = request.data.get('subject_code')
+            logger.debug("Enrollment request: %s", request.data)
+            subject_codes = request.data.get('subject_codes') or []
+            if request.data.get('subject_code'):
+                subject_codes = [request.data.get('subject_code')] + list(subject_codes)
             student_ids = request.data.get('student_ids', [])
             
-            if not subject_code:
+            if not subject_codes:
                 return JsonResponse({
                     'status': 'error',
                     'message': 'Subject code is required'
                 }, status=400)
+
+            if not student_ids and request.data.get('course') and request.data.get('year_level'):
+                cohort = Student.objects.filter(
+                    course__course_abv=request.data['course'],
+                    year_level=request.data['year_level']
+                )
+                if request.data.get('section'):
+                    cohort = cohort.filter(section=request.data['section'])
+                student_ids = list(cohort.values_list('student_id', flat=True))
                 
             if not student_ids:
                 return JsonResponse({
@@ -407,41 +623,39 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
                     'message': 'No students selected for enrollment'
                 }, status=400)
 
-            subject = Subject.objects.get(subject_code=subject_code)
-            enrolled_count = 0
-            
-            for student_id in student_ids:
-                try:
-                    # Check if student exists
-                    student = Student.objects.get(student_id=student_id)
-                    
-                    # Skip if already enrolled
-                    if not StudentSubjectEnrollment.objects.filter(
-                        subject=subject,
-                        student=student
-                    ).exists():
-                        StudentSubjectEnrollment.objects.create(
-                            subject=subject,
-                            student=student
-                        )
-                        enrolled_count += 1
-                except Student.DoesNotExist:
-                    print(f"Student {student_id} not found")  # Debug log
-                    continue
+            subjects = list(Subject.objects.filter(subject_code__in=subject_codes))
+            missing = set(subject_codes) - {subject.subject_code for subject in subjects}
+            if missing:
+                raise Subject.DoesNotExist(', '.join(sorted(missing)))
+
+            if wants_job(request, len(student_ids) * len(subjects) > settings.SMS_JOB_INLINE_ROWS):
+                job = Job.objects.enqueue('bulk_enroll', {
+                    'subject_codes': [subject.subject_code for subject in subjects],
+                    'student_ids': [str(student_id) for student_id in student_ids],
+                })
+                return _job_accepted(job, f'Enrollment of {len(student_ids)} students queued')
+
+            report = StudentSubjectEnrollment.objects.bulk_enroll(subjects, student_ids)
+            enrolled_count = report['enrolled_count']
             
-            print(f"Successfully enrolled {enrolled_count} students")  # Debug log
+            logger.info("Enrolled %d students in %s", enrolled_count, ", ".join(subject_codes))
             return JsonResponse({
                 'status': 'success',
-                'message': f'Successfully enrolled {enrolled_count} students'
+                'message': f'Successfully enrolled {enrolled_count} students',
+                'data': {
+                    'enrolled_count': enrolled_count,
+                    'unknown': report['unknown'],
+                    'subjects': report['subjects']
+                }
             })
             
-        except Subject.DoesNotExist:
+        except Subject.DoesNotExist as e:
             return JsonResponse({
                 'status': 'error',
-                'message': 'Subject not found'
+                'message': f'Subject not found: {e}' if str(e) else 'Subject not found'
             }, status=404)
         except Exception as e:
-            print(f"Error in bulk_enroll: {str(e)}")  # Debug log
+            logger.warning("Error in bulk_enroll: %s", e)
             return JsonResponse({
                 'status': 'error',
                 'message': str(e)
@@ -459,7 +673,13 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
             )
             
             if enrollment.exists():
-                enrollment.delete()
+                with transaction.atomic():
+                    removed = list(enrollment.values_list('subject_id', flat=True))
+                    enrollment.delete()
+                    ActivityProgress.objects.enrollments_changed({
+                        subject_id: -removed.count(subject_id) for subject_id in set(removed)
+                    })
+                    CacheVersion.objects.bump('enrollment')
                 return JsonResponse({
                     'status': 'success',
                     'message': 'Student removed successfully'
@@ -474,15 +694,18 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=400)
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    etag_entities = ['course']
     lookup_field = 'course_abv'
+    cursor_ordering = 'course_abv'
+    search_fields = ['course_abv', 'course_name']
 
     def create(self, request, *args, **kwargs):
         try:
-            print(f"Creating course with data:", request.data)  # Debug log
+            logger.debug("Creating course: %s", request.data)
             
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
@@ -493,14 +716,14 @@ class CourseViewSet(viewsets.ModelViewSet):
                     'data': serializer.data
                 })
             
-            print(f"Validation errors:", serializer.errors)  # Debug log
+            logger.info("Course validation failed: %s", serializer.errors)
             return Response({
                 'status': 'error',
                 'message': serializer.errors
             }, status=400)
             
         except Exception as e:
-            print(f"Error creating course: {str(e)}")  # Debug log
+            logger.warning("Error creating course: %s", e)
             return Response({
                 'status': 'error',
                 'message': str(e)
@@ -512,27 +735,14 @@ class CourseViewSet(viewsets.ModelViewSet):
             new_data = request.data
             
             with transaction.atomic():
-                # If the course code is changing, we need to handle related records
+                # If the course code is changing, rename it in place; students,
+                # subjects and sections are repointed by set-based updates
                 if new_data['course_abv'] != old_course.course_abv:
-                    # Create new course first
-                    new_course = Course.objects.create(
-                        course_abv=new_data['course_abv'],
-                        course_name=new_data['course_name']
-                    )
-                    
-                    # Update all related records to point to the new course
-                    Student.objects.filter(course=old_course).update(course=new_course)
-                    Subject.objects.filter(course=old_course).update(course=new_course)
-                    Section.objects.filter(course=old_course).update(course=new_course)
-                    
-                    # Delete old course after moving all relations
-                    old_course.delete()
-                    serializer = self.get_serializer(new_course)
-                else:
-                    # If only the name is changing, use normal update
-                    serializer = self.get_serializer(old_course, data=new_data)
-                    if serializer.is_valid():
-                        serializer.save()
+                    old_course = Course.objects.rename(old_course.course_abv, new_data['course_abv'])
+
+                serializer = self.get_serializer(old_course, data=new_data)
+                if serializer.is_valid():
+                    serializer.save()
                 
                 return Response({
                     'status': 'success',
@@ -555,11 +765,9 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
             return Response({
                 'status': 'success',
-                'data': serializer.data
+                'data': self.get_values_object()
             })
         except Course.DoesNotExist:
             return Response({
@@ -572,15 +780,98 @@ class CourseViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=500)
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
-    queryset = Student.objects.all()
+    queryset = Student.objects.select_related('course')
     serializer_class = StudentSerializer
+    etag_entities = ['student', 'course']
     lookup_field = 'student_id'
+    cursor_ordering = 'student_id'
+    filter_params = {
+        'course': 'course__course_abv',
+        'year_level': 'year_level',
+        'section': 'section',
+        'status': 'status',
+    }
+    search_fields = ['student_id', 'last_name', 'first_name']
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Name/ID prefix search over students, one keyset page at a time"""
+        try:
+            page_size = min(int(request.query_params.get('page_size', STUDENT_PAGE_SIZE)), 100)
+            page = search_students(
+                query=request.query_params.get('q', ''),
+                course=request.query_params.get('course') or None,
+                sort=request.query_params.get('sort', 'name'),
+                cursor=request.query_params.get('cursor') or None,
+                page_size=max(page_size, 1),
+            )
+            return JsonResponse({
+                'status': 'success',
+                'data': page
+            })
+        except ValueError as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, student_id=None):
+        """Average scores and percentages of a student in each subject"""
+        student = self.get_object()
+        return JsonResponse({
+            'status': 'success',
+            'data': analytics.student_stats(student)
+        })
+
+    @action(detail=True, methods=['get'], url_path='report-card')
+    def report_card(self, request, student_id=None):
+        """Final grades of the student in every enrolled subject"""
+        student = self.get_object()
+        return Response({'status': 'success', 'data': report_card(student)})
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_students(self, request):
+        """Bulk import from an uploaded CSV/JSON file or a JSON list of students"""
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None and wants_job(request, upload.size > settings.SMS_JOB_INLINE_UPLOAD_BYTES):
+                fmt = upload_format(upload, request.data.get('format'))
+                job = Job.objects.enqueue('import_students', {'file': save_upload(upload, fmt), 'format': fmt})
+                return _job_accepted(job, 'Import queued')
+            if upload is not None:
+                rows = read_uploaded_rows(upload, request.data.get('format'))
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                rows = request.data.get('students')
+            if not rows:
+                return Response({
+                    'status': 'error',
+                    'message': 'Upload a file or send a list of students'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if upload is None and wants_job(request, len(rows) > settings.SMS_JOB_INLINE_ROWS):
+                job = Job.objects.enqueue('import_students', {'file': save_rows(rows), 'format': 'json'})
+                return _job_accepted(job, 'Import queued')
+
+            result = import_students(rows)
+            return Response({
+                'status': 'success',
+                'message': f"Imported {result['created']} students, {len(result['errors'])} rows rejected",
+                'data': result
+            })
+        except (ValueError, AttributeError, UnicodeDecodeError) as e:
+            return Response({
+                'status': 'error',
+                'message': f'Could not read the import file: {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
     def create(self, request, *args, **kwargs):
         try:
-            print("Received data:", request.data)  # Debug log
+            logger.debug("Creating student: %s", request.data)
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
                 student = serializer.save()
@@ -591,24 +882,22 @@ class StudentViewSet(viewsets.ModelViewSet):
                     'data': response_serializer.data
                 }, status=status.HTTP_201_CREATED)
             
-            print("Validation errors:", serializer.errors)  # Debug log
+            logger.info("Student validation failed: %s", serializer.errors)
             return Response({
                 'status': 'error',
                 'message': serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print("Exception:", str(e))  # Debug log
+            logger.warning("Error creating student: %s", e)
             return Response({
                 'status': 'error',
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
         return JsonResponse({
             'status': 'success',
-            'data': serializer.data
+            'data': self.get_values_object()
         })
 
     def update(self, request, *args, **kwargs):
@@ -655,7 +944,7 @@ class StudentViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            print("Error updating student:", str(e))
+            logger.warning("Error updating student: %s", e)
             return Response({
                 'status': 'error',
                 'message': str(e)
@@ -678,7 +967,7 @@ class StudentViewSet(viewsets.ModelViewSet):
 class StudentAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        students = Student.objects.all()
+        students = Student.objects.select_related('course')
         serializer = StudentSerializer(students, many=True)
         return Response(serializer.data)
 
@@ -731,31 +1020,34 @@ class StudentDetailAPIView(APIView):
         })
 
 def courses(request):
-    courses = Course.objects.all()
-    sections = Section.objects.select_related('course').all()
-    context = {
-        'courses': courses,
-        'sections': sections,
-    }
+    context = cached('courses', ['course', 'section', 'student'], lambda: {
+        'courses': list(Course.objects.all()),
+        'sections': list(Section.objects.select_related('course').with_occupancy()),
+    })
     return render(request, 'courses.html', context)
 
 def students(request):
-    students = Student.objects.all().select_related('course')
-    courses = Course.objects.all()
-    return render(request, 'students.html', {'students': students, 'courses': courses})
+    # Only the first page is embedded; the rest is fetched from /api/students/search/
+    context = cached('students', ['student', 'course'], lambda: {
+        'initial_students': search_students(page_size=STUDENT_PAGE_SIZE),
+        'courses': list(Course.objects.all()),
+    })
+    return render(request, 'students.html', context)
 
 def grades(request, activity_id):
     activity = Activity.objects.select_related('subject').get(activity_id=activity_id)
     enrollments = StudentSubjectEnrollment.objects.filter(
         subject=activity.subject
-    ).select_related('student').annotate(
-        grade=models.Subquery(
-            Grade.objects.filter(
-                student=models.OuterRef('student'),
-                activity=activity
-            ).values('student_grade')[:1]
-        )
-    ).order_by('student__last_name', 'student__first_name')  # Order by last name, then first name
+    ).select_related('student').order_by('student__last_name', 'student__first_name')  # Order by last name, then first name
+    grades = {
+        student_id: format_grade(score, grade_status)
+        for student_id, score, grade_status in Grade.objects.filter(
+            activity=activity
+        ).values_list('student_id', 'score', 'status')
+    }
+    enrollments = list(enrollments)
+    for enrollment in enrollments:
+        enrollment.grade = grades.get(enrollment.student_id)
 
     context = {
         'activity': activity,
@@ -763,10 +1055,15 @@ def grades(request, activity_id):
     }
     return render(request, 'grades.html', context)
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
+    # Deleting a student or activity cascades into grades
+    etag_entities = ['grade', 'student', 'activity']
+
+    # Only the save_grades/save_gradebook actions are routed; Grade.objects.save_grades()
+    # bumps the grade cache version itself
 
     @action(detail=False, methods=['post'])
     def save_grades(self, request, activity_id=None):
@@ -774,26 +1071,12 @@ class GradeViewSet(viewsets.ModelViewSet):
             grades_data = request.data.get('grades', [])
             activity = get_object_or_404(Activity, activity_id=activity_id)
             
-            with transaction.atomic():
-                for grade_item in grades_data:
-                    student_id = grade_item['student_id']
-                    grade_value = grade_item['grade']
-                    
-                    if grade_value == 'N/A':
-                        # Delete the grade if it exists
-                        Grade.objects.filter(
-                            student_id=student_id,
-                            activity=activity
-                        ).delete()
-                    else:
-                        # Update or create the grade
-                        Grade.objects.update_or_create(
-                            student_id=student_id,
-                            activity=activity,
-                            defaults={'student_grade': grade_value}
-                        )
-
-            return Response({'status': 'success'}, status=status.HTTP_200_OK)
+            result = Grade.objects.save_grades(
+                (activity.activity_id, grade_item['student_id'], grade_item['grade'])
+                for grade_item in grades_data
+            )
+
+            return Response({'status': 'success', 'data': result}, status=status.HTTP_200_OK)
             
         except Activity.DoesNotExist:
             return Response({
@@ -806,6 +1089,34 @@ class GradeViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def save_gradebook(self, request):
+        """Save a whole gradebook grid: grades for many activities in one request"""
+        try:
+            grades_data = request.data.get('grades', [])
+            activity_ids = {int(grade_item['activity_id']) for grade_item in grades_data}
+            found = set(Activity.objects.filter(
+                activity_id__in=activity_ids
+            ).values_list('activity_id', flat=True))
+            if found != activity_ids:
+                return Response({
+                    'status': 'error',
+                    'message': f'Activity not found: {sorted(activity_ids - found)}'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            result = Grade.objects.save_grades(
+                (grade_item['activity_id'], grade_item['student_id'], grade_item['grade'])
+                for grade_item in grades_data
+            )
+            return Response({'status': 'success', 'data': result}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+@etag_view('activity')
 @api_view(['GET', 'POST', 'PUT', 'DELETE'])
 def activities_api(request, activity_id=None):
     if request.method == 'POST':
@@ -838,7 +1149,7 @@ def activities_api(request, activity_id=None):
                 }
             })
         else:
-            activities = Activity.objects.all()
+            activities = Activity.objects.select_related('subject')
             return JsonResponse({'status': 'success', 'data': ActivitySerializer(activities, many=True).data})
 
     elif request.method == 'PUT':
@@ -897,15 +1208,17 @@ def unarchive_subject(request, subject_code):
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 def archived_subjects(request):
-    subjects = Subject.objects.filter(is_active=False)
+    subjects = cached('archived_subjects', ['subject', 'course'], lambda: list(
+        Subject.objects.filter(is_active=False)
+    ))
     return render(request, 'archived_subjects.html', {'subjects': subjects})
 
+@etag_view('student', 'course', 'subject', 'enrollment')
 @api_view(['GET'])
 def get_available_students(request, subject_code):
     """Get students who match the subject's year and section"""
     try:
         subject = get_object_or_404(Subject, subject_code=subject_code)
-        print(f"Found subject: {subject.subject_code}")  # Debug log
         
         enrolled_student_ids = StudentSubjectEnrollment.objects.filter(
             subject=subject
@@ -929,8 +1242,6 @@ def get_available_students(request, subject_code):
             student_id__in=enrolled_student_ids
         ).select_related('course')
         
-        print(f"Found {available_students.count()} available students")  # Debug log
-        
         students_list = []
         for student in available_students:
             students_list.append({
@@ -944,18 +1255,20 @@ def get_available_students(request, subject_code):
                 'status': student.status  # Add status to display
             })
         
+        logger.debug("Found %d available students for %s", len(students_list), subject.subject_code)
         return Response({
             'status': 'success',
             'data': students_list
         }, status=200)
         
     except Exception as e:
-        print(f"Error: {str(e)}")  # Debug log
+        logger.warning("Error listing available students: %s", e)
         return Response({
             'status': 'error',
             'message': str(e)
         }, status=500)
 
+@etag_view('enrollment', 'student', 'course', 'subject')
 @require_http_methods(["GET"])
 def get_enrolled_students(request):
     """Get students enrolled in a specific subject"""
@@ -986,14 +1299,15 @@ def get_enrolled_students(request):
     
     return JsonResponse(enrolled_students, safe=False)
 
+@etag_view('section', 'student')
 @require_http_methods(["GET"])
 def get_available_sections(request):
     course_id = request.GET.get('course')
     year_level = request.GET.get('year')
     
-    sections = Section.objects.all()
+    sections = Section.objects.select_related('course').with_occupancy()
     if course_id:
-        sections = sections.filter(course_id=course_id)
+        sections = sections.filter(course__course_abv=course_id)
     if year_level:
         sections = sections.filter(year_level=year_level)
     
@@ -1014,7 +1328,7 @@ def create_section(request):
         section = Section.objects.create(
             year_level=data['year_level'],
             section_name=data['section_name'],
-            course_id=data['course'],
+            course=Course.objects.get(course_abv=data['course']),
             max_students=data.get('max_students', 40)
         )
         return JsonResponse({
@@ -1028,24 +1342,27 @@ def create_section(request):
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)})
 
+@etag_view('section', 'course')
 @require_http_methods(["GET"])
 def get_sections(request):
     course = request.GET.get('course')
     year_level = request.GET.get('year')
     
-    query = Section.objects.all()
-    if course:
-        query = query.filter(course__course_abv=course)
-    if year_level:
-        query = query.filter(year_level=year_level)
-        
-    sections = [{
-        'id': section.id,
-        'name': section.section_name,
-        'year_level': section.year_level,
-        'course': section.course.course_abv
-    } for section in query]
-    
+    def build():
+        query = Section.objects.select_related('course')
+        if course:
+            query = query.filter(course__course_abv=course)
+        if year_level:
+            query = query.filter(year_level=year_level)
+        return [{
+            'id': section.id,
+            'name': section.section_name,
+            'year_level': section.year_level,
+            'course': section.course.course_abv
+        } for section in query]
+
+    sections = cached('get_sections', ['section', 'course'], build, parts=[course, year_level],
+                      versions=getattr(request, 'entity_versions', None))
     return JsonResponse({'status': 'success', 'data': sections})
 
 @require_http_methods(["POST"])
@@ -1068,11 +1385,37 @@ def add_section(request):
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)})
 
-class SectionViewSet(viewsets.ModelViewSet):
+class SectionViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     permission_classes = [AllowAny]
-    queryset = Section.objects.all()
+    queryset = Section.objects.select_related('course')
     serializer_class = SectionSerializer
+    etag_entities = ['section', 'course']
     lookup_field = 'id'
+    cursor_ordering = 'id'
+    filter_params = {
+        'course': 'course__course_abv',
+        'year_level': 'year_level',
+        'year': 'year_level',
+    }
+    search_fields = ['section_name']
+
+    @action(detail=False, methods=['get'])
+    def occupancy(self, request):
+        """Current student count and remaining capacity of every section"""
+        sections = self.filter_queryset(self.get_queryset()).with_occupancy()
+        return Response({
+            'status': 'success',
+            'data': [{
+                'id': section.id,
+                'course': section.course.course_abv,
+                'year_level': section.year_level,
+                'section_name': section.section_name,
+                'max_students': section.max_students,
+                'student_count': section.student_count,
+                'remaining': section.remaining,
+                'is_full': section.is_full()
+            } for section in sections]
+        })
 
     def create(self, request, *args, **kwargs):
         try:
@@ -1089,7 +1432,7 @@ class SectionViewSet(viewsets.ModelViewSet):
                     'message': 'All fields are required'
                 }, status=400)
 
-            print(f"Creating section with data:", data)  # Debug log
+            logger.debug("Creating section: %s", data)
             serializer = self.get_serializer(data=data)
             
             if serializer.is_valid():
@@ -1100,16 +1443,14 @@ class SectionViewSet(viewsets.ModelViewSet):
                     'message': 'Section created successfully'
                 })
             
-            print(f"Validation errors:", serializer.errors)  # Debug log
+            logger.info("Section validation failed: %s", serializer.errors)
             return Response({
                 'status': 'error',
                 'message': serializer.errors
             }, status=400)
 
         except Exception as e:
-            print(f"Error creating section: {str(e)}")  # Debug log
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating section")
             return Response({
                 'status': 'error',
                 'message': str(e)
@@ -1129,7 +1470,7 @@ class SectionViewSet(viewsets.ModelViewSet):
             # Remove None values
             data = {k: v for k, v in data.items() if v is not None}
 
-            print(f"Updating section {instance.id} with data:", data)  # Debug log
+            logger.debug("Updating section %s: %s", instance.id, data)
             
             serializer = self.get_serializer(instance, data=data, partial=True)
             if serializer.is_valid():
@@ -1140,14 +1481,14 @@ class SectionViewSet(viewsets.ModelViewSet):
                     'message': 'Section updated successfully'
                 })
             
-            print(f"Validation errors:", serializer.errors)  # Debug log
+            logger.info("Section validation failed: %s", serializer.errors)
             return Response({
                 'status': 'error',
                 'message': serializer.errors
             }, status=400)
             
         except Exception as e:
-            print(f"Error updating section: {str(e)}")  # Debug log
+            logger.warning("Error updating section: %s", e)
             return Response({
                 'status': 'error',
                 'message': str(e)
@@ -1169,11 +1510,9 @@ class SectionViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
             return Response({
                 'status': 'success',
-                'data': serializer.data
+                'data': self.get_values_object()
             })
         except Exception as e:
             return Response({
@@ -1181,18 +1520,7 @@ class SectionViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=404)
 
-    def get_queryset(self):
-        queryset = Section.objects.all()
-        course = self.request.query_params.get('course', None)
-        year_level = self.request.query_params.get('year_level', None)
-
-        if course:
-            queryset = queryset.filter(course__course_abv=course)
-        if year_level:
-            queryset = queryset.filter(year_level=year_level)
-        
-        return queryset.select_related('course')
-
+@etag_view('section', 'course')
 @api_view(['GET'])
 def get_student_sections(request):
     course = request.GET.get('course')
@@ -1204,12 +1532,93 @@ def get_student_sections(request):
             'message': 'Course and year level are required'
         })
     
-    sections = Section.objects.filter(
+    sections = cached('get_student_sections', ['section', 'course'], lambda: list(Section.objects.filter(
         course__course_abv=course,
         year_level=year_level
-    ).values('section_name')
+    ).values('section_name')), parts=[course, year_level],
+        versions=getattr(request, 'entity_versions', None))
     
     return JsonResponse({
         'status': 'success',
-        'data': list(sections)
-    })
\ No newline at end of file
+        'data': sections
+    })
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status and progress of background jobs; poll /api/jobs/<id>/ after a 202"""
+    permission_classes = [AllowAny]
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    cursor_ordering = '-id'
+    filter_params = {'status': 'status', 'kind': 'kind'}
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response({'status': 'success', 'data': self.get_serializer(self.get_object()).data})
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The file written by a finished export job"""
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED or 'file' not in (job.result or {}):
+            return Response({'status': 'error', 'message': f'Job is {job.status}, no file to download'}, status=409)
+        path = job_file(job, job.params['fmt'])
+        if not path.exists():
+            return Response({'status': 'error', 'message': 'Export file no longer exists'}, status=410)
+        return FileResponse(path.open('rb'), as_attachment=True, filename=job.result['file'],
+                            content_type=EXPORT_CONTENT_TYPES.get(job.params['fmt']))
+
+@api_view(['GET'])
+def cache_stats_view(request):
+    """Hit/miss counters of the read-through cache in this process"""
+    return Response({'status': 'success', 'data': cache_stats.snapshot()})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Per-view query counts and latencies in Prometheus text format (staff only)"""
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Async versions of the heavy read views, routed in by SMSapp/urls.py when
+# SMS_ASYNC_VIEWS is on (ASGI). Their independent queries run concurrently.
+
+async def index_async(request):
+    return render(request, 'index.html', await aget_dashboard_stats())
+
+async def subject_info_async(request, subject_code):
+    page_number = _page_number(request)
+    context = await acached(
+        'subject_info',
+        SUBJECT_INFO_ENTITIES,
+        lambda: _subject_info_context_async(subject_code, page_number),
+        parts=[subject_code, page_number],
+    )
+    if context is None:
+        raise Http404('Subject not found')
+    return render(request, 'subjectinfo.html', context)
+
+async def _subject_info_context_async(subject_code, page_number=1):
+    # Filter on the code so the subject, roster count and activities need not wait for each other
+    subjects = Subject.objects.filter(subject_code=subject_code)
+    subject_pk = Subquery(subjects.values('pk')[:1])
+    roster = StudentSubjectEnrollment.objects.roster(subject_pk)
+    subject, total, activities = await gather(
+        subjects.select_related('course').first,
+        roster.count,
+        lambda: list(_subject_activities(subject_pk)),
+    )
+    if subject is None:
+        return None
+    offset, roster_page = _roster_page(total, page_number)
+    enrollments = await db(lambda: list(roster[offset:offset + ROSTER_PAGE_SIZE]))
+    return _subject_info_page(subject, activities, enrollments, total, roster_page)
+
+async def student_info_async(request, student_id):
+    students = Student.objects.filter(student_id=student_id)
+    student, enrollments = await gather(
+        students.select_related('course').first,
+        lambda: list(_active_enrollments(Subquery(students.values('pk')[:1]))),
+    )
+    if student is None:
+        raise Http404('Student not found')
+    return render(request, 'studentinfo.html', {'student': student, 'enrollments': enrollments})